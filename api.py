@@ -1,12 +1,56 @@
-from fastapi import FastAPI, Depends, HTTPException
+from fastapi import (
+    BackgroundTasks,
+    FastAPI,
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+)
 from fastapi.middleware.cors import CORSMiddleware
-from sqlmodel import Session, select
-from typing import List
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Row, String, type_coerce
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from typing import List, Literal, Optional
 import asyncio
+import base64
+import csv
+from datetime import datetime
+import io
+import json
 
-from models import DerbyName, DerbyNameCreate, DerbyNameResponse
-from database import get_session, init_db
+from models import (
+    DerbyName,
+    DerbyNameCreate,
+    DerbyNameResponse,
+    NameSearchResult,
+    NameStatsResponse,
+    WordFrequencyResponse,
+)
+from database import (
+    get_async_session,
+    get_write_queue,
+    init_db,
+    init_search_corpus,
+    write_queue,
+)
+from encoding import MSGPACK_MEDIA_TYPE, list_response, negotiate, row_items
+from search import match_expression, search_names
+from stats import read_stats
+from versioning import is_not_modified, read_version, validators
+from wordcloud_generator import (
+    MAX_IMAGE_SIZE,
+    MIN_IMAGE_SIZE,
+    WordCloudRenderer,
+    get_wordcloud_renderer,
+)
+from word_frequencies import read_word_frequencies
+from write_queue import WriteQueue
 from generator import get_generator
+import services
 
 # Create FastAPI app
 app = FastAPI(title="Derby Name Generator API")
@@ -20,6 +64,33 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress bodies of at least this many bytes for clients that accept gzip
+GZIP_MIN_SIZE = 1024
+app.add_middleware(
+    GZipMiddleware,
+    minimum_size=GZIP_MIN_SIZE,
+    # PNGs are already deflated
+    exclude_content_types=("text/event-stream", "image/png"),
+)
+
+# Upper bound on names generated by a single batch request
+MAX_BATCH_SIZE = 100
+# Page sizes for listing saved names
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+DEFAULT_SEARCH_SIZE = 20
+# Days of per-day stats returned by default, and at most
+DEFAULT_STATS_DAYS = 30
+MAX_STATS_DAYS = 366
+# Words sent to the word cloud page by default, and at most
+DEFAULT_WORDCLOUD_WORDS = 100
+MAX_WORDCLOUD_WORDS = 500
+# Rows fetched from the database cursor per exported chunk
+EXPORT_CHUNK_SIZE = 1000
+NAME_COLUMNS = ["id", "name", "created_at", "is_favorite", "meta"]
+# List routes can also answer in MessagePack
+LIST_RESPONSES = {200: {"content": {MSGPACK_MEDIA_TYPE: {}}}}
+
 # Background task flag
 background_task_running = False
 
@@ -36,18 +107,15 @@ async def generate_names_background():
             # Wait 60 seconds between generations
             await asyncio.sleep(60)
 
-            # Generate a new name
+            # Generate a new name off the event loop
             generator = get_generator()
-            name = generator.generate()
-
-            # Save to database
-            from database import engine
+            name = await run_in_threadpool(generator.generate)
 
-            with Session(engine) as session:
-                db_name = DerbyName(name=name)
-                session.add(db_name)
-                session.commit()
+            # Save to database alongside request inserts
+            if await write_queue.insert(name):
                 print(f"Background task generated: {name}")
+            else:
+                print(f"Background task skipped saved name: {name}")
         except Exception as e:
             print(f"Error in background task: {e}")
 
@@ -56,6 +124,16 @@ async def generate_names_background():
 async def on_startup():
     """Initialize database and start background task on startup."""
     init_db()
+    # Load saved names so generation can avoid duplicates without a query
+    await write_queue.load_saved_names()
+    generator = get_generator()
+    generator.taken = write_queue.saved
+    # Index the training corpus for search; a no-op unless it changed
+    await run_in_threadpool(init_search_corpus, generator.name_list())
+    # Start filling the pre-generated name pool off the event loop
+    generator.pool.start()
+    # In-process callers such as the UI dispatch onto this loop
+    services.bind_loop(asyncio.get_running_loop())
     # Start background task
     asyncio.create_task(generate_names_background())
     print("API started with background name generation")
@@ -66,65 +144,345 @@ async def on_shutdown():
     """Stop background task on shutdown."""
     global background_task_running
     background_task_running = False
+    services.bind_loop(None)
+    generator = get_generator()
+    generator.pool.stop()
+    # Commit any names still waiting for a group flush
+    await write_queue.close()
+    if generator.parallel is not None:
+        generator.parallel.shutdown()
+    get_wordcloud_renderer().shutdown()
+    # Save names learned since the last checkpoint
+    generator.checkpoint()
     print("Background task stopped")
 
 
 @app.post("/api/generate", response_model=DerbyNameResponse)
-def generate_name(session: Session = Depends(get_session)):
-    """Generate a new derby name using Markovify."""
+async def generate_name(
+    seed: Optional[int] = Query(None, ge=0),
+    session: AsyncSession = Depends(get_async_session),
+    queue: WriteQueue = Depends(get_write_queue),
+):
+    """Generate a new derby name using Markovify, deterministically if seeded."""
+    db_name = await services.generate_name(get_generator(), queue, session, seed)
+    if db_name is None:
+        raise HTTPException(status_code=503, detail="Could not generate an unused name")
+    return db_name
+
+
+@app.post("/api/generate/batch", response_model=List[DerbyNameResponse])
+async def generate_names_batch(
+    count: int = Query(10, ge=1, le=MAX_BATCH_SIZE),
+    queue: WriteQueue = Depends(get_write_queue),
+):
+    """Generate several derby names and save them in a single transaction."""
     generator = get_generator()
-    name = generator.generate()
+    names = await run_in_threadpool(generator.generate_many, count)
 
-    # Save to database
-    db_name = DerbyName(name=name)
-    session.add(db_name)
-    session.commit()
-    session.refresh(db_name)
+    # One multi-row INSERT ... RETURNING; names saved meanwhile are skipped
+    return await queue.insert_many(names)
 
-    return db_name
 
+@app.get("/api/generate/pool")
+async def get_pool_stats():
+    """Report the pre-generated name pool's size and hit/miss counters."""
+    return get_generator().pool.stats()
+
+
+async def names_validators(
+    request: Request,
+    response: Response,
+    session: AsyncSession = Depends(get_async_session),
+) -> dict[str, str]:
+    """
+    Answer unchanged conditional GETs on the names collection with 304.
+
+    Every write to derbyname bumps its version through a trigger, so an
+    unchanged poll costs one primary-key read and no collection query. The
+    version is read before the data, so a write racing the request leaves
+    the validators older than the body and the next poll fetches again.
+
+    Returns:
+        ETag, Last-Modified and Cache-Control headers for the response
+    """
+    version = await read_version(session, "derbyname")
+    if version is None:
+        return {}
+    headers = {**validators(version), "Cache-Control": "no-cache"}
+    if is_not_modified(
+        headers,
+        request.headers.get("if-none-match"),
+        request.headers.get("if-modified-since"),
+    ):
+        raise HTTPException(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return headers
+
+
+def _encode_cursor(row: Row) -> str:
+    """Encode a row's position in the newest-first listing as an opaque cursor."""
+    position = f"{row.created_at.isoformat()}|{row.id}"
+    return base64.urlsafe_b64encode(position.encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """Decode a cursor from ``_encode_cursor`` into (created_at, id)."""
+    try:
+        created_at, name_id = base64.urlsafe_b64decode(cursor).decode().split("|")
+        return datetime.fromisoformat(created_at), int(name_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from e
+
+
+@app.get(
+    "/api/names",
+    response_model=List[DerbyNameResponse],
+    responses=LIST_RESPONSES,
+)
+async def get_names(
+    request: Request,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = None,
+    favorite: Optional[bool] = None,
+    since: Optional[datetime] = None,
+    session: AsyncSession = Depends(get_async_session),
+    headers: dict[str, str] = Depends(names_validators),
+):
+    """
+    Get saved derby names, newest first, one page at a time.
+
+    Pages are keyset-paginated over (created_at, id), so every page is an
+    index range scan no matter how deep it is. When more names follow, the
+    ``X-Next-Cursor`` header holds the value to pass as ``after``.
+
+    Rows are read as plain tuples and encoded directly, as JSON or, for
+    ``Accept: application/msgpack``, MessagePack.
+    """
+    if after is not None:
+        after = _decode_cursor(after)
+    rows = await services.list_names(session, limit, after, favorite, since)
+    # A returned response doesn't pick up headers set on the injected one
+    headers = dict(headers)
+    if len(rows) == limit:
+        headers["X-Next-Cursor"] = _encode_cursor(rows[-1])
+    media_type = negotiate(request.headers.get("accept"))
+    items = row_items(NAME_COLUMNS, rows, media_type, json_columns=["meta"])
+    return list_response(items, media_type, headers)
+
+
+def _csv_rows(rows, header: bool = False) -> bytes:
+    """Encode exported rows as CSV, with ``meta`` as a JSON string."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(NAME_COLUMNS)
+    writer.writerows(
+        (name_id, name, created_at.replace(" ", "T"), is_favorite, meta)
+        for name_id, name, created_at, is_favorite, meta in rows
+    )
+    return buffer.getvalue().encode()
+
+
+def _ndjson_rows(rows, header: bool = False) -> bytes:
+    """Encode exported rows as newline-delimited JSON objects."""
+    # Assembled by hand: meta is already JSON text, and only the name needs
+    # escaping
+    return "".join(
+        f'{{"id": {name_id}, "name": {json.dumps(name)}, '
+        f'"created_at": "{created_at.replace(" ", "T")}", '
+        f'"is_favorite": {"true" if is_favorite else "false"}, '
+        f'"meta": {meta or "null"}}}\n'
+        for name_id, name, created_at, is_favorite, meta in rows
+    ).encode()
+
+
+# Media type and chunk encoder for each export format
+EXPORT_FORMATS = {
+    "csv": ("text/csv", _csv_rows),
+    "ndjson": ("application/x-ndjson", _ndjson_rows),
+}
+
+
+async def _export_chunks(bind, encode):
+    """
+    Yield the names table as encoded chunks, oldest first.
+
+    Rows come straight off the database cursor ``EXPORT_CHUNK_SIZE`` at a
+    time as plain tuples, so memory stays flat however large the table is.
+    Timestamps and meta are read as their stored text, skipping the
+    datetime and JSON round trips. The connection is opened here rather than
+    borrowed from the request, so it stays open for as long as the response
+    streams.
+    """
+    table = DerbyName.__table__
+    statement = select(
+        table.c.id,
+        table.c.name,
+        type_coerce(table.c.created_at, String),
+        table.c.is_favorite,
+        type_coerce(table.c.meta, String),
+    ).order_by(table.c.id)
+    yield encode([], header=True)
+    async with bind.connect() as conn:
+        result = await conn.stream(statement)
+        async for rows in result.partitions(EXPORT_CHUNK_SIZE):
+            yield encode(rows)
+
+
+@app.get(
+    "/api/names/search",
+    response_model=List[NameSearchResult],
+    responses=LIST_RESPONSES,
+)
+async def find_names(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=200),
+    source: Literal["saved", "corpus", "all"] = "saved",
+    limit: int = Query(DEFAULT_SEARCH_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0),
+    session: AsyncSession = Depends(get_async_session),
+    headers: dict[str, str] = Depends(names_validators),
+):
+    """
+    Search saved names, the training corpus, or both.
+
+    Every word in ``q`` matches as a prefix, so "rol de" finds "Roller
+    Derby". Results are ranked by BM25, best first, and paginated with
+    ``limit`` and ``offset``.
+    """
+    match = match_expression(q)
+    if match is None:
+        raise HTTPException(status_code=400, detail="Search query has no words")
+    results = await search_names(session, match, source, limit, offset)
+    return list_response(results, negotiate(request.headers.get("accept")), headers)
+
+
+@app.get("/api/names/export")
+async def export_names(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    session: AsyncSession = Depends(get_async_session),
+    headers: dict[str, str] = Depends(names_validators),
+):
+    """Stream every saved name as NDJSON or CSV."""
+    media_type, encode = EXPORT_FORMATS[format]
+    # A returned response doesn't pick up headers set on the injected one
+    return StreamingResponse(
+        _export_chunks(session.bind, encode),
+        media_type=media_type,
+        headers={
+            **headers,
+            "Content-Disposition": f'attachment; filename="derby_names.{format}"',
+        },
+    )
+
+
+@app.get(
+    "/api/stats",
+    response_model=NameStatsResponse,
+    dependencies=[Depends(names_validators)],
+)
+async def get_stats(
+    days: int = Query(DEFAULT_STATS_DAYS, ge=1, le=MAX_STATS_DAYS),
+    session: AsyncSession = Depends(get_async_session),
+):
+    """
+    Get name totals, favorites and per-day volume.
+
+    Triggers keep the counters current on every insert, delete and favorite
+    toggle, so this reads a single row and ``days`` rollup rows however
+    large the names table grows.
+    """
+    return await read_stats(session, days)
+
+
+@app.get(
+    "/api/wordcloud/words",
+    response_model=List[WordFrequencyResponse],
+    dependencies=[Depends(names_validators)],
+)
+async def get_wordcloud_words(
+    limit: int = Query(DEFAULT_WORDCLOUD_WORDS, ge=1, le=MAX_WORDCLOUD_WORDS),
+    session: AsyncSession = Depends(get_async_session),
+):
+    """
+    Get the most common words in saved names, sized for the word cloud.
+
+    Favorites count extra. Counts are read from the full-text index term
+    lists, so the response is at most ``limit`` small objects and the
+    query never scans derbyname, however large it grows.
+    """
+    return await read_word_frequencies(session, limit)
+
+
+@app.get(
+    "/api/wordcloud.png",
+    response_class=Response,
+    responses={200: {"content": {"image/png": {}}}},
+)
+async def get_wordcloud(
+    width: int = Query(1200, ge=MIN_IMAGE_SIZE, le=MAX_IMAGE_SIZE),
+    height: int = Query(600, ge=MIN_IMAGE_SIZE, le=MAX_IMAGE_SIZE),
+    preview: bool = False,
+    session: AsyncSession = Depends(get_async_session),
+    headers: dict[str, str] = Depends(names_validators),
+    renderer: WordCloudRenderer = Depends(get_wordcloud_renderer),
+):
+    """
+    Render the most recent names as a word cloud PNG.
 
-@app.get("/api/names", response_model=List[DerbyNameResponse])
-def get_names(session: Session = Depends(get_session)):
-    """Get all saved derby names."""
-    statement = select(DerbyName).order_by(DerbyName.created_at.desc())
-    names = session.exec(statement).all()
-    return names
+    Renders run in a worker pool and are cached per dataset version and
+    size, so repeat requests are served from memory, and browsers holding
+    the current ETag get a 304. With ``preview``, a render that isn't
+    ready yet is started in the background and a small, uncached image is
+    returned right away.
+    """
+    # The ETag changes with every write to derbyname
+    png, full = await services.wordcloud_png(
+        session, renderer, headers.get("ETag"), width, height, preview
+    )
+    if not full:
+        headers = {"Cache-Control": "no-store"}
+    return Response(png, media_type="image/png", headers=headers)
 
 
 @app.post("/api/names", response_model=DerbyNameResponse)
-def create_name(name_data: DerbyNameCreate, session: Session = Depends(get_session)):
-    """Save a custom derby name."""
-    db_name = DerbyName(name=name_data.name)
-    session.add(db_name)
-    session.commit()
-    session.refresh(db_name)
+async def create_name(
+    name_data: DerbyNameCreate,
+    background_tasks: BackgroundTasks,
+    queue: WriteQueue = Depends(get_write_queue),
+):
+    """Save a custom derby name and teach it to the models."""
+    db_name = await queue.insert(name_data.name)
+    if db_name is None:
+        raise HTTPException(status_code=409, detail="Name already exists")
+    # Learn after the response is sent so saving never waits on the models
+    background_tasks.add_task(get_generator().learn, db_name.name)
     return db_name
 
 
 @app.delete("/api/names/{name_id}")
-def delete_name(name_id: int, session: Session = Depends(get_session)):
+async def delete_name(name_id: int, session: AsyncSession = Depends(get_async_session)):
     """Delete a derby name."""
-    statement = select(DerbyName).where(DerbyName.id == name_id)
-    name = session.exec(statement).first()
+    name = await session.get(DerbyName, name_id)
     if not name:
         raise HTTPException(status_code=404, detail="Name not found")
 
-    session.delete(name)
-    session.commit()
+    await session.delete(name)
+    await session.commit()
     return {"message": "Name deleted successfully"}
 
 
 @app.patch("/api/names/{name_id}/favorite", response_model=DerbyNameResponse)
-def toggle_favorite(name_id: int, session: Session = Depends(get_session)):
+async def toggle_favorite(
+    name_id: int, session: AsyncSession = Depends(get_async_session)
+):
     """Toggle favorite status of a derby name."""
-    statement = select(DerbyName).where(DerbyName.id == name_id)
-    name = session.exec(statement).first()
+    name = await session.get(DerbyName, name_id)
     if not name:
         raise HTTPException(status_code=404, detail="Name not found")
 
     name.is_favorite = not name.is_favorite
     session.add(name)
-    session.commit()
-    session.refresh(name)
+    await session.commit()
+    await session.refresh(name)
     return name
@@ -0,0 +1,227 @@
+"""How the NiceGUI pages reach the API: in process when co-located, else HTTP."""
+
+import asyncio
+from typing import Optional
+
+import httpx
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from config import settings
+import database
+from generator import get_generator
+import services
+from versioning import is_not_modified, read_version, validators
+from wordcloud_generator import get_wordcloud_renderer
+from word_frequencies import read_word_frequencies
+
+# Keep-alive pool for the remote client; the UI makes a few calls at a time
+REMOTE_LIMITS = httpx.Limits(max_connections=20, max_keepalive_connections=10)
+REMOTE_TIMEOUT = 30.0
+# Response headers the word cloud image passes on to the browser
+WORDCLOUD_HEADERS = ("ETag", "Cache-Control")
+
+
+class LocalApiClient:
+    """
+    Call the API's services directly, with no HTTP or JSON in between.
+
+    The services own loop-bound resources (the write queue and aiosqlite
+    connections), so calls run on the API's event loop and the caller
+    awaits the result from its own.
+    """
+
+    def __init__(self):
+        # Last words read and the table version they were read at
+        self._words_cache = {"version": None, "limit": None, "value": []}
+
+    async def generate_name(self) -> dict:
+        """Generate and save a name, returning the saved row as a dict."""
+        db_name = await self._call(self._generate_name())
+        return db_name.model_dump()
+
+    async def word_frequencies(self, limit: int) -> list[dict]:
+        """Return the top ``limit`` word cloud words, reread only after a write."""
+        return await self._call(
+            self._read_cached(self._words_cache, limit, read_word_frequencies)
+        )
+
+    async def wordcloud_png(
+        self,
+        width: int,
+        height: int,
+        preview: bool = False,
+        if_none_match: Optional[str] = None,
+    ) -> tuple[Optional[bytes], dict[str, str]]:
+        """
+        Render the word cloud, with the caching headers to send it with.
+
+        The PNG is None if ``if_none_match`` names the current version.
+        """
+        return await self._call(
+            self._wordcloud_png(width, height, preview, if_none_match)
+        )
+
+    async def aclose(self):
+        """Nothing to release; the API owns its resources."""
+
+    async def _call(self, coro):
+        """Run a service coroutine on the API's loop and await its result."""
+        loop = services.service_loop()
+        if loop is None:
+            coro.close()
+            raise RuntimeError("The API is not running in this process")
+        if loop is asyncio.get_running_loop():
+            return await coro
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, loop))
+
+    async def _generate_name(self):
+        async with AsyncSession(
+            database.async_engine, expire_on_commit=False
+        ) as session:
+            db_name = await services.generate_name(
+                get_generator(), database.write_queue, session
+            )
+        if db_name is None:
+            raise RuntimeError("Could not generate an unused name")
+        return db_name
+
+    async def _read_cached(self, cache: dict, limit: int, read) -> list[dict]:
+        """Return ``read(session, limit)``, reusing the last result if unchanged."""
+        async with AsyncSession(database.async_engine) as session:
+            # Every write bumps the version, so an equal one means no change
+            version = await read_version(session, "derbyname")
+            if version is not None and (version, limit) == (
+                cache["version"],
+                cache["limit"],
+            ):
+                return cache["value"]
+            value = await read(session, limit)
+        cache.update(version=version, limit=limit, value=value)
+        return value
+
+    async def _wordcloud_png(
+        self, width: int, height: int, preview: bool, if_none_match: Optional[str]
+    ) -> tuple[Optional[bytes], dict[str, str]]:
+        async with AsyncSession(database.async_engine) as session:
+            version = await read_version(session, "derbyname")
+            headers = {"Cache-Control": "no-cache"}
+            if version is not None:
+                headers["ETag"] = validators(version)["ETag"]
+                if is_not_modified(headers, if_none_match, None):
+                    return None, headers
+            png, full = await services.wordcloud_png(
+                session,
+                get_wordcloud_renderer(),
+                headers.get("ETag"),
+                width,
+                height,
+                preview,
+            )
+        # Previews are replaced as soon as the full render is ready
+        return png, headers if full else {"Cache-Control": "no-store"}
+
+
+class RemoteApiClient:
+    """
+    Call the API over HTTP through one pooled keep-alive client.
+
+    The ``httpx.AsyncClient`` is created on first use and reused for every
+    call after, so requests skip client setup and, mostly, the TCP connect.
+    """
+
+    def __init__(
+        self, base_url: str, transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        # Last words read and their ETag, revalidated on each call
+        self._words_cache = {"etag": None, "limit": None, "value": []}
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                limits=REMOTE_LIMITS,
+                timeout=REMOTE_TIMEOUT,
+                transport=self.transport,
+            )
+        return self._client
+
+    async def generate_name(self) -> dict:
+        """Generate and save a name, returning the saved row as a dict."""
+        response = await self.client.post("/generate")
+        response.raise_for_status()
+        return response.json()
+
+    async def word_frequencies(self, limit: int) -> list[dict]:
+        """Return the top ``limit`` word cloud words; a 304 skips the download."""
+        return await self._get_cached("/wordcloud/words", self._words_cache, limit)
+
+    async def wordcloud_png(
+        self,
+        width: int,
+        height: int,
+        preview: bool = False,
+        if_none_match: Optional[str] = None,
+    ) -> tuple[Optional[bytes], dict[str, str]]:
+        """
+        Render the word cloud, with the caching headers to send it with.
+
+        The PNG is None if ``if_none_match`` names the current version.
+        """
+        headers = {"If-None-Match": if_none_match} if if_none_match else {}
+        response = await self.client.get(
+            "/wordcloud.png",
+            params={"width": width, "height": height, "preview": preview},
+            headers=headers,
+        )
+        passed = {
+            name: response.headers[name]
+            for name in WORDCLOUD_HEADERS
+            if name in response.headers
+        }
+        if response.status_code == 304:
+            return None, passed
+        response.raise_for_status()
+        return response.content, passed
+
+    async def _get_cached(self, path: str, cache: dict, limit: int) -> list[dict]:
+        """GET ``path``, revalidating the last response with its ETag."""
+        headers = {}
+        if cache["etag"] and cache["limit"] == limit:
+            headers["If-None-Match"] = cache["etag"]
+        response = await self.client.get(path, params={"limit": limit}, headers=headers)
+        if response.status_code != 304:
+            response.raise_for_status()
+            cache.update(
+                etag=response.headers.get("ETag"), limit=limit, value=response.json()
+            )
+        return cache["value"]
+
+    async def aclose(self):
+        """Close the pooled connections."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+_local = LocalApiClient()
+_remote: Optional[RemoteApiClient] = None
+
+
+def get_api_client():
+    """Return the in-process client while the API runs here, else the remote one."""
+    global _remote
+    if services.service_loop() is not None:
+        return _local
+    if _remote is None:
+        _remote = RemoteApiClient(settings.API_BASE)
+    return _remote
+
+
+async def close_api_client():
+    """Release the remote client's connections, if it was ever used."""
+    if _remote is not None:
+        await _remote.aclose()
@@ -0,0 +1,446 @@
+"""Character-level Markov model with CSR transition tables and batched sampling."""
+
+from pathlib import Path
+
+import numpy as np
+
+from model_format import ModelFile, ModelFormatError, write_model
+from novelty import NoveltyIndex
+
+
+def _resized(values: np.ndarray, size: int, fill) -> np.ndarray:
+    """Copy ``values`` into a writable array of ``size`` items, padding with ``fill``."""
+    resized = np.full(size, fill, dtype=values.dtype)
+    resized[: len(values)] = values
+    return resized
+
+
+class CharModel:
+    """
+    Character n-gram model over whole names.
+
+    States are the previous ``order`` characters of a name. Transitions are
+    stored in CSR form: ``indptr[s]:indptr[s + 1]`` is the slice of
+    ``next_chars``, ``next_states`` and ``cumulative`` belonging to state
+    ``s``. ``cumulative`` is a single running total over all edges, so one
+    ``np.searchsorted`` call advances every name in a batch at once.
+
+    ``learn`` rewrites a changed row after the last used edge, where it can
+    extend the running total without renumbering any other row. The edge
+    arrays keep spare capacity padded with ``inf`` so the total stays sorted,
+    and ``indptr`` is dropped until ``packed`` compacts the rows again.
+    """
+
+    MODEL_KIND = "char"
+    # Training names are joined one per line
+    NOVELTY_SEPARATOR = "\n"
+    # Character id marking the start/end of a name
+    BOUNDARY_ID = 0
+    DEFAULT_TRIES = 10
+    DEFAULT_MAX_OVERLAP_RATIO = 0.7
+    DEFAULT_MAX_OVERLAP_TOTAL = 15
+    MAX_NAME_LENGTH = 40
+
+    def __init__(
+        self,
+        order: int,
+        alphabet: str,
+        indptr: np.ndarray,
+        next_chars: np.ndarray,
+        next_states: np.ndarray,
+        cumulative: np.ndarray,
+        novelty: NoveltyIndex,
+    ):
+        self.order = order
+        self.alphabet = alphabet
+        self.indptr = indptr
+        self.next_chars = next_chars
+        self.next_states = next_states
+        self.cumulative = cumulative
+        self.novelty = novelty
+        # Bytes of the learned-names log this model has learned, set by its owner
+        self.learned_offset = 0
+        # Content digest of the saved model file; None until saved or loaded
+        self.fingerprint = None
+        # States are numbered so that the all-boundary state is always first
+        self.begin_state = 0
+        self._rng = np.random.default_rng()
+
+        # Per-state span, offset and width of each row in the running total
+        starts = indptr[:-1]
+        ends = indptr[1:]
+        self._row_start = starts
+        self._row_end = ends
+        self._row_base = np.where(
+            starts > 0, cumulative[np.maximum(starts - 1, 0)], 0.0
+        )
+        self._row_total = cumulative[ends - 1] - self._row_base
+        self._chars = np.array(list(alphabet), dtype=object)
+
+        # Lookups and used sizes, set up by the first learn()
+        self._char_ids = None
+        self._state_ids = None
+        self._edge_count = len(next_chars)
+
+    @classmethod
+    def train(
+        cls, names: list, order: int, novelty: NoveltyIndex = None
+    ) -> "CharModel":
+        """
+        Count character transitions over a list of names.
+
+        Args:
+            names: Training names, one per entry
+            order: Number of preceding characters in each state
+            novelty: Prebuilt index over the names joined by newlines; built
+                if omitted
+
+        Returns:
+            The trained model
+        """
+        if order < 1:
+            raise ValueError("Character model order must be at least 1")
+
+        # Id 0 is reserved for the boundary marker
+        alphabet = "\0" + "".join(sorted({c for name in names for c in name}))
+        char_ids = {c: i for i, c in enumerate(alphabet)}
+
+        begin = (cls.BOUNDARY_ID,) * order
+        state_ids = {begin: 0}
+        counts = [{}]
+        for name in names:
+            state = begin
+            for char_id in [char_ids[c] for c in name] + [cls.BOUNDARY_ID]:
+                row = counts[state_ids[state]]
+                row[char_id] = row.get(char_id, 0) + 1
+                if char_id == cls.BOUNDARY_ID:
+                    break
+                state = state[1:] + (char_id,)
+                if state not in state_ids:
+                    state_ids[state] = len(counts)
+                    counts.append({})
+
+        states = list(state_ids)
+        indptr = np.zeros(len(states) + 1, dtype=np.int64)
+        next_chars = []
+        next_states = []
+        weights = []
+        for index, state in enumerate(states):
+            for char_id, count in counts[index].items():
+                next_chars.append(char_id)
+                weights.append(count)
+                if char_id == cls.BOUNDARY_ID:
+                    next_states.append(-1)
+                else:
+                    next_states.append(state_ids[state[1:] + (char_id,)])
+            indptr[index + 1] = len(next_chars)
+
+        if novelty is None:
+            novelty = NoveltyIndex.build("\n".join(names))
+        return cls(
+            order,
+            alphabet,
+            indptr,
+            np.array(next_chars, dtype=np.int32),
+            np.array(next_states, dtype=np.int32),
+            np.cumsum(np.array(weights, dtype=np.float64)),
+            novelty,
+        )
+
+    def learn(self, name: str):
+        """
+        Add a name's transition counts without retraining.
+
+        Only the rows of the states the name passes through are rewritten, so
+        the cost depends on the name and those rows, not on the whole model.
+        The first call copies the model into writable arrays and indexes its
+        states, a one-off cost proportional to the model.
+
+        Args:
+            name: The name to learn
+        """
+        if not name:
+            return
+        if self._state_ids is None:
+            self._thaw()
+
+        state = (self.BOUNDARY_ID,) * self.order
+        state_id = self.begin_state
+        for char_id in [self._char_id(c) for c in name] + [self.BOUNDARY_ID]:
+            if char_id == self.BOUNDARY_ID:
+                next_state = -1
+            else:
+                state = state[1:] + (char_id,)
+                next_state = self._state_id(state)
+            self._count(state_id, char_id, next_state)
+            state_id = next_state
+
+        self.novelty.add(name, self.NOVELTY_SEPARATOR)
+        self.fingerprint = None
+
+    def packed(self) -> tuple:
+        """
+        Return ``(indptr, next_chars, next_states, cumulative)`` with the rows
+        stored contiguously in state order, compacting rows moved by ``learn``.
+        """
+        if self.indptr is not None:
+            return self.indptr, self.next_chars, self.next_states, self.cumulative
+
+        count = len(self._state_ids)
+        starts = self._row_start[:count]
+        lengths = self._row_end[:count] - starts
+        indptr = np.zeros(count + 1, dtype=np.int64)
+        np.cumsum(lengths, out=indptr[1:])
+
+        # Gather each row's edges, then shift its slice of the running total
+        # from its old base to its new one
+        edges = np.repeat(starts - indptr[:-1], lengths) + np.arange(indptr[-1])
+        new_base = np.cumsum(self._row_total[:count]) - self._row_total[:count]
+        cumulative = self.cumulative[edges] - np.repeat(
+            self._row_base[:count] - new_base, lengths
+        )
+        return indptr, self.next_chars[edges], self.next_states[edges], cumulative
+
+    def _thaw(self):
+        """Copy the model into writable arrays and index its characters and states."""
+        count = len(self.indptr) - 1
+        rows = np.repeat(np.arange(count), np.diff(self.indptr))
+        entered = self.next_states >= 0
+        previous = np.zeros(count, dtype=np.int64)
+        previous[self.next_states[entered]] = rows[entered]
+        last = np.full(count, self.BOUNDARY_ID, dtype=np.int64)
+        last[self.next_states[entered]] = self.next_chars[entered]
+
+        # A state's tuple is its last character preceded by the tuple of the
+        # state it was entered from
+        columns = []
+        current = np.arange(count)
+        for _ in range(self.order):
+            columns.append(last[current])
+            current = previous[current]
+        state_keys = map(tuple, np.stack(columns[::-1], axis=1).tolist())
+
+        self._char_ids = {c: i for i, c in enumerate(self.alphabet)}
+        self._state_ids = {key: index for index, key in enumerate(state_keys)}
+
+        edges = len(self.next_chars)
+        self.next_chars = _resized(self.next_chars, edges, self.BOUNDARY_ID)
+        self.next_states = _resized(self.next_states, edges, -1)
+        self.cumulative = _resized(self.cumulative, edges, np.inf)
+        self._row_start = _resized(self._row_start, count, 0)
+        self._row_end = _resized(self._row_end, count, 0)
+        self._row_base = _resized(self._row_base, count, 0.0)
+        self._row_total = _resized(self._row_total, count, 0.0)
+        self.indptr = None
+
+    def _char_id(self, char: str) -> int:
+        """Return a character's id, extending the alphabet if it is new."""
+        char_id = self._char_ids.get(char)
+        if char_id is None:
+            char_id = self._char_ids[char] = len(self.alphabet)
+            self.alphabet += char
+            self._chars = np.append(self._chars, np.array([char], dtype=object))
+        return char_id
+
+    def _state_id(self, state: tuple) -> int:
+        """Return a state's id, adding an empty row if it is new."""
+        state_id = self._state_ids.get(state)
+        if state_id is None:
+            state_id = self._state_ids[state] = len(self._state_ids)
+            if state_id == len(self._row_start):
+                capacity = 2 * state_id
+                self._row_start = _resized(self._row_start, capacity, 0)
+                self._row_end = _resized(self._row_end, capacity, 0)
+                self._row_base = _resized(self._row_base, capacity, 0.0)
+                self._row_total = _resized(self._row_total, capacity, 0.0)
+            self._row_start[state_id] = self._row_end[state_id] = self._edge_count
+        return state_id
+
+    def _count(self, state_id: int, char_id: int, next_state: int):
+        """Add one to the count of a transition, rewriting its row at the end."""
+        start = self._row_start[state_id]
+        end = self._row_end[state_id]
+        chars = self.next_chars[start:end]
+        states = self.next_states[start:end]
+        counts = np.diff(self.cumulative[start:end], prepend=self._row_base[state_id])
+
+        hit = np.flatnonzero(chars == char_id)
+        if hit.size:
+            counts[hit[0]] += 1
+        else:
+            chars = np.append(chars, char_id)
+            states = np.append(states, next_state)
+            counts = np.append(counts, 1.0)
+
+        # A row that already ends the used edges is rewritten where it is
+        new_start = start if end == self._edge_count else self._edge_count
+        new_end = new_start + len(chars)
+        if new_end > len(self.cumulative):
+            capacity = max(new_end, 2 * len(self.cumulative))
+            self.next_chars = _resized(self.next_chars, capacity, self.BOUNDARY_ID)
+            self.next_states = _resized(self.next_states, capacity, -1)
+            self.cumulative = _resized(self.cumulative, capacity, np.inf)
+
+        base = self.cumulative[new_start - 1] if new_start > 0 else 0.0
+        self.next_chars[new_start:new_end] = chars
+        self.next_states[new_start:new_end] = states
+        self.cumulative[new_start:new_end] = base + np.cumsum(counts)
+        self._row_start[state_id] = new_start
+        self._row_end[state_id] = new_end
+        self._row_base[state_id] = base
+        self._row_total[state_id] = counts.sum()
+        self._edge_count = new_end
+
+    def save(self, path: Path):
+        """Write the model, including its novelty index, as a binary model file."""
+        indptr, next_chars, next_states, cumulative = self.packed()
+        self.fingerprint = write_model(
+            path,
+            self.MODEL_KIND,
+            {"order": self.order, "learned_offset": self.learned_offset},
+            {
+                "alphabet": self.alphabet,
+                "indptr": indptr,
+                "next_chars": next_chars,
+                "next_states": next_states,
+                "cumulative": cumulative,
+                "novelty_text": self.novelty.text,
+                "suffix_array": self.novelty.suffix_array,
+                "novelty_pending": self.novelty.pending,
+            },
+        )
+
+    @classmethod
+    def load(cls, path: Path) -> "CharModel":
+        """Memory-map a binary model file written by ``save``."""
+        model_file = ModelFile(path)
+        if model_file.kind != cls.MODEL_KIND:
+            raise ModelFormatError(f"{path} holds a {model_file.kind!r} model")
+
+        novelty = NoveltyIndex(
+            model_file.text("novelty_text"),
+            model_file.array("suffix_array"),
+            model_file.text("novelty_pending"),
+        )
+        model = cls(
+            model_file.meta["order"],
+            model_file.text("alphabet"),
+            model_file.array("indptr"),
+            model_file.array("next_chars"),
+            model_file.array("next_states"),
+            model_file.array("cumulative"),
+            novelty,
+        )
+        model.learned_offset = model_file.meta["learned_offset"]
+        model.fingerprint = model_file.digest
+        return model
+
+    def sample(self, count: int, rng: np.random.Generator = None) -> list:
+        """
+        Walk ``count`` names through the chain in parallel.
+
+        Args:
+            count: Number of names to sample
+            rng: NumPy random generator; a model-level one is used if omitted
+
+        Returns:
+            The sampled names; walks longer than ``MAX_NAME_LENGTH`` are dropped
+        """
+        rng = rng or self._rng
+        states = np.full(count, self.begin_state, dtype=np.int64)
+        output = np.zeros((count, self.MAX_NAME_LENGTH), dtype=np.int32)
+        lengths = np.full(count, -1, dtype=np.int64)
+        active = np.arange(count)
+
+        for step in range(self.MAX_NAME_LENGTH + 1):
+            if active.size == 0:
+                break
+            current = states[active]
+            targets = (
+                self._row_base[current]
+                + rng.random(active.size) * (self._row_total[current])
+            )
+            edges = np.searchsorted(self.cumulative, targets, side="right")
+            # Guard against rounding past the end of a row
+            edges = np.minimum(edges, self._row_end[current] - 1)
+            chars = self.next_chars[edges]
+
+            ended = chars == self.BOUNDARY_ID
+            lengths[active[ended]] = step
+            if step == self.MAX_NAME_LENGTH:
+                break
+
+            active = active[~ended]
+            output[active, step] = chars[~ended]
+            states[active] = self.next_states[edges[~ended]]
+
+        return [
+            "".join(self._chars[output[i, :length]])
+            for i, length in enumerate(lengths)
+            if length > 0
+        ]
+
+    def test_sentence_output(
+        self, name: str, max_overlap_ratio: float, max_overlap_total: int
+    ) -> bool:
+        """
+        Reject names that share too long a character run with the training names.
+
+        This is markovify's overlap rule with characters in place of words.
+        """
+        overlap_ratio = round(max_overlap_ratio * len(name))
+        overlap_max = min(max_overlap_total, overlap_ratio)
+        overlap_over = overlap_max + 1
+        gram_count = max((len(name) - overlap_max), 1)
+        for i in range(gram_count):
+            if name[i : i + overlap_over] in self.novelty:
+                return False
+        return True
+
+    def make_sentences(
+        self,
+        count: int,
+        tries: int = DEFAULT_TRIES,
+        rng: np.random.Generator = None,
+        **kwargs,
+    ) -> list:
+        """
+        Generate up to ``count`` novel names, sampling candidates in batches.
+
+        Args:
+            count: Number of names wanted
+            tries: Candidates drawn per wanted name before giving up
+            rng: NumPy random generator
+            **kwargs: ``max_overlap_ratio`` and ``max_overlap_total`` as in
+                markovify
+
+        Returns:
+            The accepted names, possibly fewer than ``count``
+        """
+        mor = kwargs.get("max_overlap_ratio", self.DEFAULT_MAX_OVERLAP_RATIO)
+        mot = kwargs.get("max_overlap_total", self.DEFAULT_MAX_OVERLAP_TOTAL)
+
+        names = []
+        budget = count * tries
+        while budget > 0 and len(names) < count:
+            # Oversample a little since some candidates will be rejected
+            batch = min(budget, max(2 * (count - len(names)), 8))
+            budget -= batch
+            for name in self.sample(batch, rng):
+                if self.test_sentence_output(name, mor, mot):
+                    names.append(name)
+                    if len(names) == count:
+                        break
+        return names
+
+    def make_sentence(
+        self, tries: int = DEFAULT_TRIES, rng: np.random.Generator = None, **kwargs
+    ):
+        """
+        Generate a single novel name.
+
+        Returns:
+            The generated name, or None if every attempt was rejected
+        """
+        names = self.make_sentences(1, tries=tries, rng=rng, **kwargs)
+        return names[0] if names else None
@@ -5,6 +5,34 @@ class Settings(BaseSettings):
     UI_PORT: int = 8000
     API_PORT: int = 8001
     API_BASE: str = f"http://localhost:{API_PORT}/api"
+    # Saved-name lists longer than this render as a virtual-scroll table
+    UI_VIRTUAL_SCROLL_THRESHOLD: int = 200
+    NAME_POOL_LOW_WATERMARK: int = 20
+    NAME_POOL_HIGH_WATERMARK: int = 200
+    # Worker processes for batch generation; 0 generates in-process
+    GENERATOR_WORKERS: int = 0
+    # Worker processes for word cloud renders; 0 renders in a thread
+    WORDCLOUD_WORKERS: int = 1
+    # Rendered word cloud PNGs kept in memory
+    WORDCLOUD_CACHE_SIZE: int = 16
+    # Most common words shown on the word cloud page
+    WORDCLOUD_WORDS: int = 100
+    # Learned names between model checkpoints
+    LEARN_CHECKPOINT_INTERVAL: int = 25
+    # SQLite performance profile, applied to every new connection
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024
+    # Negative sizes are KiB, so -65536 is a 64 MiB page cache per connection
+    SQLITE_CACHE_SIZE: int = -65536
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    # Connection pool per engine; sized to cover the 40-thread request limiter
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 30
+    DB_POOL_TIMEOUT: float = 30.0
+    # Group commit: flush queued inserts at this many rows or after this delay
+    WRITE_QUEUE_MAX_BATCH: int = 64
+    WRITE_QUEUE_MAX_DELAY_MS: float = 5.0
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,41 @@
+"""Convert markovify JSON models to the binary model format.
+
+Usage:
+    python convert_models.py SOURCE.json [DEST.bin]
+
+DEST defaults to SOURCE with a ``.bin`` suffix. The generator trains and
+caches its own models, so this is only needed to inspect or reuse an old
+JSON model; none is shipped with the repository.
+"""
+
+import sys
+import time
+from pathlib import Path
+
+from markov_chain import CompiledText
+
+
+def convert(source: Path, dest: Path):
+    """Compile a markovify JSON model and write it as a binary model file."""
+    start = time.perf_counter()
+    model = CompiledText.from_json_file(source)
+    model.save(dest)
+    elapsed = time.perf_counter() - start
+    print(
+        f"Converted {source} ({source.stat().st_size:,} bytes) to "
+        f"{dest} ({dest.stat().st_size:,} bytes) in {elapsed:.1f}s"
+    )
+
+
+def main(argv: list[str]):
+    if not argv or len(argv) > 2:
+        sys.exit(__doc__.split("\n\n")[1].strip())
+    source = Path(argv[0])
+    if not source.is_file():
+        sys.exit(f"No markovify JSON model at {source}")
+    dest = Path(argv[1]) if len(argv) > 1 else source.with_suffix(".bin")
+    convert(source, dest)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -1,27 +1,139 @@
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
 from sqlmodel import SQLModel, create_engine, Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 from pathlib import Path
 
+from config import settings
+from search import create_search_index, index_corpus
+from stats import create_stats_triggers
+from user_names import UserNameStore
+from versioning import create_version_triggers
+from word_frequencies import create_word_frequency_index
+from write_queue import WriteQueue
+
 # Create database directory if it doesn't exist
 DB_DIR = Path(__file__).parent / "data"
 DB_DIR.mkdir(exist_ok=True)
 
-# SQLite database URL
+# SQLite database URLs for the sync and asyncio drivers
 DATABASE_URL = f"sqlite:///{DB_DIR}/derby_names.db"
+ASYNC_DATABASE_URL = f"sqlite+aiosqlite:///{DB_DIR}/derby_names.db"
+
+
+def sqlite_pragmas() -> dict:
+    """
+    Return the PRAGMA settings applied to every new SQLite connection.
+
+    WAL lets readers keep reading while a writer commits, and with WAL,
+    ``synchronous=NORMAL`` only syncs at checkpoints, which is still safe
+    against corruption. ``busy_timeout`` makes writers queue on the lock
+    instead of failing with "database is locked".
+    """
+    return {
+        "journal_mode": settings.SQLITE_JOURNAL_MODE,
+        "synchronous": settings.SQLITE_SYNCHRONOUS,
+        "mmap_size": settings.SQLITE_MMAP_SIZE,
+        "cache_size": settings.SQLITE_CACHE_SIZE,
+        "busy_timeout": settings.SQLITE_BUSY_TIMEOUT_MS,
+    }
+
+
+def _apply_pragmas(dbapi_connection, connection_record):
+    """Apply the performance profile when the pool opens a connection."""
+    cursor = dbapi_connection.cursor()
+    for name, value in sqlite_pragmas().items():
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
+
+
+def create_db_engine(url: str = DATABASE_URL, **kwargs) -> Engine:
+    """Create a pooled SQLite engine with the performance profile applied."""
+    kwargs.setdefault("pool_size", settings.DB_POOL_SIZE)
+    kwargs.setdefault("max_overflow", settings.DB_MAX_OVERFLOW)
+    kwargs.setdefault("pool_timeout", settings.DB_POOL_TIMEOUT)
+    db_engine = create_engine(
+        url,
+        echo=False,
+        connect_args={"check_same_thread": False},  # Required for SQLite with FastAPI
+        **kwargs,
+    )
+    event.listen(db_engine, "connect", _apply_pragmas)
+    return db_engine
+
+
+def create_async_db_engine(url: str = ASYNC_DATABASE_URL, **kwargs) -> AsyncEngine:
+    """Create a pooled aiosqlite engine with the performance profile applied."""
+    kwargs.setdefault("pool_size", settings.DB_POOL_SIZE)
+    kwargs.setdefault("max_overflow", settings.DB_MAX_OVERFLOW)
+    kwargs.setdefault("pool_timeout", settings.DB_POOL_TIMEOUT)
+    db_engine = create_async_engine(url, echo=False, **kwargs)
+    # Pool events fire on the sync engine; aiosqlite's adapter has a sync cursor API
+    event.listen(db_engine.sync_engine, "connect", _apply_pragmas)
+    return db_engine
+
+
+engine = create_db_engine()
+
+# Async engine for the API routes, so queries never hold a threadpool slot
+async_engine = create_async_db_engine()
 
-# Create engine with SQLite-specific settings
-engine = create_engine(
-    DATABASE_URL,
-    echo=False,
-    connect_args={"check_same_thread": False},  # Required for SQLite with FastAPI
+# Shared by every path that saves single names, so their inserts group-commit
+write_queue = WriteQueue(
+    async_engine,
+    max_batch=settings.WRITE_QUEUE_MAX_BATCH,
+    max_delay=settings.WRITE_QUEUE_MAX_DELAY_MS / 1000,
 )
 
+# Names saved by each UI user
+user_names = UserNameStore(engine)
+
 
 def init_db():
-    """Initialize the database and create all tables."""
+    """Initialize the database and create all tables and indexes."""
     SQLModel.metadata.create_all(engine)
+    # create_all skips tables that already exist, so add indexes introduced
+    # since an existing database was created
+    for table in SQLModel.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(engine, checkfirst=True)
+    with engine.begin() as conn:
+        create_triggers(conn)
+
+
+def create_triggers(connection):
+    """Create the indexes, stats and version triggers that follow derbyname."""
+    create_search_index(connection)
+    create_word_frequency_index(connection)
+    create_stats_triggers(connection)
+    create_version_triggers(connection)
+
+
+def init_search_corpus(names: list[str]):
+    """Make the training corpus searchable, reindexing only when it changes."""
+    with engine.begin() as conn:
+        index_corpus(conn, names)
 
 
 def get_session():
     """Get a database session."""
     with Session(engine) as session:
         yield session
+
+
+async def get_async_session():
+    """Get an async database session."""
+    # Rows stay loaded after commit; lazy refreshes can't run outside a greenlet
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        yield session
+
+
+def get_write_queue() -> WriteQueue:
+    """Get the group-commit queue for name inserts."""
+    return write_queue
+
+
+def get_user_names() -> UserNameStore:
+    """Get the store of names saved by UI users."""
+    return user_names
@@ -0,0 +1,109 @@
+"""Encode list responses straight from query rows, skipping pydantic."""
+
+from collections.abc import Iterable, Sequence
+from datetime import date
+from typing import Optional
+
+from fastapi import Response
+import orjson
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - msgpack is an optional extra
+    msgpack = None
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+# Accept values that ask for MessagePack; the x- form predates registration
+MSGPACK_ALIASES = {MSGPACK_MEDIA_TYPE, "application/x-msgpack"}
+JSON_RANGES = {JSON_MEDIA_TYPE, "application/*", "*/*"}
+
+
+def negotiate(accept: Optional[str]) -> str:
+    """
+    Pick the response media type from an Accept header.
+
+    MessagePack is chosen only when the client names it with at least the
+    quality it gives JSON, and the msgpack extra is installed. Anything
+    else, including a missing header, gets JSON.
+    """
+    if msgpack is None or not accept:
+        return JSON_MEDIA_TYPE
+    msgpack_q = json_q = 0.0
+    for media_range in accept.split(","):
+        media_type, *params = (part.strip() for part in media_range.split(";"))
+        q = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        media_type = media_type.lower()
+        if media_type in MSGPACK_ALIASES:
+            msgpack_q = max(msgpack_q, q)
+        elif media_type in JSON_RANGES:
+            json_q = max(json_q, q)
+    if msgpack_q > 0 and msgpack_q >= json_q:
+        return MSGPACK_MEDIA_TYPE
+    return JSON_MEDIA_TYPE
+
+
+def row_items(
+    columns: Sequence[str],
+    rows: Iterable[tuple],
+    media_type: str,
+    json_columns: Iterable[str] = (),
+) -> list[dict]:
+    """
+    Turn row tuples into dicts ready for ``encode``.
+
+    Args:
+        columns: Key for each position in a row
+        rows: Plain row tuples, in the order they should be listed
+        media_type: Media type from ``negotiate``
+        json_columns: Columns read as their stored JSON text. JSON bodies
+            embed that text as-is; MessagePack bodies decode it first.
+
+    Returns:
+        One dict per row
+    """
+    positions = [i for i, column in enumerate(columns) if column in json_columns]
+    if not positions:
+        return [dict(zip(columns, row)) for row in rows]
+
+    embed = orjson.loads if media_type == MSGPACK_MEDIA_TYPE else orjson.Fragment
+    items = []
+    for row in rows:
+        row = list(row)
+        for i in positions:
+            if row[i] is not None:
+                row[i] = embed(row[i])
+        items.append(dict(zip(columns, row)))
+    return items
+
+
+def _msgpack_default(value):
+    """Encode dates as the same ISO 8601 strings the JSON body carries."""
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"Cannot encode {type(value).__name__} as MessagePack")
+
+
+def encode(items: list, media_type: str) -> bytes:
+    """Encode a list response body as JSON or MessagePack."""
+    if media_type == MSGPACK_MEDIA_TYPE:
+        return msgpack.packb(items, default=_msgpack_default)
+    return orjson.dumps(items)
+
+
+def list_response(
+    items: list, media_type: str, headers: Optional[dict[str, str]] = None
+) -> Response:
+    """Build the response for a list, noting that its body depends on Accept."""
+    return Response(
+        encode(items, media_type),
+        media_type=media_type,
+        headers={**(headers or {}), "Vary": "Accept"},
+    )
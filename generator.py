@@ -1,8 +1,21 @@
+from collections import Counter, OrderedDict
+from collections.abc import Container
+import hashlib
 import markovify
 import httpx
 from pathlib import Path
 import random
-import json
+import threading
+from typing import Optional
+
+import numpy as np
+
+from char_model import CharModel
+from config import settings
+from markov_chain import CompiledText
+from model_cache import cache_key, file_lock, remove_stale
+from model_format import FORMAT_VERSION
+from name_pool import NamePool
 
 
 class DerbyNameGenerator:
@@ -10,18 +23,68 @@ class DerbyNameGenerator:
 
     DERBY_NAMES_URL = "https://raw.githubusercontent.com/bdunnette/derby-name-scraper/main/data/derby_names.txt"
     CACHE_FILE = Path(__file__).parent / "data" / "derby_names.txt"
-    WORD_MODEL_FILE = Path(__file__).parent / "data" / "markov_word_model.json"
-    CHAR_MODEL_FILE = Path(__file__).parent / "data" / "markov_char_model.json"
+    MODEL_CACHE_DIR = Path(__file__).parent / "data" / "models"
+    LEARNED_NAMES_FILE = Path(__file__).parent / "data" / "learned_names.txt"
     WORD_MODEL_WEIGHT = 0.7
     CHAR_MODEL_WEIGHT = 0.3
     MODEL_STATE_SIZE = 2
+    CHAR_MODEL_ORDER = 4
+    # Bump whenever a change to training would produce different models
+    MODEL_VERSION = 2
+    # Seeded results kept for repeat requests
+    SEED_MEMO_SIZE = 4096
 
-    def __init__(self):
+    def __init__(self, seed: int = None):
         self.word_model = None
         self.char_model = None
         self.names_text = None
+        # Model cache entry for the current corpus, set once names are loaded
+        self.model_key = None
+        self.word_model_file = None
+        self.char_model_file = None
+        self.cache_lock_file = None
+        # Parallel executor, if process-pool generation is enabled
+        self.parallel = None
+        # Identifies the loaded model pair; None while the models are unsaved
+        self.fingerprint = None
+        self._seed_memo = OrderedDict()
+        # Guards the models and the seed memo; re-entrant since generate_many
+        # tops up through generate
+        self._model_lock = threading.RLock()
+        # Held for a whole checkpoint, so only one sorts the novelty indexes
+        self._checkpoint_lock = threading.Lock()
+        # Names learned since the models were last saved
+        self._unsaved_names = 0
+        # Bytes of the learned-names log the models have learned every name of
+        self._log_offset = 0
+        # Names this process learned that are logged past _log_offset
+        self._own_names = Counter()
+        # Names already saved, set by the API; unseeded generation skips them
+        self.taken = None
+        self.seed(seed)
         self._load_or_download_names()
-        self._load_or_train_models()
+        self._set_cache_paths()
+        with file_lock(self.cache_lock_file):
+            self._load_or_train_models()
+        self._replay_learned_names()
+        self._update_fingerprint()
+        # Ready-made names for the request path; started by the API
+        self.pool = NamePool(
+            self.generate_many,
+            low_watermark=settings.NAME_POOL_LOW_WATERMARK,
+            high_watermark=settings.NAME_POOL_HIGH_WATERMARK,
+        )
+
+    def seed(self, seed: int = None):
+        """
+        Reseed the generator's random sources.
+
+        Args:
+            seed: Seed for both the Python and NumPy generators; fresh OS
+                entropy if None
+        """
+        self.random = random.Random(seed)
+        self.np_random = np.random.default_rng(seed)
 
     def _load_or_download_names(self):
         """Load derby names from cache or download from GitHub."""
@@ -39,24 +102,69 @@ class DerbyNameGenerator:
         # Load the names
         self.names_text = self.CACHE_FILE.read_text(encoding="utf-8")
 
+    def name_list(self) -> list[str]:
+        """Return the training names, one stripped name per non-blank line."""
+        return [n.strip() for n in self.names_text.split("\n") if n.strip()]
+
+    def _learned_names(self) -> list[str]:
+        """Return every name in the learned-names log, oldest first."""
+        return [name for _, name in self._read_log(0)]
+
+    def _read_log(self, start: int) -> list[tuple[int, str]]:
+        """
+        Read the learned-names log from byte ``start``.
+
+        Every worker process appends to the same log, so a line another
+        process is still writing is left for the next read.
+
+        Returns:
+            ``(end, name)`` pairs, oldest first, where ``end`` is the byte
+            offset just past the name's line
+        """
+        try:
+            with open(self.LEARNED_NAMES_FILE, "rb") as f:
+                f.seek(start)
+                data = f.read()
+        except FileNotFoundError:
+            return []
+        entries = []
+        end = start
+        for line in data.splitlines(keepends=True):
+            if not line.endswith(b"\n"):
+                break
+            end += len(line)
+            entries.append((end, line.decode("utf-8").rstrip("\n")))
+        return entries
+
+    def _set_cache_paths(self):
+        """Point the model files at the cache entry for the current corpus."""
+        self.model_key = cache_key(
+            self.names_text,
+            state_size=self.MODEL_STATE_SIZE,
+            char_order=self.CHAR_MODEL_ORDER,
+            model_version=self.MODEL_VERSION,
+            format_version=FORMAT_VERSION,
+        )
+        self.word_model_file = self.MODEL_CACHE_DIR / f"word-{self.model_key}.bin"
+        self.char_model_file = self.MODEL_CACHE_DIR / f"char-{self.model_key}.bin"
+        self.cache_lock_file = self.MODEL_CACHE_DIR / f"{self.model_key}.lock"
+
     def _load_or_train_models(self):
-        """Load pre-trained models from disk or train new ones."""
-        models_exist = self.WORD_MODEL_FILE.exists() and self.CHAR_MODEL_FILE.exists()
+        """
+        Load the cached models for the current corpus or train new ones.
+
+        Callers hold the cache lock, so concurrent workers train only once.
+        """
+        models_exist = self.word_model_file.exists() and self.char_model_file.exists()
 
         # Try to load existing models
         if models_exist:
             try:
                 print("Loading pre-trained Markov models...")
 
-                # Load word-level model
-                with open(self.WORD_MODEL_FILE, "r", encoding="utf-8") as f:
-                    word_model_json = json.load(f)
-                self.word_model = markovify.NewlineText.from_json(word_model_json)
-
-                # Load character-level model
-                with open(self.CHAR_MODEL_FILE, "r", encoding="utf-8") as f:
-                    char_model_json = json.load(f)
-                self.char_model = markovify.Text.from_json(char_model_json)
+                # Memory-map both models; nothing is parsed until it is used
+                self.word_model = CompiledText.load(self.word_model_file)
+                self.char_model = CharModel.load(self.char_model_file)
 
                 print("Markov models loaded successfully")
                 return
@@ -69,45 +177,73 @@ class DerbyNameGenerator:
         # Save the trained models
         try:
             print("Saving trained models...")
-
-            # Save word-level model
-            word_model_json = self.word_model.to_json()
-            with open(self.WORD_MODEL_FILE, "w", encoding="utf-8") as f:
-                json.dump(word_model_json, f)
-
-            # Save character-level model
-            char_model_json = self.char_model.to_json()
-            with open(self.CHAR_MODEL_FILE, "w", encoding="utf-8") as f:
-                json.dump(char_model_json, f)
-
+            self.word_model.save(self.word_model_file)
+            self.char_model.save(self.char_model_file)
+            # Models trained from an older corpus can never be hit again
+            remove_stale(self.MODEL_CACHE_DIR, self.model_key)
             print("Models saved successfully")
         except Exception as e:
             print(f"Warning: Could not save models: {e}")
 
+    def _update_fingerprint(self):
+        """Derive the generator fingerprint from both model files and the weights."""
+        parts = (self.word_model.fingerprint, self.char_model.fingerprint)
+        if None in parts:
+            self.fingerprint = None
+        else:
+            key = "|".join((*parts, repr(self.WORD_MODEL_WEIGHT)))
+            self.fingerprint = hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+        # Memoized names belong to the previous models
+        self._seed_memo.clear()
+
+    def _replay_learned_names(self):
+        """Learn names logged after the saved models were written."""
+        models = (self.word_model, self.char_model)
+        start = min(model.learned_offset for model in models)
+        entries = self._read_log(start)
+        for end, name in entries:
+            for model in models:
+                if end > model.learned_offset:
+                    model.learn(name)
+        self._log_offset = entries[-1][0] if entries else start
+        self._unsaved_names = len(entries)
+
     def _train_models(self):
         """Train both word-level and character-level Markov models."""
         print("Training Markov models...")
+        # Names learned online so far are part of a full retrain
+        entries = self._read_log(0)
+        learned = [name for _, name in entries]
+        self._log_offset = entries[-1][0] if entries else 0
 
         # Train word-level model (state_size=2 for better coherence)
         print("  - Training word-level model...")
-        self.word_model = markovify.NewlineText(
-            self.names_text, state_size=self.MODEL_STATE_SIZE
+        self.word_model = CompiledText.from_markovify(
+            markovify.NewlineText(
+                "\n".join([self.names_text, *learned]),
+                state_size=self.MODEL_STATE_SIZE,
+            )
         )
+        self.word_model.learned_offset = self._log_offset
 
-        # Train character-level model (state_size=2 to match word model)
+        # Train character-level model over whole names
         print("  - Training character-level model...")
-        self.char_model = markovify.Text(
-            self.names_text, state_size=self.MODEL_STATE_SIZE
+        self.char_model = CharModel.train(
+            self.name_list() + learned, self.CHAR_MODEL_ORDER
         )
+        self.char_model.learned_offset = self._log_offset
 
         print("Markov models trained successfully")
 
-    def generate(self, max_attempts: int = 100) -> str:
+    def generate(self, max_attempts: int = 100, seed: Optional[int] = None) -> str:
         """
         Generate a new derby name by randomly choosing between word and character models.
 
         Args:
             max_attempts: Maximum number of generation attempts
+            seed: Optional seed; the same seed always yields the same name
+                for a given model fingerprint
 
         Returns:
             A generated derby name
@@ -115,22 +251,186 @@ class DerbyNameGenerator:
         if not self.word_model or not self.char_model:
             raise RuntimeError("Models not trained")
 
+        with self._model_lock:
+            if seed is None:
+                return self._generate(
+                    max_attempts, self.random, self.np_random, self.taken
+                )
+
+            # Seeded runs get private generators, so they never disturb the
+            # shared stream
+            key = (self.fingerprint, seed, max_attempts)
+            name = self._seed_memo.get(key)
+            if name is not None:
+                self._seed_memo.move_to_end(key)
+                return name
+
+            name = self._generate(
+                max_attempts, random.Random(seed), np.random.default_rng(seed)
+            )
+
+            # Unsaved models have no fingerprint, so their output isn't memoized
+            if self.fingerprint is not None:
+                self._seed_memo[key] = name
+                if len(self._seed_memo) > self.SEED_MEMO_SIZE:
+                    self._seed_memo.popitem(last=False)
+            return name
+
+    def _generate(
+        self,
+        max_attempts: int,
+        rng: random.Random,
+        np_rng: np.random.Generator,
+        taken: Optional[Container[str]] = None,
+    ) -> str:
+        """Generate one name drawing only from the given random sources."""
         # Randomly choose between word-level (70%) and character-level (30%) models
         # This avoids the Markovify limitation of combining different model types
         for _ in range(max_attempts):
-            if random.random() < self.WORD_MODEL_WEIGHT:
+            if rng.random() < self.WORD_MODEL_WEIGHT:
                 # Use word-level model for coherence
-                name = self.word_model.make_sentence(tries=100)
+                name = self.word_model.make_sentence(tries=100, rng=rng)
             else:
                 # Use character-level model for creativity
-                name = self.char_model.make_sentence(tries=100)
+                name = self.char_model.make_sentence(tries=100, rng=np_rng)
 
-            if name:
+            # Retry names that are already saved before touching the database
+            if name and (taken is None or name not in taken):
                 return name
 
         # Final fallback: return a random name from the training data
-        names = [n.strip() for n in self.names_text.split("\n") if n.strip()]
-        return random.choice(names)
+        return rng.choice(self.name_list())
+
+    def learn(self, name: str):
+        """
+        Teach both models a new name without retraining them.
+
+        The name is appended to the learned-names log before the models are
+        updated, so names learned since the last checkpoint are replayed on
+        the next start. The models are saved every
+        ``settings.LEARN_CHECKPOINT_INTERVAL`` names. Names other worker
+        processes learn reach this one's models at its next checkpoint.
+
+        Args:
+            name: The name to learn
+        """
+        name = " ".join(name.split())
+        if not name:
+            return
+
+        with self._model_lock:
+            with open(self.LEARNED_NAMES_FILE, "a", encoding="utf-8") as f:
+                f.write(name + "\n")
+            self.word_model.learn(name)
+            self.char_model.learn(name)
+            self._own_names[name] += 1
+            self._unsaved_names += 1
+            self._update_fingerprint()
+            due = self._unsaved_names >= settings.LEARN_CHECKPOINT_INTERVAL
+
+        # A checkpoint already running saves this name too
+        if due and not self._checkpoint_lock.locked():
+            self.checkpoint()
+
+    def checkpoint(self):
+        """
+        Save models that have learned new names.
+
+        Worker processes share the log and the model files. Under the cache
+        lock, the models first learn every name other processes logged, so
+        a checkpoint always holds exactly the log up to its offset, and one
+        process saving over another's checkpoint loses nothing.
+
+        Learned names are first sorted into the novelty indexes, outside the
+        model lock since that takes seconds on the full corpus, so lookups
+        stay binary searches. The models keep their writable tables after
+        saving, so the next ``learn`` doesn't copy the whole model again.
+        """
+        with self._checkpoint_lock:
+            with self._model_lock:
+                if not self._unsaved_names:
+                    return
+                # Sorted in with this process's names; the catch-up under the
+                # cache lock only picks up what is logged while sorting
+                self._catch_up()
+                models = (self.word_model, self.char_model)
+
+            folded = [model.novelty.folded(model.NOVELTY_SEPARATOR) for model in models]
+
+            with self._model_lock:
+                for model, index in zip(models, folded):
+                    model.novelty.adopt(index, model.NOVELTY_SEPARATOR)
+                try:
+                    with file_lock(self.cache_lock_file):
+                        self._catch_up()
+                        self.word_model.learned_offset = self._log_offset
+                        self.char_model.learned_offset = self._log_offset
+                        self.word_model.save(self.word_model_file)
+                        self.char_model.save(self.char_model_file)
+                except Exception as e:
+                    # The log still holds the names, so nothing is lost
+                    print(f"Warning: Could not checkpoint models: {e}")
+                    return
+                self._unsaved_names = 0
+                self._update_fingerprint()
+
+    def _catch_up(self):
+        """Learn the names other processes logged since ``_log_offset``."""
+        own = self._own_names
+        for end, name in self._read_log(self._log_offset):
+            if own[name] > 0:
+                # Learned when this process logged it
+                own[name] -= 1
+            else:
+                self.word_model.learn(name)
+                self.char_model.learn(name)
+            self._log_offset = end
+        self._own_names = +own
+
+    def generate_many(self, count: int, max_attempts: int = 100) -> list[str]:
+        """
+        Generate several distinct derby names.
+
+        Args:
+            count: Number of names to generate
+            max_attempts: Maximum number of generation attempts per name
+
+        Returns:
+            A list of up to ``count`` unique generated names, skipping any in
+            ``taken``
+        """
+        # Spread large batches across worker processes when enabled
+        if self.parallel is not None and count > 1:
+            return self._untaken(self.parallel.generate_many(count, max_attempts))
+
+        with self._model_lock:
+            # Sample the character-level share in one vectorized batch
+            char_count = sum(
+                self.random.random() >= self.WORD_MODEL_WEIGHT for _ in range(count)
+            )
+            candidates = self.char_model.make_sentences(
+                char_count, tries=100, rng=self.np_random
+            )
+            for _ in range(count - char_count):
+                name = self.word_model.make_sentence(tries=100, rng=self.random)
+                if name:
+                    candidates.append(name)
+            self.random.shuffle(candidates)
+
+            names = dict.fromkeys(self._untaken(candidates))
+            # Top up duplicates and failed attempts one at a time, bounding the
+            # loop so a tiny corpus can't spin forever on duplicates
+            for _ in range(count * max_attempts):
+                if len(names) >= count:
+                    break
+                names.setdefault(self.generate(max_attempts=max_attempts), None)
+            return list(names)[:count]
+
+    def _untaken(self, names: list[str]) -> list[str]:
+        """Drop names that are already saved."""
+        if self.taken is None or not names:
+            return names
+        return [name for name in names if name not in self.taken]
 
 
 # Global generator instance
@@ -142,4 +442,8 @@ def get_generator() -> DerbyNameGenerator:
     global _generator
     if _generator is None:
         _generator = DerbyNameGenerator()
+        if settings.GENERATOR_WORKERS > 0:
+            from parallel import ParallelGenerator
+
+            _generator.parallel = ParallelGenerator(settings.GENERATOR_WORKERS)
     return _generator
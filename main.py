@@ -1,15 +1,108 @@
-from datetime import timezone
-import httpx
 from nicegui import ui, app
 from datetime import datetime
+from typing import Optional
+import json
+from fastapi import Header, Query, Response
 import uvicorn
 import threading
+from nicegui.storage import Storage
+from api_client import close_api_client, get_api_client
 from config import settings
+from database import get_user_names, init_db
+from user_names import migrate_storage_files
+from wordcloud_generator import MAX_IMAGE_SIZE, MIN_IMAGE_SIZE
 
-API_BASE = f"http://localhost:{settings.API_PORT}/api"
 API_PORT = settings.API_PORT
 UI_PORT = settings.UI_PORT
 
+# Columns of the virtual-scroll names table; the body slot below renders them
+NAME_TABLE_COLUMNS = [
+    {"name": "name", "label": "Name", "field": "name", "align": "left"},
+    {"name": "date", "label": "Created", "field": "date", "align": "right"},
+]
+# One table row, laid out like a name card; buttons emit events to Python
+NAME_TABLE_ROW = r"""
+<q-tr :props="props">
+    <q-td key="name" :props="props">
+        <q-btn flat round dense class="text-xl"
+            :label="props.row.is_favorite ? '⭐' : '☆'"
+            @click="$parent.$emit('toggle_favorite', props.row.id)" />
+        <span class="text-lg font-semibold text-purple-700 dark:text-purple-300">
+            {{ props.row.name }}
+        </span>
+    </q-td>
+    <q-td key="date" :props="props">
+        <span class="text-sm text-gray-500 dark:text-gray-400">{{ props.row.date }}</span>
+        <q-btn flat round dense color="red-6" icon="delete"
+            @click="$parent.$emit('delete_name', props.row.id)" />
+    </q-td>
+</q-tr>
+"""
+# Applies one row change to the browser's copy of the table rows, the way
+# insert_row, remove_row and update_row apply it on the server. Inserts
+# go first; a null row removes; otherwise the listed row is replaced.
+NAME_TABLE_PATCH = """
+const [tableId, nameId, row, first] = %s;
+const rows = mounted_app.elements[tableId].props.rows;
+const index = rows.findIndex((listed) => listed.id === nameId);
+if (row === null || first) {
+    if (index >= 0) rows.splice(index, 1);
+    if (row !== null) rows.unshift(row);
+} else if (index >= 0) {
+    rows.splice(index, 1, row);
+}
+"""
+
+
+def format_date(created_at) -> str:
+    """Format a stored creation time for display, falling back to the raw value."""
+    try:
+        dt = datetime.fromisoformat(str(created_at).replace("Z", "+00:00"))
+        return dt.strftime("%Y-%m-%d %H:%M")
+    except Exception:
+        return str(created_at)
+
+
+def table_row(name_data: dict) -> dict:
+    """Flatten a saved name into a row of the names table."""
+    return {
+        "id": name_data["id"],
+        "name": name_data["name"],
+        "is_favorite": name_data["is_favorite"],
+        "date": format_date(name_data["created_at"]),
+    }
+
+
+def insert_row(rows: list[dict], row: dict):
+    """Put a newly saved name's row first, replacing any row with its id."""
+    remove_row(rows, row["id"])
+    rows.insert(0, row)
+
+
+def remove_row(rows: list[dict], name_id: int) -> bool:
+    """Remove a name's row in place; False if it isn't listed."""
+    for index, row in enumerate(rows):
+        if row["id"] == name_id:
+            del rows[index]
+            return True
+    return False
+
+
+def update_row(rows: list[dict], name_data: dict) -> bool:
+    """Update a name's favorite flag where its row is; False if it isn't listed."""
+    for row in rows:
+        if row["id"] == name_data["id"]:
+            row["is_favorite"] = name_data["is_favorite"]
+            return True
+    return False
+
+
+def row_patch_script(
+    table_id: int, name_id: int, row: dict = None, first: bool = False
+) -> str:
+    """Return the script sending one row change to the names table."""
+    return NAME_TABLE_PATCH % json.dumps([table_id, name_id, row, first])
+
 
 class DerbyNameApp:
     """NiceGUI application for roller derby name generator."""
@@ -18,18 +111,28 @@ class DerbyNameApp:
         self.current_name = ""
         self.name_display = None
         self.names_container = None
+        self.names_count = None
         self.theme_toggle = None
+        # What the names container shows: nothing, keyed cards, or one
+        # virtual-scroll table once the list is long
+        self.empty_label = None
+        self.name_cards = {}
+        self.favorite_buttons = {}
+        self.names_table = None
+        self.names_total = 0
+
+        # Saved names live in the database, keyed by this browser's session
+        self.user_id = app.storage.browser["id"]
+        self.user_names = get_user_names()
 
         # Initialize storage if not exists
-        if "saved_names" not in app.storage.user:
-            app.storage.user["saved_names"] = []
         if "theme" not in app.storage.user:
             app.storage.user["theme"] = "auto"  # auto, light, or dark
 
     @property
     def saved_names(self):
-        """Get saved names from app.storage."""
-        return app.storage.user.get("saved_names", [])
+        """Get this user's saved names, newest first."""
+        return self.user_names.list_names(self.user_id)
 
     def toggle_theme(self):
         """Cycle through theme options: auto -> light -> dark -> auto."""
@@ -57,98 +160,168 @@ class DerbyNameApp:
             self.theme_toggle.props(f"icon={icons[new_theme]}")
 
     def save_name(self, name: str):
-        """Save a name to app.storage."""
-        names = self.saved_names
-        # Create name entry with metadata
-        name_entry = {
-            "name": name,
-            "created_at": datetime.now(timezone.utc),
-            "is_favorite": False,
-            "id": len(names) + 1,  # Simple ID generation
-        }
-        names.append(name_entry)
-        app.storage.user["saved_names"] = names
-        return name_entry
+        """Save a name for this user."""
+        return self.user_names.add(self.user_id, name)
 
     async def generate_name(self):
-        """Generate a new derby name via API and save to storage."""
+        """Generate a new derby name via the API and save to storage."""
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(f"{API_BASE}/generate", timeout=30.0)
-                response.raise_for_status()
-                data = response.json()
-                self.current_name = data["name"]
+            # In process when the API runs here, otherwise over pooled HTTP
+            data = await get_api_client().generate_name()
+            self.current_name = data["name"]
 
-                # Save to app.storage
-                self.save_name(self.current_name)
+            # Save for this user
+            name_entry = self.save_name(self.current_name)
 
-                # Update the display
-                if self.name_display:
-                    self.name_display.set_text(self.current_name)
+            # Update the display
+            if self.name_display:
+                self.name_display.set_text(self.current_name)
 
-                # Refresh the saved names list
-                self.refresh_names_display()
+            # Add just the new name to the saved names list
+            self.show_added_name(name_entry)
 
-                ui.notify(f"Generated: {self.current_name}", type="positive")
+            ui.notify(f"Generated: {self.current_name}", type="positive")
         except Exception as e:
             ui.notify(f"Error generating name: {str(e)}", type="negative")
             print(f"Error: {e}")
 
     def refresh_names_display(self):
-        """Refresh the names display from app.storage."""
-        if self.names_container:
-            self.names_container.clear()
+        """Rebuild the names display from the saved names."""
+        if not self.names_container:
+            return
+        self.names_container.clear()
+        self.empty_label = None
+        self.name_cards.clear()
+        self.favorite_buttons.clear()
+        self.names_table = None
+
+        names = self.saved_names
+        self.names_total = len(names)
+        with self.names_container:
+            if not names:
+                self.show_empty_label()
+            elif len(names) > settings.UI_VIRTUAL_SCROLL_THRESHOLD:
+                # Only the rows in view exist in the DOM
+                self.create_names_table(names)
+            else:
+                # Most recent first
+                for name_data in names:
+                    self.create_name_card(name_data)
+        self.update_names_count()
+
+    def show_added_name(self, name_data: dict):
+        """Add a newly saved name to the top of the display."""
+        if not self.names_container:
+            return
+        self.names_total += 1
+        if (
+            self.names_table is None
+            and self.names_total > settings.UI_VIRTUAL_SCROLL_THRESHOLD
+        ):
+            # The list just outgrew cards; switch to the table once
+            self.refresh_names_display()
+            return
+
+        if self.empty_label is not None:
+            self.empty_label.delete()
+            self.empty_label = None
+        if self.names_table is not None:
+            row = table_row(name_data)
+            with self.names_table.props.suspend_updates():
+                insert_row(self.names_table.rows, row)
+            self.patch_names_table(row["id"], row, first=True)
+        else:
             with self.names_container:
-                names = self.saved_names
-                if not names:
-                    ui.label("No saved names yet. Generate some!").classes(
-                        "text-gray-500 italic"
-                    )
-                else:
-                    # Show most recent first
-                    for name_data in reversed(names):
-                        self.create_name_card(name_data)
+                card = self.create_name_card(name_data)
+            card.move(target_index=0)
+        self.update_names_count()
+
+    def show_removed_name(self, name_id: int):
+        """Remove a deleted name from the display."""
+        self.names_total -= 1
+        if self.names_table is not None:
+            with self.names_table.props.suspend_updates():
+                removed = remove_row(self.names_table.rows, name_id)
+            if removed:
+                self.patch_names_table(name_id)
+        elif name_id in self.name_cards:
+            self.names_container.remove(self.name_cards.pop(name_id))
+            self.favorite_buttons.pop(name_id, None)
+        if not self.names_total and self.empty_label is None:
+            with self.names_container:
+                self.show_empty_label()
+        self.update_names_count()
+
+    def show_updated_name(self, name_data: dict):
+        """Redraw a name's favorite star."""
+        if self.names_table is not None:
+            with self.names_table.props.suspend_updates():
+                updated = update_row(self.names_table.rows, name_data)
+            if updated:
+                self.patch_names_table(name_data["id"], table_row(name_data))
+        elif name_data["id"] in self.favorite_buttons:
+            self.favorite_buttons[name_data["id"]].set_text(
+                "⭐" if name_data["is_favorite"] else "☆"
+            )
+
+    def patch_names_table(self, name_id: int, row: dict = None, first: bool = False):
+        """
+        Send one changed row to the browser instead of every row.
+
+        The server's rows are edited with updates suspended, so they stay
+        current for reconnects without the whole table being resent.
+        """
+        self.names_table.client.run_javascript(
+            row_patch_script(self.names_table.id, name_id, row, first)
+        )
+
+    def show_empty_label(self):
+        """Show the placeholder for an empty list in the current container."""
+        self.empty_label = ui.label("No saved names yet. Generate some!").classes(
+            "text-gray-500 italic"
+        )
+
+    def update_names_count(self):
+        """Show how many names are saved."""
+        if self.names_count:
+            self.names_count.set_text(f"{self.names_total} names")
 
     def delete_name(self, name_id: int):
-        """Delete a name from app.storage."""
+        """Delete one of this user's names."""
         try:
-            names = self.saved_names
-            # Filter out the name with matching ID
-            updated_names = [n for n in names if n["id"] != name_id]
-            app.storage.user["saved_names"] = updated_names
-
-            ui.notify("Name deleted", type="positive")
-            self.refresh_names_display()
+            if self.user_names.delete(self.user_id, name_id):
+                ui.notify("Name deleted", type="positive")
+                self.show_removed_name(name_id)
         except Exception as e:
             ui.notify(f"Error deleting name: {str(e)}", type="negative")
 
     def toggle_favorite(self, name_id: int):
-        """Toggle favorite status of a name in app.storage."""
+        """Toggle favorite status of one of this user's names."""
         try:
-            names = self.saved_names
-            for name in names:
-                if name["id"] == name_id:
-                    name["is_favorite"] = not name["is_favorite"]
-                    break
-            app.storage.user["saved_names"] = names
-
-            self.refresh_names_display()
+            name = self.user_names.toggle_favorite(self.user_id, name_id)
+            if name is not None:
+                self.show_updated_name(name)
         except Exception as e:
             ui.notify(f"Error toggling favorite: {str(e)}", type="negative")
 
     def create_name_card(self, name_data: dict):
-        """Create a card for a single derby name."""
+        """Create a card for a single derby name, keyed by its ID."""
+        name_id = name_data["id"]
         with ui.card().classes(
             "w-full p-4 hover:shadow-lg transition-shadow bg-white dark:bg-gray-700"
-        ):
+        ) as card:
             with ui.row().classes("w-full items-center justify-between"):
                 # Name and favorite star
                 with ui.row().classes("items-center gap-2 flex-grow"):
                     star_icon = "⭐" if name_data["is_favorite"] else "☆"
-                    ui.button(
-                        star_icon,
-                        on_click=lambda nid=name_data["id"]: self.toggle_favorite(nid),
-                    ).props("flat round dense").classes("text-xl")
+                    star = (
+                        ui.button(
+                            star_icon,
+                            on_click=lambda nid=name_id: self.toggle_favorite(nid),
+                        )
+                        .props("flat round dense")
+                        .classes("text-xl")
+                    )
 
                     ui.label(name_data["name"]).classes(
                         "text-lg font-semibold text-purple-700 dark:text-purple-300"
@@ -156,22 +329,36 @@ class DerbyNameApp:
 
                 # Created date and delete button
                 with ui.row().classes("items-center gap-2"):
-                    try:
-                        dt = datetime.fromisoformat(
-                            name_data["created_at"].replace("Z", "+00:00")
-                        )
-                        date_str = dt.strftime("%Y-%m-%d %H:%M")
-                    except Exception:
-                        date_str = name_data["created_at"]
-
-                    ui.label(date_str).classes(
+                    ui.label(format_date(name_data["created_at"])).classes(
                         "text-sm text-gray-500 dark:text-gray-400"
                     )
                     ui.button(
                         icon="delete",
-                        on_click=lambda nid=name_data["id"]: self.delete_name(nid),
+                        on_click=lambda nid=name_id: self.delete_name(nid),
                     ).props("flat round dense color=red-6")
 
+        self.name_cards[name_id] = card
+        self.favorite_buttons[name_id] = star
+        return card
+
+    def create_names_table(self, names):
+        """Create a virtual-scroll table of names for long lists."""
+        self.names_table = (
+            ui.table(
+                columns=NAME_TABLE_COLUMNS,
+                rows=[table_row(name_data) for name_data in names],
+                row_key="id",
+                pagination=0,
+            )
+            .props("virtual-scroll flat hide-header hide-bottom")
+            .classes("w-full")
+            .style("height: 600px")
+        )
+        self.names_table.add_slot("body", NAME_TABLE_ROW)
+        self.names_table.on("toggle_favorite", lambda e: self.toggle_favorite(e.args))
+        self.names_table.on("delete_name", lambda e: self.delete_name(e.args))
+        return self.names_table
+
     async def build_ui(self):
         """Build the NiceGUI interface."""
 
@@ -233,14 +420,14 @@ class DerbyNameApp:
                     ui.label("📋 Saved Names").classes(
                         "text-2xl font-bold text-gray-900 dark:text-gray-100"
                     )
-                    ui.label(f"{len(self.saved_names)} names").classes(
+                    self.names_count = ui.label().classes(
                         "text-gray-500 dark:text-gray-400"
                     )
 
                 # Names container
                 self.names_container = ui.column().classes("w-full gap-2")
 
-        # Load initial data from storage
+        # Load this user's saved names
         self.refresh_names_display()
 
 
@@ -259,13 +446,31 @@ async def wordcloud_page():
     await create_wordcloud_page()
 
 
+@app.get("/wordcloud.png")
+async def wordcloud_png(
+    width: int = Query(1200, ge=MIN_IMAGE_SIZE, le=MAX_IMAGE_SIZE),
+    height: int = Query(600, ge=MIN_IMAGE_SIZE, le=MAX_IMAGE_SIZE),
+    preview: bool = False,
+    if_none_match: Optional[str] = Header(None),
+):
+    """
+    Serve the rendered word cloud from the UI's own origin.
+
+    The API's ETag is passed on, so a browser revalidating an image of the
+    current names gets a 304 and nothing is rendered or sent.
+    """
+    png, headers = await get_api_client().wordcloud_png(
+        width, height, preview, if_none_match
+    )
+    if png is None:
+        return Response(status_code=304, headers=headers)
+    # The API binds to localhost, so browsers can't fetch the image from it
+    return Response(png, media_type="image/png", headers=headers)
+
+
 def run_fastapi():
     """Run FastAPI server in a separate thread."""
     from api import app as fastapi_app
-    from database import init_db
-
-    # Initialize database
-    init_db()
 
     # Run uvicorn
     uvicorn.run(fastapi_app, host="127.0.0.1", port=API_PORT, log_level="error")
@@ -273,6 +478,14 @@ def run_fastapi():
 
 def main():
     """Main entry point for the application."""
+    # Initialize database
+    init_db()
+
+    # Move saved names out of user storage files written by older versions
+    migrated = migrate_storage_files(get_user_names(), Storage.path)
+    if migrated:
+        print(f"Migrated {migrated} saved names from user storage")
+
     # Start FastAPI in a background thread
     api_thread = threading.Thread(target=run_fastapi, daemon=True)
     api_thread.start()
@@ -282,6 +495,9 @@ def main():
 
     time.sleep(2)
 
+    # Close the remote API client's pooled connections with the UI
+    app.on_shutdown(close_api_client)
+
     # Run NiceGUI with storage
     ui.run(
         title="Roller Derby Name Generator",
@@ -0,0 +1,477 @@
+"""Compiled, integer-interned Markov chains for fast name generation."""
+
+from array import array
+from bisect import bisect
+import json
+from pathlib import Path
+import random
+
+import markovify
+from markovify.chain import BEGIN, END
+import numpy as np
+
+from model_format import ModelFile, ModelFormatError, TokenTable, write_model
+from novelty import NoveltyIndex
+
+
+class CompiledChain:
+    """
+    A read-only Markov chain with tokens interned to integers.
+
+    Every state is numbered, and its successors are stored in flat, packed
+    arrays: ``offsets[s]:offsets[s + 1]`` is the slice of ``successors``,
+    ``cumulative`` and ``next_states`` belonging to state ``s``. Walking the
+    chain is therefore a bisect over a small slice of integers followed by an
+    array lookup for the next state, with no tuple building or dict lookups.
+
+    ``learn`` adds runs in place. A row that has to grow is moved to the end
+    of the flat arrays with room to double, so from then on
+    ``row_starts[s]:row_ends[s]`` is the authoritative span and ``offsets``
+    is dropped until the chain is packed again by ``packed``.
+    """
+
+    # Reserved token ids
+    BEGIN_ID = 0
+    END_ID = 1
+
+    def __init__(
+        self, tokens, state_size, offsets, successors, cumulative, next_states
+    ):
+        self.tokens = tokens
+        self.state_size = state_size
+        self.offsets = offsets
+        self.successors = successors
+        self.cumulative = cumulative
+        self.next_states = next_states
+        # States are numbered so that the all-BEGIN state is always first
+        self.begin_state = 0
+        # Span of every state's row in the flat arrays
+        self.row_starts = offsets[:-1]
+        self.row_ends = offsets[1:]
+        # Token and state lookups, built by the first learn()
+        self._token_ids = None
+        self._state_ids = None
+
+    @classmethod
+    def from_model(cls, model: dict, state_size: int) -> "CompiledChain":
+        """
+        Compile a markovify ``Chain.model`` dict.
+
+        Args:
+            model: Mapping of state tuples to ``{token: count}`` dicts
+            state_size: Number of tokens in each state
+
+        Returns:
+            The compiled chain
+        """
+        begin = (BEGIN,) * state_size
+        if begin not in model:
+            raise ValueError("Model has no begin state")
+
+        # Intern tokens, keeping the reserved ids stable
+        token_ids = {BEGIN: cls.BEGIN_ID, END: cls.END_ID}
+        tokens = [BEGIN, END]
+
+        def intern(token):
+            token_id = token_ids.get(token)
+            if token_id is None:
+                token_id = token_ids[token] = len(tokens)
+                tokens.append(token)
+            return token_id
+
+        # Number the states, begin state first
+        states = [begin] + [state for state in model if state != begin]
+        state_ids = {state: index for index, state in enumerate(states)}
+
+        offsets = array("Q", [0])
+        successors = array("I")
+        cumulative = array("Q")
+        next_states = array("i")
+
+        for state in states:
+            total = 0
+            shifted = state[1:]
+            for token, count in model[state].items():
+                total += count
+                successors.append(intern(token))
+                cumulative.append(total)
+                if token == END:
+                    next_states.append(-1)
+                else:
+                    # Successor states that were never observed as a state
+                    # can only be reached at the very end of a run
+                    next_states.append(state_ids.get(shifted + (token,), -1))
+            offsets.append(len(successors))
+
+        return cls(tokens, state_size, offsets, successors, cumulative, next_states)
+
+    @property
+    def state_count(self) -> int:
+        """Number of distinct states in the chain."""
+        return len(self.row_starts)
+
+    def learn(self, run: list):
+        """
+        Add one run's transition counts to the chain.
+
+        Only the rows of the states the run passes through are touched, so
+        the cost depends on the run and those rows, not on the whole chain.
+        The first call copies the chain into growable arrays and indexes its
+        tokens and states, a one-off cost proportional to the model.
+
+        Args:
+            run: Tokens of a single run, excluding BEGIN and END
+        """
+        if self._state_ids is None:
+            self._thaw()
+
+        state = (self.BEGIN_ID,) * self.state_size
+        state_id = self.begin_state
+        for token in [*run, END]:
+            token_id = self._token_id(token)
+            if token_id == self.END_ID:
+                next_state = -1
+            else:
+                state = state[1:] + (token_id,)
+                next_state = self._state_id(state)
+            self._count(state_id, token_id, next_state)
+            state_id = next_state
+
+    def packed(self) -> tuple:
+        """
+        Return ``(offsets, successors, cumulative, next_states)`` with the
+        rows stored contiguously in state order, compacting rows moved by
+        ``learn``.
+        """
+        if self.offsets is not None:
+            return self.offsets, self.successors, self.cumulative, self.next_states
+
+        offsets = array("Q", [0])
+        successors = array("I")
+        cumulative = array("Q")
+        next_states = array("i")
+        for lo, hi in zip(self.row_starts, self.row_ends):
+            successors.extend(self.successors[lo:hi])
+            cumulative.extend(self.cumulative[lo:hi])
+            next_states.extend(self.next_states[lo:hi])
+            offsets.append(len(successors))
+        return offsets, successors, cumulative, next_states
+
+    def _thaw(self):
+        """Copy the packed arrays into growable ones and index tokens and states."""
+        state_keys = self._state_keys()
+
+        self.tokens = list(self.tokens)
+        self.successors = _growable("I", self.successors)
+        self.cumulative = _growable("Q", self.cumulative)
+        self.next_states = _growable("i", self.next_states)
+        self.row_starts = _growable("Q", self.row_starts)
+        self.row_ends = _growable("Q", self.row_ends)
+        self.offsets = None
+
+        self._token_ids = {token: index for index, token in enumerate(self.tokens)}
+        self._state_ids = {key: index for index, key in enumerate(state_keys)}
+        # End of the space reserved for each moved row
+        self._row_limits = {}
+
+    def _state_keys(self) -> list:
+        """
+        Recover every state's tuple of token ids from the packed rows.
+
+        A state's last token is the successor on any edge entering it, and
+        the rest of its tuple is the state that edge leaves, shifted by one.
+        """
+        count = self.state_count
+        lengths = np.diff(np.frombuffer(self.offsets, dtype=np.uint64)).astype(np.int64)
+        rows = np.repeat(np.arange(count), lengths)
+        successors = np.frombuffer(self.successors, dtype=np.uint32)
+        next_states = np.frombuffer(self.next_states, dtype=np.int32)
+
+        entered = next_states >= 0
+        previous = np.zeros(count, dtype=np.int64)
+        previous[next_states[entered]] = rows[entered]
+        last = np.full(count, self.BEGIN_ID, dtype=np.int64)
+        last[next_states[entered]] = successors[entered]
+
+        columns = []
+        current = np.arange(count)
+        for _ in range(self.state_size):
+            columns.append(last[current])
+            current = previous[current]
+        return list(map(tuple, np.stack(columns[::-1], axis=1).tolist()))
+
+    def _token_id(self, token: str) -> int:
+        """Return a token's id, interning it if it is new."""
+        token_id = self._token_ids.get(token)
+        if token_id is None:
+            token_id = self._token_ids[token] = len(self.tokens)
+            self.tokens.append(token)
+        return token_id
+
+    def _state_id(self, state: tuple) -> int:
+        """Return a state's id, adding an empty row if it is new."""
+        state_id = self._state_ids.get(state)
+        if state_id is None:
+            state_id = self._state_ids[state] = len(self.row_starts)
+            self.row_starts.append(len(self.successors))
+            self.row_ends.append(len(self.successors))
+        return state_id
+
+    def _count(self, state_id: int, token_id: int, next_state: int):
+        """Add one to the count of a transition, creating the edge if needed."""
+        lo = self.row_starts[state_id]
+        hi = self.row_ends[state_id]
+        # Temporary NumPy views; none may outlive this call, since arrays
+        # can't be resized while their buffer is exported
+        row = np.frombuffer(self.successors, dtype=np.uint32)[lo:hi]
+        hits = np.flatnonzero(row == token_id)
+        del row
+        if hits.size:
+            np.frombuffer(self.cumulative, dtype=np.uint64)[lo + hits[0] : hi] += 1
+            return
+
+        limit = self._row_limits.get(state_id, hi)
+        if hi == len(self.successors):
+            # The row ends the arrays, so it can grow by appending
+            for values in (self.successors, self.cumulative, self.next_states):
+                values.append(0)
+        elif hi == limit:
+            # Move the row to the end, leaving it as much room again to grow
+            size = hi - lo
+            start = len(self.successors)
+            for values in (self.successors, self.cumulative, self.next_states):
+                values.extend(values[lo:hi])
+                values.extend(array(values.typecode, [0]) * (size + 1))
+            lo, hi = start, start + size
+            self.row_starts[state_id] = lo
+            self._row_limits[state_id] = hi + size + 1
+
+        self.successors[hi] = token_id
+        self.cumulative[hi] = (self.cumulative[hi - 1] if hi > lo else 0) + 1
+        self.next_states[hi] = next_state
+        self.row_ends[state_id] = hi + 1
+
+    def walk_ids(self, rng=random) -> list:
+        """
+        Walk the chain from the begin state to the end state.
+
+        Args:
+            rng: Source of randomness providing ``random()``
+
+        Returns:
+            The token ids of a single run, excluding BEGIN and END
+        """
+        row_starts = self.row_starts
+        row_ends = self.row_ends
+        successors = self.successors
+        cumulative = self.cumulative
+        next_states = self.next_states
+        draw = rng.random
+        end_id = self.END_ID
+
+        run = []
+        state = self.begin_state
+        while state >= 0:
+            lo = row_starts[state]
+            hi = row_ends[state]
+            index = bisect(cumulative, draw() * cumulative[hi - 1], lo, hi)
+            token_id = successors[index]
+            if token_id == end_id:
+                break
+            run.append(token_id)
+            state = next_states[index]
+        return run
+
+    def walk(self, rng=random) -> list:
+        """
+        Walk the chain and return the run as token strings.
+
+        Args:
+            rng: Source of randomness providing ``random()``
+
+        Returns:
+            A list of tokens, excluding BEGIN and END
+        """
+        tokens = self.tokens
+        return [tokens[token_id] for token_id in self.walk_ids(rng)]
+
+
+def _growable(typecode: str, values) -> array:
+    """Copy a buffer of packed values into an ``array`` that can be appended to."""
+    grown = array(typecode)
+    grown.frombytes(memoryview(values).cast("B"))
+    return grown
+
+
+class CompiledText:
+    """
+    Drop-in replacement for a trained ``markovify.Text`` that generates with a
+    ``CompiledChain`` and checks novelty against a ``NoveltyIndex`` instead of
+    scanning the rejoined training text.
+    """
+
+    DEFAULT_TRIES = 10
+    DEFAULT_MAX_OVERLAP_RATIO = 0.7
+    DEFAULT_MAX_OVERLAP_TOTAL = 15
+
+    MODEL_KIND = "word"
+    # markovify joins training sentences with spaces
+    NOVELTY_SEPARATOR = " "
+
+    def __init__(self, chain: CompiledChain, novelty: NoveltyIndex, separator=" "):
+        self.chain = chain
+        self.novelty = novelty
+        self.separator = separator
+        self.state_size = chain.state_size
+        # Bytes of the learned-names log this model has learned, set by its owner
+        self.learned_offset = 0
+        # Content digest of the saved model file; None until saved or loaded
+        self.fingerprint = None
+
+    @classmethod
+    def from_markovify(cls, text, novelty: NoveltyIndex = None) -> "CompiledText":
+        """
+        Compile a trained ``markovify.Text`` model.
+
+        Args:
+            text: The trained markovify model
+            novelty: Prebuilt index over ``text.rejoined_text``; built if omitted
+
+        Returns:
+            The compiled model
+        """
+        if novelty is None:
+            novelty = NoveltyIndex.build(text.rejoined_text)
+        chain = CompiledChain.from_model(text.chain.model, text.state_size)
+        return cls(chain, novelty)
+
+    @classmethod
+    def from_json_file(cls, path: Path) -> "CompiledText":
+        """Compile a model saved by ``markovify.NewlineText.to_json``."""
+        with open(path, "r", encoding="utf-8") as f:
+            model_json = json.load(f)
+        return cls.from_markovify(markovify.NewlineText.from_json(model_json))
+
+    # markovify's training filter, applied to learned sentences as well
+    well_formed = True
+    reject_pat = markovify.Text.reject_pat
+
+    def test_sentence_input(self, sentence: str) -> bool:
+        """Reject sentences markovify would drop from training text."""
+        return markovify.Text.test_sentence_input(self, sentence)
+
+    def learn(self, sentence: str):
+        """
+        Add a sentence to the chain and the novelty index without retraining.
+
+        Sentences markovify would filter out of the training text, such as
+        ones with brackets or quotes, are skipped, so learning matches a
+        retrain that includes them.
+
+        Args:
+            sentence: The sentence to learn
+        """
+        if not self.test_sentence_input(sentence):
+            return
+        words = sentence.split()
+        self.chain.learn(words)
+        self.novelty.add(self.word_join(words), self.NOVELTY_SEPARATOR)
+        self.fingerprint = None
+
+    def save(self, path: Path):
+        """Write the model, including its novelty index, as a binary model file."""
+        chain = self.chain
+        token_offsets, token_data = TokenTable.pack(list(chain.tokens))
+        offsets, successors, cumulative, next_states = chain.packed()
+        self.fingerprint = write_model(
+            path,
+            self.MODEL_KIND,
+            {
+                "state_size": chain.state_size,
+                "separator": self.separator,
+                "learned_offset": self.learned_offset,
+            },
+            {
+                "token_offsets": token_offsets,
+                "token_data": token_data,
+                "offsets": offsets,
+                "successors": successors,
+                "cumulative": cumulative,
+                "next_states": next_states,
+                "novelty_text": self.novelty.text,
+                "suffix_array": self.novelty.suffix_array,
+                "novelty_pending": self.novelty.pending,
+            },
+        )
+
+    @classmethod
+    def load(cls, path: Path) -> "CompiledText":
+        """Memory-map a binary model file written by ``save``."""
+        model_file = ModelFile(path)
+        if model_file.kind != cls.MODEL_KIND:
+            raise ModelFormatError(f"{path} holds a {model_file.kind!r} model")
+
+        chain = CompiledChain(
+            TokenTable(model_file.view("token_offsets"), model_file.view("token_data")),
+            model_file.meta["state_size"],
+            model_file.view("offsets"),
+            model_file.view("successors"),
+            model_file.view("cumulative"),
+            model_file.view("next_states"),
+        )
+        novelty = NoveltyIndex(
+            model_file.text("novelty_text"),
+            model_file.array("suffix_array"),
+            model_file.text("novelty_pending"),
+        )
+        model = cls(chain, novelty, separator=model_file.meta["separator"])
+        model.learned_offset = model_file.meta["learned_offset"]
+        model.fingerprint = model_file.digest
+        return model
+
+    def word_join(self, words: list) -> str:
+        """Re-join a list of words into a sentence."""
+        return self.separator.join(words)
+
+    def test_sentence_output(
+        self, words: list, max_overlap_ratio: float, max_overlap_total: int
+    ) -> bool:
+        """
+        Reject runs that share too long a word sequence with the training text.
+
+        Same rule as ``markovify.Text.test_sentence_output``: any run of
+        ``min(max_overlap_total, round(max_overlap_ratio * len(words))) + 1``
+        words found in the training text rejects the sentence.
+        """
+        overlap_ratio = round(max_overlap_ratio * len(words))
+        overlap_max = min(max_overlap_total, overlap_ratio)
+        overlap_over = overlap_max + 1
+        gram_count = max((len(words) - overlap_max), 1)
+        word_join = self.word_join
+        for i in range(gram_count):
+            if word_join(words[i : i + overlap_over]) in self.novelty:
+                return False
+        return True
+
+    def make_sentence(self, tries: int = DEFAULT_TRIES, rng=random, **kwargs):
+        """
+        Attempt ``tries`` times to generate a sentence that is not a near copy
+        of the training text.
+
+        Args:
+            tries: Number of walks to attempt
+            rng: Source of randomness providing ``random()``
+            **kwargs: ``max_overlap_ratio`` and ``max_overlap_total`` as in
+                markovify
+
+        Returns:
+            The generated sentence, or None if every attempt was rejected
+        """
+        mor = kwargs.get("max_overlap_ratio", self.DEFAULT_MAX_OVERLAP_RATIO)
+        mot = kwargs.get("max_overlap_total", self.DEFAULT_MAX_OVERLAP_TOTAL)
+
+        for _ in range(tries):
+            words = self.chain.walk(rng)
+            if self.test_sentence_output(words, mor, mot):
+                return self.word_join(words)
+        return None
@@ -0,0 +1,54 @@
+"""On-disk cache of trained model files, keyed by what they were trained from."""
+
+from contextlib import contextmanager
+import hashlib
+import json
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows has no flock
+    fcntl = None
+
+
+def cache_key(corpus: str, **params) -> str:
+    """
+    Hash a training corpus together with the parameters that shape its models.
+
+    Args:
+        corpus: Full training text
+        **params: JSON-serializable training parameters (state size,
+            versions, ...)
+
+    Returns:
+        A short hex key that changes whenever the corpus or a parameter does
+    """
+    digest = hashlib.sha256(json.dumps(params, sort_keys=True).encode())
+    digest.update(corpus.encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+@contextmanager
+def file_lock(path: Path):
+    """
+    Hold an exclusive advisory lock on ``path`` across processes.
+
+    Workers starting together queue on the lock, so the first one trains and
+    the rest load what it saved. Without ``fcntl`` the lock is a no-op.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def remove_stale(directory: Path, key: str):
+    """Delete cached model files and lock files that belong to any key but ``key``."""
+    for path in [*directory.glob("*.bin"), *directory.glob("*.lock")]:
+        if key not in path.name:
+            path.unlink(missing_ok=True)
@@ -0,0 +1,196 @@
+"""Versioned, memory-mappable binary container for trained models.
+
+Layout (little-endian)::
+
+    magic        8 bytes   b"DRBYMDL\\0"
+    version      uint32
+    header_size  uint32    size of the JSON header that follows
+    header       JSON      {"kind", "meta", "digest",
+                            "sections": {name: [format, offset, count]}}
+    sections     raw arrays, each aligned to 8 bytes
+
+Sections are flat arrays of a single ``struct`` format character (``"B"``,
+``"i"``, ``"I"``, ``"Q"``, ``"d"``...). Opening a file parses only the small
+header; section data stays in the page cache and is exposed as zero-copy
+``memoryview`` or NumPy views over the mapping, so every process mapping the
+same file shares one copy of the model.
+"""
+
+import hashlib
+import json
+import mmap
+import struct
+import sys
+from pathlib import Path
+
+import numpy as np
+
+MAGIC = b"DRBYMDL\0"
+FORMAT_VERSION = 1
+ALIGNMENT = 8
+
+_PREAMBLE = struct.Struct("<8sII")
+
+
+class ModelFormatError(ValueError):
+    """Raised when a model file is missing, truncated or of the wrong version."""
+
+
+# Fixed-size struct formats by NumPy dtype kind and item size, so files
+# don't depend on the platform size of C "long"
+_FORMATS = {
+    ("i", 1): "b",
+    ("i", 2): "h",
+    ("i", 4): "i",
+    ("i", 8): "q",
+    ("u", 1): "B",
+    ("u", 2): "H",
+    ("u", 4): "I",
+    ("u", 8): "Q",
+    ("f", 4): "f",
+    ("f", 8): "d",
+}
+
+
+def _as_bytes(data) -> tuple[str, bytes, int]:
+    """Normalize a section payload to (format, raw bytes, item count)."""
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    if isinstance(data, (bytes, bytearray)):
+        array = np.frombuffer(data, dtype=np.uint8)
+    else:
+        # array.array, memoryviews and NumPy arrays all expose typed buffers
+        array = np.ascontiguousarray(np.asarray(data))
+    fmt = _FORMATS.get((array.dtype.kind, array.dtype.itemsize))
+    if fmt is None:
+        raise ModelFormatError(f"Unsupported section dtype {array.dtype}")
+    return fmt, array.tobytes(), len(array)
+
+
+def write_model(path: Path, kind: str, meta: dict, sections: dict) -> str:
+    """
+    Write a model file atomically.
+
+    Args:
+        path: Destination file
+        kind: Model type tag checked on load, e.g. ``"word"`` or ``"char"``
+        meta: Small JSON-serializable metadata (state size, order, ...)
+        sections: Mapping of section name to ``bytes``, ``str`` (stored as
+            UTF-8), ``array.array`` or NumPy array
+
+    Returns:
+        SHA-256 digest of the model's contents, also stored in the header
+    """
+    if sys.byteorder != "little":
+        raise ModelFormatError("Model files can only be written on little-endian hosts")
+
+    payloads = {name: _as_bytes(data) for name, data in sections.items()}
+
+    # Offsets are relative to the start of the data area so the header size
+    # doesn't need to be known up front
+    table = {}
+    offset = 0
+    digest = hashlib.sha256(json.dumps([kind, meta], sort_keys=True).encode())
+    for name, (fmt, raw, count) in payloads.items():
+        table[name] = [fmt, offset, count]
+        offset += len(raw) + (-len(raw) % ALIGNMENT)
+        digest.update(f"{name}:{fmt}:{count}:".encode())
+        digest.update(raw)
+    digest = digest.hexdigest()
+
+    header = json.dumps(
+        {"kind": kind, "meta": meta, "digest": digest, "sections": table}
+    ).encode()
+    header += b" " * (-(_PREAMBLE.size + len(header)) % ALIGNMENT)
+
+    temp_path = path.with_suffix(path.suffix + ".tmp")
+    with open(temp_path, "wb") as f:
+        f.write(_PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header)))
+        f.write(header)
+        for fmt, raw, count in payloads.values():
+            f.write(raw)
+            f.write(b"\0" * (-len(raw) % ALIGNMENT))
+    temp_path.replace(path)
+    return digest
+
+
+class ModelFile:
+    """A read-only, memory-mapped model file."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        if sys.byteorder != "little":
+            raise ModelFormatError(
+                "Model files can only be read on little-endian hosts"
+            )
+        with open(self.path, "rb") as f:
+            try:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError as e:
+                raise ModelFormatError(f"{self.path} is empty") from e
+
+        if len(self._mmap) < _PREAMBLE.size:
+            raise ModelFormatError(f"{self.path} is truncated")
+        magic, version, header_size = _PREAMBLE.unpack_from(self._mmap)
+        if magic != MAGIC:
+            raise ModelFormatError(f"{self.path} is not a model file")
+        if version != FORMAT_VERSION:
+            raise ModelFormatError(
+                f"{self.path} has format version {version}, expected {FORMAT_VERSION}"
+            )
+
+        header = json.loads(self._mmap[_PREAMBLE.size : _PREAMBLE.size + header_size])
+        self.kind = header["kind"]
+        self.meta = header["meta"]
+        self.digest = header["digest"]
+        self._sections = header["sections"]
+        self._data_start = _PREAMBLE.size + header_size
+        self._buffer = memoryview(self._mmap)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._sections
+
+    def view(self, name: str) -> memoryview:
+        """Zero-copy ``memoryview`` of a section, cast to its item format."""
+        fmt, offset, count = self._sections[name]
+        start = self._data_start + offset
+        size = struct.calcsize(fmt) * count
+        if start + size > len(self._mmap):
+            raise ModelFormatError(f"{self.path} is truncated in section {name!r}")
+        return self._buffer[start : start + size].cast(fmt)
+
+    def array(self, name: str) -> np.ndarray:
+        """Zero-copy NumPy view of a section."""
+        fmt = self._sections[name][0]
+        return np.frombuffer(self.view(name), dtype=np.dtype(fmt))
+
+    def text(self, name: str) -> str:
+        """Decode a UTF-8 section."""
+        return str(self.view(name), "utf-8")
+
+
+class TokenTable:
+    """
+    Token strings stored as one UTF-8 blob plus offsets, decoded on access.
+    """
+
+    def __init__(self, offsets, data):
+        self._offsets = offsets
+        self._data = data
+
+    @staticmethod
+    def pack(tokens: list) -> tuple[np.ndarray, bytes]:
+        """Encode tokens into (offsets, blob) sections."""
+        encoded = [token.encode("utf-8") for token in tokens]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.uint64)
+        offsets[1:] = np.cumsum([len(token) for token in encoded])
+        return offsets, b"".join(encoded)
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index: int) -> str:
+        return str(self._data[self._offsets[index] : self._offsets[index + 1]], "utf-8")
+
+    def __iter__(self):
+        return (self[index] for index in range(len(self)))
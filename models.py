@@ -1,12 +1,22 @@
-from datetime import datetime
-from typing import Optional
+from datetime import date, datetime
+from typing import Literal, Optional
 from sqlmodel import Field, SQLModel, Column
+from sqlalchemy import Index
 from sqlalchemy.types import JSON, DateTime
 
 
 class DerbyName(SQLModel, table=True):
     """Database model for storing roller derby names."""
 
+    # Keyset pagination walks (created_at, id) newest first, optionally
+    # restricted to favorites
+    __table_args__ = (
+        Index("ix_derbyname_created_at_id", "created_at", "id"),
+        Index(
+            "ix_derbyname_is_favorite_created_at_id", "is_favorite", "created_at", "id"
+        ),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     name: str = Field(index=True, unique=True)
     created_at: datetime = Field(
@@ -16,12 +26,104 @@ class DerbyName(SQLModel, table=True):
     meta: Optional[dict] = Field(default_factory=dict, sa_column=Column(JSON))
 
 
+class NameStats(SQLModel, table=True):
+    """Running totals over derbyname, kept current by triggers."""
+
+    __tablename__ = "name_stats"
+
+    # Single-row table
+    id: int = Field(default=1, primary_key=True)
+    total: int = 0
+    favorites: int = 0
+
+
+class DailyNameStats(SQLModel, table=True):
+    """Names created per day, kept current by triggers."""
+
+    __tablename__ = "name_stats_daily"
+
+    day: date = Field(primary_key=True)
+    created: int = 0
+    favorites: int = 0
+
+
+class TableVersion(SQLModel, table=True):
+    """Change counter per table, bumped by triggers on every write."""
+
+    __tablename__ = "table_version"
+
+    table_name: str = Field(primary_key=True)
+    version: int = 0
+    # Naive UTC, to the second, like HTTP dates
+    modified_at: datetime
+
+
+class UserName(SQLModel, table=True):
+    """A name saved by one UI user, numbered per user."""
+
+    __tablename__ = "user_name"
+    # Clustered on the primary key, so one user's names are a single range
+    __table_args__ = {"sqlite_with_rowid": False}
+
+    # NiceGUI's browser session id
+    user_id: str = Field(primary_key=True)
+    id: int = Field(primary_key=True)
+    name: str
+    # Naive UTC, like derbyname
+    created_at: datetime = Field(
+        default_factory=datetime.utcnow, sa_column=Column(DateTime, nullable=False)
+    )
+    is_favorite: bool = False
+
+
+class UserNameSeq(SQLModel, table=True):
+    """The last id handed out to each UI user; it never goes down."""
+
+    __tablename__ = "user_name_seq"
+
+    user_id: str = Field(primary_key=True)
+    last_id: int = 0
+
+
 class DerbyNameCreate(SQLModel):
     """Schema for creating a new derby name."""
 
     name: str
 
 
+class NameSearchResult(SQLModel):
+    """Schema for a name search hit."""
+
+    id: Optional[int]
+    name: str
+    source: Literal["saved", "corpus"]
+    rank: float
+
+
+class DailyNameStatsResponse(SQLModel):
+    """Schema for one day of name statistics."""
+
+    day: date
+    created: int
+    favorites: int
+
+
+class NameStatsResponse(SQLModel):
+    """Schema for the name statistics endpoint."""
+
+    total: int
+    favorites: int
+    daily: list[DailyNameStatsResponse]
+
+
+class WordFrequencyResponse(SQLModel):
+    """Schema for one word of the word cloud."""
+
+    text: str
+    weight: int
+    size: int
+
+
 class DerbyNameResponse(SQLModel):
     """Schema for derby name API responses."""
 
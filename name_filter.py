@@ -0,0 +1,139 @@
+"""Bloom filter over saved names, for duplicate checks that skip the database."""
+
+from collections.abc import Iterable
+import math
+
+import numpy as np
+
+_MASK64 = (1 << 64) - 1
+
+
+class _Layer:
+    """One fixed-size Bloom filter: a bit array probed at ``hash_count`` places."""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.size = max(
+            64, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        )
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        # A bytearray for fast single-name probes, with a NumPy view for batches
+        self.bits = bytearray((self.size + 7) // 8)
+        self.view = np.frombuffer(self.bits, dtype=np.uint8)
+        self.count = 0
+
+    def positions(self, hashes: np.ndarray) -> np.ndarray:
+        """Derive every probe position from two base hashes per name."""
+        # Double hashing; uint64 arithmetic wraps, which is what we want
+        steps = np.arange(self.hash_count, dtype=np.uint64)
+        return (hashes[:, :1] + steps * hashes[:, 1:]) % np.uint64(self.size)
+
+    def add(self, hashes: np.ndarray):
+        positions = self.positions(hashes).ravel()
+        masks = np.left_shift(1, positions & np.uint64(7)).astype(np.uint8)
+        np.bitwise_or.at(self.view, positions >> np.uint64(3), masks)
+        self.count += len(hashes)
+
+    def contains(self, hashes: np.ndarray) -> np.ndarray:
+        positions = self.positions(hashes)
+        masks = np.left_shift(1, positions & np.uint64(7)).astype(np.uint8)
+        return ((self.view[positions >> np.uint64(3)] & masks) != 0).all(axis=1)
+
+    def contains_one(self, h1: int, h2: int) -> bool:
+        """Probe a single name in plain Python, cheaper than a NumPy round trip."""
+        bits, size = self.bits, self.size
+        for step in range(self.hash_count):
+            position = ((h1 + step * h2) & _MASK64) % size
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+
+def _mix(h: np.ndarray) -> np.ndarray:
+    """Scramble 64-bit hashes with the splitmix64 finalizer."""
+    h = (h ^ (h >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    h = (h ^ (h >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return h ^ (h >> np.uint64(31))
+
+
+def _hashes(names: list[str]) -> np.ndarray:
+    """Return two 64-bit hashes per name as an (n, 2) array."""
+    # str hashes are cached and seeded per process, which is fine for a
+    # filter that is rebuilt from the table on every start
+    first = np.fromiter(
+        (hash(name) for name in names), dtype=np.int64, count=len(names)
+    ).view(np.uint64)
+    # An odd stride never cycles back to the first probe early
+    return np.stack([first, _mix(first) | np.uint64(1)], axis=1)
+
+
+def _hash_pair(name: str) -> tuple[int, int]:
+    """Return the same two hashes as ``_hashes`` for a single name."""
+    first = hash(name) & _MASK64
+    h = first
+    h = ((h ^ (h >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    h = ((h ^ (h >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return first, (h ^ (h >> 31)) | 1
+
+
+class NameFilter:
+    """
+    Approximate set of saved names.
+
+    A name the filter has never seen is always reported as new, so checking
+    it before inserting avoids nearly every unique-constraint violation. A
+    false positive only costs one extra generation attempt. When the newest
+    layer reaches its capacity a layer twice its size is added, so the
+    filter keeps working as the table grows, at ``error_rate`` per layer.
+
+    Names can't be removed; a deleted name stays reserved until the filter
+    is rebuilt from the table on the next start.
+    """
+
+    def __init__(self, capacity: int = 100_000, error_rate: float = 0.001):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        if not 0 < error_rate < 1:
+            raise ValueError("error_rate must be between 0 and 1")
+
+        self.error_rate = error_rate
+        self._layers = [_Layer(capacity, error_rate)]
+
+    def __len__(self) -> int:
+        return sum(layer.count for layer in self._layers)
+
+    def __contains__(self, name: str) -> bool:
+        h1, h2 = _hash_pair(name)
+        return any(layer.contains_one(h1, h2) for layer in self._layers)
+
+    def add(self, name: str):
+        """Record a saved name."""
+        self.update([name])
+
+    def update(self, names: Iterable[str]):
+        """Record many saved names, hashing them in one vectorized pass."""
+        hashes = _hashes(list(names))
+        while len(hashes):
+            layer = self._layers[-1]
+            room = layer.capacity - layer.count
+            if room <= 0:
+                self._layers.append(_Layer(2 * layer.capacity, self.error_rate))
+                continue
+            layer.add(hashes[:room])
+            hashes = hashes[room:]
+
+    def contains_many(self, names: list[str]) -> np.ndarray:
+        """Return a boolean array marking which names may already be saved."""
+        hashes = _hashes(names)
+        found = np.zeros(len(names), dtype=bool)
+        for layer in self._layers:
+            found |= layer.contains(hashes)
+        return found
+
+    def stats(self) -> dict:
+        """Return the name count, layer count and filter memory in bytes."""
+        return {
+            "names": len(self),
+            "layers": len(self._layers),
+            "bytes": sum(len(layer.bits) for layer in self._layers),
+        }
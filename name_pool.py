@@ -0,0 +1,104 @@
+"""Bounded pool of pre-generated names, refilled off the request path."""
+
+from collections import deque
+from collections.abc import Callable
+import threading
+from typing import Optional
+
+
+class NamePool:
+    """
+    Keep a buffer of ready names so requests can take one in O(1).
+
+    A daemon thread refills the pool up to ``high_watermark`` whenever it
+    drops below ``low_watermark``. When the pool is empty, ``get`` returns
+    None and the caller generates inline; hits and misses are counted so the
+    watermarks can be sized for peak traffic.
+    """
+
+    def __init__(
+        self,
+        generate_many: Callable[[int], list[str]],
+        low_watermark: int = 20,
+        high_watermark: int = 200,
+        batch_size: int = 20,
+    ):
+        if not 0 <= low_watermark < high_watermark:
+            raise ValueError("low_watermark must be below high_watermark")
+
+        self.generate_many = generate_many
+        self.low_watermark = low_watermark
+        self.high_watermark = high_watermark
+        self.batch_size = batch_size
+        self.hits = 0
+        self.misses = 0
+
+        self._names = deque()
+        self._refill = threading.Event()
+        self._running = False
+        self._thread = None
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def start(self):
+        """Start the refill thread and fill the pool in the background."""
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(
+            target=self._refill_loop, name="name-pool-refill", daemon=True
+        )
+        self._thread.start()
+        self._refill.set()
+
+    def stop(self, timeout: float = 5.0):
+        """Stop the refill thread, waiting for the current batch to finish."""
+        self._running = False
+        self._refill.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def get(self) -> Optional[str]:
+        """
+        Take a ready name from the pool.
+
+        Returns:
+            A generated name, or None if the pool is empty
+        """
+        try:
+            # deque.popleft is atomic, so no lock is needed against the refiller
+            name = self._names.popleft()
+        except IndexError:
+            self.misses += 1
+            self._refill.set()
+            return None
+
+        self.hits += 1
+        if len(self._names) < self.low_watermark:
+            self._refill.set()
+        return name
+
+    def stats(self) -> dict:
+        """Return pool size, watermarks and hit/miss counters."""
+        return {
+            "size": len(self._names),
+            "low_watermark": self.low_watermark,
+            "high_watermark": self.high_watermark,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    def _refill_loop(self):
+        """Top the pool up to the high watermark each time it is signalled."""
+        while self._running:
+            self._refill.wait()
+            self._refill.clear()
+            while self._running and len(self._names) < self.high_watermark:
+                wanted = min(self.batch_size, self.high_watermark - len(self._names))
+                try:
+                    self._names.extend(self.generate_many(wanted))
+                except Exception as e:
+                    print(f"Error refilling name pool: {e}")
+                    break
@@ -0,0 +1,125 @@
+"""Suffix-array index for checking generated names against the training text."""
+
+import numpy as np
+
+
+class NoveltyIndex:
+    """
+    Answer "does this string occur anywhere in the training text?" without
+    scanning the text.
+
+    The index is a suffix array over the text's code points, so a lookup is a
+    binary search costing O(m log n) character comparisons for a pattern of
+    length m, instead of markovify's O(n) ``pattern in rejoined_text`` scan.
+    Matches are plain substring matches, exactly like markovify's test.
+
+    Text learned after the index was built is kept in a small ``pending``
+    string that is scanned directly, so adding a name never re-sorts the
+    suffix array; ``folded`` and ``adopt`` sort it in, off the request path.
+    """
+
+    def __init__(self, text: str, suffix_array: np.ndarray, pending: str = ""):
+        self.text = text
+        self.suffix_array = suffix_array
+        self.pending = pending
+
+    @classmethod
+    def build(cls, text: str) -> "NoveltyIndex":
+        """
+        Build the suffix array by prefix doubling.
+
+        Each round sorts suffixes by the ranks of their first 2k code points,
+        so the number of rounds is logarithmic in the longest repeated
+        substring of the text.
+        """
+        n = len(text)
+        if n == 0:
+            return cls(text, np.zeros(0, dtype=np.int32))
+
+        codes = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+        _, rank = np.unique(codes, return_inverse=True)
+        rank = rank.astype(np.int64)
+
+        k = 1
+        while True:
+            # Rank of the suffix k characters further on; -1 sorts suffixes
+            # that run off the end of the text first, like shorter strings
+            shifted = np.full(n, -1, dtype=np.int64)
+            shifted[: n - k] = rank[k:]
+            order = np.lexsort((shifted, rank))
+
+            sorted_rank = rank[order]
+            sorted_shifted = shifted[order]
+            changed = (sorted_rank[1:] != sorted_rank[:-1]) | (
+                sorted_shifted[1:] != sorted_shifted[:-1]
+            )
+            rank = np.empty(n, dtype=np.int64)
+            rank[order] = np.concatenate(([0], np.cumsum(changed)))
+
+            if rank[order[-1]] == n - 1 or k >= n:
+                break
+            k *= 2
+
+        return cls(text, order.astype(np.int32))
+
+    def add(self, text: str, separator: str = "\n"):
+        """Add text learned after the index was built."""
+        self.pending = f"{self.pending}{separator}{text}" if self.pending else text
+
+    def folded(self, separator: str = "\n") -> "NoveltyIndex":
+        """
+        Build a new index over the text and the pending text.
+
+        Sorting takes seconds on a large corpus and only reads this index,
+        so it can run while other threads keep using it; ``adopt`` then
+        switches over.
+
+        Args:
+            separator: Joins the pending text on, as ``add`` joined it
+        """
+        text, pending = self.text, self.pending
+        if not pending:
+            return self
+        return self.build(f"{text}{separator}{pending}" if text else pending)
+
+    def adopt(self, folded: "NoveltyIndex", separator: str = "\n"):
+        """
+        Switch to an index from ``folded``, keeping text added since.
+
+        Lookups then binary-search the folded text instead of scanning a
+        pending string that grows with every name learned.
+        """
+        combined = (
+            f"{self.text}{separator}{self.pending}" if self.text else self.pending
+        )
+        if not combined.startswith(folded.text):
+            # Rebuilt from other text in the meantime; keep what is here
+            return
+        rest = combined[len(folded.text) :]
+        self.text = folded.text
+        self.suffix_array = folded.suffix_array
+        self.pending = rest[len(separator) :]
+
+    def __contains__(self, pattern: str) -> bool:
+        """Return True if ``pattern`` is a substring of the indexed text."""
+        m = len(pattern)
+        if m == 0:
+            return True
+        if pattern in self.pending:
+            return True
+
+        text = self.text
+        suffix_array = self.suffix_array
+        lo, hi = 0, len(suffix_array)
+        # Find the first suffix whose m-character prefix is >= pattern
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start = int(suffix_array[mid])
+            if text[start : start + m] < pattern:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo == len(suffix_array):
+            return False
+        start = int(suffix_array[lo])
+        return text[start : start + m] == pattern
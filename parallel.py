@@ -0,0 +1,87 @@
+"""Multi-core name generation with a process pool of independently seeded workers."""
+
+from concurrent.futures import ProcessPoolExecutor
+import math
+import multiprocessing
+import os
+
+import numpy as np
+
+# Generator owned by each worker process
+_worker_generator = None
+
+
+def _init_worker(base_entropy: int):
+    """
+    Load the models once per worker and give it its own random stream.
+
+    The models are memory-mapped, so every worker shares the same physical
+    pages through the OS page cache. Seeds are derived from a shared base
+    entropy and the worker's pid, so streams never repeat across workers,
+    including replacements for workers that died.
+    """
+    global _worker_generator
+    from generator import DerbyNameGenerator
+
+    seed_sequence = np.random.SeedSequence(base_entropy, spawn_key=(os.getpid(),))
+    _worker_generator = DerbyNameGenerator(seed=int(seed_sequence.generate_state(1)[0]))
+
+
+def _generate_chunk(count: int, max_attempts: int) -> list[str]:
+    """Generate a chunk of names in a worker process."""
+    return _worker_generator.generate_many(count, max_attempts)
+
+
+class ParallelGenerator:
+    """
+    Spread batches of generation across worker processes.
+
+    Generation is pure-Python and CPU bound, so threads serialize on the GIL;
+    separate processes let large batches use every core.
+    """
+
+    # Smallest chunk worth the inter-process round trip
+    MIN_CHUNK_SIZE = 8
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        # "spawn" avoids forking a process that already runs server threads
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(np.random.SeedSequence().entropy,),
+        )
+
+    def generate_many(self, count: int, max_attempts: int = 100) -> list[str]:
+        """
+        Generate distinct names, one chunk per worker.
+
+        Args:
+            count: Number of names to generate
+            max_attempts: Maximum number of generation attempts per name
+
+        Returns:
+            A list of up to ``count`` unique generated names
+        """
+        chunk_size = max(math.ceil(count / self.workers), self.MIN_CHUNK_SIZE)
+        sizes = [chunk_size] * (count // chunk_size)
+        if count % chunk_size:
+            sizes.append(count % chunk_size)
+
+        names = {}
+        chunks = self._executor.map(_generate_chunk, sizes, [max_attempts] * len(sizes))
+        for chunk in chunks:
+            names.update(dict.fromkeys(chunk))
+
+        # Chunks are independent, so top up any cross-chunk duplicates
+        if len(names) < count:
+            extra = self._executor.submit(
+                _generate_chunk, 2 * (count - len(names)), max_attempts
+            )
+            names.update(dict.fromkeys(extra.result()))
+        return list(names)[:count]
+
+    def shutdown(self):
+        """Stop the worker processes."""
+        self._executor.shutdown(wait=True, cancel_futures=True)
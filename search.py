@@ -0,0 +1,133 @@
+"""Full-text name search backed by SQLite FTS5."""
+
+import hashlib
+import re
+from typing import Literal, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+# Unicode word tokens with accents folded, plus prefix indexes for the short
+# prefixes people type first
+FTS_OPTIONS = "tokenize='unicode61 remove_diacritics 2', prefix='2 3'"
+
+SEARCH_DDL = [
+    # External-content index over derbyname: names are stored once, in the table
+    "CREATE VIRTUAL TABLE IF NOT EXISTS derbyname_fts USING fts5("
+    f"name, content='derbyname', content_rowid='id', {FTS_OPTIONS})",
+    "CREATE TRIGGER IF NOT EXISTS derbyname_fts_insert AFTER INSERT ON derbyname "
+    "BEGIN INSERT INTO derbyname_fts (rowid, name) VALUES (new.id, new.name); END",
+    "CREATE TRIGGER IF NOT EXISTS derbyname_fts_delete AFTER DELETE ON derbyname "
+    "BEGIN INSERT INTO derbyname_fts (derbyname_fts, rowid, name) "
+    "VALUES ('delete', old.id, old.name); END",
+    "CREATE TRIGGER IF NOT EXISTS derbyname_fts_update AFTER UPDATE OF name "
+    "ON derbyname BEGIN "
+    "INSERT INTO derbyname_fts (derbyname_fts, rowid, name) "
+    "VALUES ('delete', old.id, old.name); "
+    "INSERT INTO derbyname_fts (rowid, name) VALUES (new.id, new.name); END",
+    # The training corpus has no table of its own, so this index holds it
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS corpus_fts USING fts5(name, {FTS_OPTIONS})",
+    "CREATE TABLE IF NOT EXISTS search_meta (key TEXT PRIMARY KEY, value TEXT)",
+]
+
+SEARCH_QUERIES = {
+    "saved": (
+        "SELECT derbyname.id AS id, derbyname.name AS name, 'saved' AS source, "
+        "bm25(derbyname_fts) AS rank FROM derbyname_fts "
+        "JOIN derbyname ON derbyname.id = derbyname_fts.rowid "
+        "WHERE derbyname_fts MATCH :match"
+    ),
+    "corpus": (
+        "SELECT NULL AS id, name, 'corpus' AS source, bm25(corpus_fts) AS rank "
+        "FROM corpus_fts WHERE corpus_fts MATCH :match"
+    ),
+}
+
+
+def create_search_index(connection: Connection):
+    """
+    Create the search tables and the triggers that keep them in sync.
+
+    Safe to run on every start. When the saved-name index is new, it is
+    built from the names already in the table.
+    """
+    exists = connection.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE name = 'derbyname_fts'"
+    ).first()
+    for statement in SEARCH_DDL:
+        connection.exec_driver_sql(statement)
+    if not exists:
+        connection.exec_driver_sql(
+            "INSERT INTO derbyname_fts (derbyname_fts) VALUES ('rebuild')"
+        )
+
+
+def index_corpus(connection: Connection, names: list[str]):
+    """Index the training corpus, unless this exact corpus is already indexed."""
+    digest = hashlib.sha256("\n".join(names).encode("utf-8")).hexdigest()
+    indexed = connection.execute(
+        text("SELECT value FROM search_meta WHERE key = 'corpus'")
+    ).scalar()
+    if indexed == digest:
+        return
+
+    connection.exec_driver_sql("DELETE FROM corpus_fts")
+    connection.execute(
+        text("INSERT INTO corpus_fts (name) VALUES (:name)"),
+        [{"name": name} for name in names],
+    )
+    connection.execute(
+        text(
+            "INSERT OR REPLACE INTO search_meta (key, value) VALUES ('corpus', :value)"
+        ),
+        {"value": digest},
+    )
+
+
+def match_expression(query: str) -> Optional[str]:
+    """
+    Turn free text into an FTS5 query that matches every word as a prefix.
+
+    Only word characters survive, so user input can never inject FTS5
+    operators.
+
+    Returns:
+        The MATCH expression, or None if the query has no words
+    """
+    words = re.findall(r"\w+", query)
+    if not words:
+        return None
+    return " ".join(f'"{word}"*' for word in words)
+
+
+async def search_names(
+    session: AsyncSession,
+    match: str,
+    source: Literal["saved", "corpus", "all"],
+    limit: int,
+    offset: int,
+) -> list[dict]:
+    """
+    Run a MATCH expression against one or both indexes, best matches first.
+
+    Args:
+        session: Database session
+        match: Expression from ``match_expression``
+        source: Which index to search; "all" merges both rankings
+        limit: Maximum number of results
+        offset: Number of results to skip
+
+    Returns:
+        Result dicts with id (None for corpus names), name, source and rank
+    """
+    if source == "all":
+        query = " UNION ALL ".join(SEARCH_QUERIES.values())
+    else:
+        query = SEARCH_QUERIES[source]
+    # bm25 scores are negative, with the best match lowest
+    statement = text(f"{query} ORDER BY rank, name LIMIT :limit OFFSET :offset")
+    result = await session.exec(
+        statement, params={"match": match, "limit": limit, "offset": offset}
+    )
+    return [dict(row) for row in result.mappings()]
@@ -0,0 +1,173 @@
+"""Name generation and listing, shared by the API routes and in-process callers."""
+
+import asyncio
+from collections.abc import Sequence
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import Row, String, tuple_, type_coerce
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from generator import DerbyNameGenerator
+from models import DerbyName
+from wordcloud_generator import PREVIEW_SCALE, WordCloudRenderer, wordcloud_text
+from write_queue import WriteQueue
+
+# Fresh names tried before giving up when each one turns out to be saved
+MAX_NAME_RETRIES = 5
+# Most recent names drawn into the word cloud image
+WORDCLOUD_MAX_NAMES = 1000
+
+# The event loop the API runs its services on, once it has started
+_service_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def bind_loop(loop: Optional[asyncio.AbstractEventLoop]):
+    """Record the loop the services run on, or None once they have stopped."""
+    global _service_loop
+    _service_loop = loop
+
+
+def service_loop() -> Optional[asyncio.AbstractEventLoop]:
+    """Return the loop serving the API in this process, if one is running."""
+    if _service_loop is None or _service_loop.is_closed():
+        return None
+    return _service_loop
+
+
+async def generate_name(
+    generator: DerbyNameGenerator,
+    queue: WriteQueue,
+    session: AsyncSession,
+    seed: Optional[int] = None,
+) -> Optional[DerbyName]:
+    """
+    Generate a name and save it.
+
+    Args:
+        generator: Generator to draw the name from
+        queue: Write queue that saves it
+        session: Session for reading back an already saved seeded name
+        seed: Optional seed; a seed always maps to the same name
+
+    Returns:
+        The saved row, or None if every retry produced a name that was
+        already saved, or a seeded name kept being deleted as it was saved
+    """
+    if seed is not None:
+        name = await run_in_threadpool(generator.generate, seed=seed)
+        # A seed always maps to the same name, so repeats return the saved
+        # row; if it is deleted before it is read back, insert it once more
+        for _ in range(2):
+            db_name = await queue.insert(name)
+            if db_name is None:
+                result = await session.exec(
+                    select(DerbyName).where(DerbyName.name == name)
+                )
+                db_name = result.first()
+            if db_name is not None:
+                return db_name
+        return None
+
+    # Generation skips names the filter knows are saved, so a clash here
+    # means another writer got there first; retry with a fresh name
+    for _ in range(MAX_NAME_RETRIES):
+        # Serve from the pre-generated pool; generation is CPU bound, so a
+        # miss generates in the threadpool rather than on the event loop
+        name = generator.pool.get() or await run_in_threadpool(generator.generate)
+        db_name = await queue.insert(name)
+        if db_name is not None:
+            return db_name
+    return None
+
+
+async def list_names(
+    session: AsyncSession,
+    limit: int,
+    after: Optional[tuple[datetime, int]] = None,
+    favorite: Optional[bool] = None,
+    since: Optional[datetime] = None,
+) -> Sequence[Row]:
+    """
+    Read one page of saved names, newest first.
+
+    Pages are keyset-paginated over (created_at, id), so every page is an
+    index range scan no matter how deep it is.
+
+    Args:
+        session: Database session
+        limit: Maximum number of names
+        after: (created_at, id) of the last name on the previous page
+        favorite: Only favorites, or only non-favorites
+        since: Only names created at or after this time
+
+    Returns:
+        Rows of id, name, created_at, is_favorite and meta, with meta as
+        its stored JSON text
+    """
+    statement = select(
+        DerbyName.id,
+        DerbyName.name,
+        DerbyName.created_at,
+        DerbyName.is_favorite,
+        type_coerce(DerbyName.meta, String).label("meta"),
+    )
+    if favorite is not None:
+        statement = statement.where(DerbyName.is_favorite == favorite)
+    if since is not None:
+        # Timestamps are stored as naive UTC
+        if since.tzinfo is not None:
+            since = since.astimezone(timezone.utc).replace(tzinfo=None)
+        statement = statement.where(DerbyName.created_at >= since)
+    if after is not None:
+        statement = statement.where(
+            tuple_(DerbyName.created_at, DerbyName.id) < tuple_(*after)
+        )
+    statement = statement.order_by(
+        DerbyName.created_at.desc(), DerbyName.id.desc()
+    ).limit(limit)
+    return (await session.exec(statement)).all()
+
+
+async def wordcloud_png(
+    session: AsyncSession,
+    renderer: WordCloudRenderer,
+    etag: Optional[str],
+    width: int,
+    height: int,
+    preview: bool = False,
+) -> tuple[bytes, bool]:
+    """
+    Render the most recent names as a word cloud PNG.
+
+    Full renders are cached per dataset version and size. Without a
+    version there is nothing to key the cache on, so every call renders.
+    With ``preview``, a full render that isn't ready yet is started in the
+    background and a small image is rendered and returned right away;
+    previews are never cached.
+
+    Args:
+        session: Database session
+        renderer: Renderer that lays out and caches the images
+        etag: ETag of the names table's current version, if it has one
+        width: Image width in pixels
+        height: Image height in pixels
+        preview: Return a small image rather than wait for a full render
+
+    Returns:
+        The PNG bytes, and False if they are a preview
+    """
+    key = (etag, width, height) if etag else None
+    png = renderer.cached(key) if key else None
+    if png is not None:
+        return png, True
+
+    rows = await list_names(session, WORDCLOUD_MAX_NAMES)
+    text = wordcloud_text([row._mapping for row in rows])
+    full = renderer.render(key, text, width, height)
+    if preview and not full.done():
+        small = (width // PREVIEW_SCALE, height // PREVIEW_SCALE)
+        return await renderer.render(None, text, *small, quick=True), False
+    return await full, True
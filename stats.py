@@ -0,0 +1,80 @@
+"""Name statistics maintained by triggers, so reading them never scans derbyname."""
+
+from sqlalchemy.engine import Connection
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from models import DailyNameStats, NameStats
+
+STATS_DDL = [
+    "CREATE TRIGGER IF NOT EXISTS name_stats_insert AFTER INSERT ON derbyname BEGIN "
+    "UPDATE name_stats SET total = total + 1, favorites = favorites + new.is_favorite "
+    "WHERE id = 1; "
+    "INSERT INTO name_stats_daily (day, created, favorites) "
+    "VALUES (date(new.created_at), 1, new.is_favorite) "
+    "ON CONFLICT (day) DO UPDATE SET created = created + 1, "
+    "favorites = favorites + excluded.favorites; END",
+    "CREATE TRIGGER IF NOT EXISTS name_stats_delete AFTER DELETE ON derbyname BEGIN "
+    "UPDATE name_stats SET total = total - 1, favorites = favorites - old.is_favorite "
+    "WHERE id = 1; "
+    "UPDATE name_stats_daily SET created = created - 1, "
+    "favorites = favorites - old.is_favorite WHERE day = date(old.created_at); END",
+    "CREATE TRIGGER IF NOT EXISTS name_stats_favorite AFTER UPDATE OF is_favorite "
+    "ON derbyname WHEN new.is_favorite != old.is_favorite BEGIN "
+    "UPDATE name_stats SET favorites = favorites + new.is_favorite - old.is_favorite "
+    "WHERE id = 1; "
+    "UPDATE name_stats_daily "
+    "SET favorites = favorites + new.is_favorite - old.is_favorite "
+    "WHERE day = date(new.created_at); END",
+]
+
+
+def create_stats_triggers(connection: Connection):
+    """
+    Create the triggers that maintain the stats tables.
+
+    Safe to run on every start. The first run seeds the counters from one
+    scan of derbyname; after that only the triggers touch them.
+    """
+    seeded = connection.exec_driver_sql("SELECT 1 FROM name_stats WHERE id = 1").first()
+    for statement in STATS_DDL:
+        connection.exec_driver_sql(statement)
+    if not seeded:
+        rebuild_stats(connection)
+
+
+def rebuild_stats(connection: Connection):
+    """Recount the stats tables from derbyname."""
+    connection.exec_driver_sql("DELETE FROM name_stats")
+    connection.exec_driver_sql("DELETE FROM name_stats_daily")
+    connection.exec_driver_sql(
+        "INSERT INTO name_stats (id, total, favorites) "
+        "SELECT 1, count(*), coalesce(sum(is_favorite), 0) FROM derbyname"
+    )
+    connection.exec_driver_sql(
+        "INSERT INTO name_stats_daily (day, created, favorites) "
+        "SELECT date(created_at), count(*), sum(is_favorite) FROM derbyname "
+        "GROUP BY date(created_at)"
+    )
+
+
+async def read_stats(session: AsyncSession, days: int) -> dict:
+    """
+    Read the counters and the most recent days of the rollup.
+
+    Args:
+        session: Database session
+        days: Number of most recent days with activity to include
+
+    Returns:
+        Totals plus per-day counts, newest day first
+    """
+    totals = await session.get(NameStats, 1)
+    daily = await session.exec(
+        select(DailyNameStats).order_by(DailyNameStats.day.desc()).limit(days)
+    )
+    return {
+        "total": totals.total if totals else 0,
+        "favorites": totals.favorites if totals else 0,
+        "daily": daily.all(),
+    }
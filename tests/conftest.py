@@ -2,24 +2,48 @@
 
 import pytest
 from sqlmodel import SQLModel, create_engine, Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
 from fastapi.testclient import TestClient
 from unittest.mock import Mock, patch
 from pathlib import Path
 import tempfile
 
+from database import create_triggers
+
+
+@pytest.fixture(name="test_db_path")
+def test_db_path_fixture():
+    """Create a throwaway SQLite file shared by the sync and async engines."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        yield Path(tmpdir) / "test.db"
+
 
 @pytest.fixture(name="test_engine")
-def test_engine_fixture():
-    """Create an in-memory SQLite engine for testing."""
+def test_engine_fixture(test_db_path):
+    """Create a file-backed SQLite engine for testing."""
     engine = create_engine(
-        "sqlite:///:memory:",
+        f"sqlite:///{test_db_path}",
         connect_args={"check_same_thread": False},
     )
     SQLModel.metadata.create_all(engine)
+    with engine.begin() as conn:
+        create_triggers(conn)
     yield engine
     engine.dispose()
 
 
+@pytest.fixture(name="test_async_engine")
+def test_async_engine_fixture(test_engine, test_db_path):
+    """Create an async engine on the same database as ``test_engine``."""
+    # NullPool, since each TestClient request may run on a fresh event loop
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{test_db_path}", poolclass=NullPool
+    )
+    yield engine
+
+
 @pytest.fixture(name="test_session")
 def test_session_fixture(test_engine):
     """Create a database session for testing."""
@@ -32,41 +56,48 @@ def mock_generator_fixture():
     """Create a mocked DerbyNameGenerator."""
     mock = Mock()
     mock.generate.return_value = "Test Derby Name"
+    # Empty pool, so requests generate inline unless a test fills it
+    mock.pool.get.return_value = None
+    mock.generate_many.side_effect = lambda count: [
+        f"Test Derby Name {i}" for i in range(count)
+    ]
     return mock
 
 
 @pytest.fixture(name="test_client")
-def test_client_fixture(mock_generator):
+def test_client_fixture(test_engine, test_async_engine, mock_generator):
     """Create a FastAPI TestClient with test database and mocked generator."""
     from api import app
-    from database import get_session
-
-    # Create a separate test engine with tables
-    test_engine = create_engine(
-        "sqlite:///:memory:",
-        connect_args={"check_same_thread": False},
-    )
-    SQLModel.metadata.create_all(test_engine)
+    from database import get_async_session, get_session, get_write_queue
+    from write_queue import WriteQueue
 
-    # Override the database session dependency
+    # Override the database session dependencies
     def override_get_session():
         with Session(test_engine) as session:
             yield session
 
+    async def override_get_async_session():
+        async with AsyncSession(test_async_engine, expire_on_commit=False) as session:
+            yield session
+
+    queue = WriteQueue(test_async_engine)
+
     # Disable startup/shutdown events during testing
     app.router.on_startup = []
     app.router.on_shutdown = []
 
     app.dependency_overrides[get_session] = override_get_session
+    app.dependency_overrides[get_async_session] = override_get_async_session
+    app.dependency_overrides[get_write_queue] = lambda: queue
 
     # Mock the generator to avoid downloading/training during tests
     with patch("api.get_generator", return_value=mock_generator):
         with TestClient(app) as client:
             yield client
+            client.portal.call(queue.close)
 
     # Clean up
     app.dependency_overrides.clear()
-    test_engine.dispose()
 
 
 @pytest.fixture(name="temp_data_dir")
@@ -1,6 +1,13 @@
 """Tests for FastAPI endpoints."""
 
-from models import DerbyName
+import csv
+from datetime import datetime, timedelta
+import io
+import json
+
+import pytest
+
+from models import DerbyName, DerbyNameResponse, TableVersion
 
 
 def test_generate_name_endpoint(test_client, mock_generator):
@@ -21,6 +28,140 @@ def test_generate_name_endpoint(test_client, mock_generator):
     mock_generator.generate.assert_called_once()
 
 
+def test_generate_name_uses_pool(test_client, mock_generator):
+    """Test POST /api/generate serves a pooled name without generating."""
+    mock_generator.pool.get.return_value = "Pooled Derby Name"
+
+    response = test_client.post("/api/generate")
+
+    assert response.status_code == 200
+    assert response.json()["name"] == "Pooled Derby Name"
+    mock_generator.generate.assert_not_called()
+
+
+def test_generate_name_with_seed(test_client, mock_generator):
+    """Test POST /api/generate?seed= bypasses the pool and reuses saved names."""
+    first = test_client.post("/api/generate", params={"seed": 42})
+    second = test_client.post("/api/generate", params={"seed": 42})
+
+    assert first.status_code == 200
+    assert second.status_code == 200
+    assert second.json()["id"] == first.json()["id"]
+    mock_generator.generate.assert_called_with(seed=42)
+    mock_generator.pool.get.assert_not_called()
+
+
+def test_generate_name_with_seed_survives_a_racing_delete(
+    test_client, test_session, monkeypatch
+):
+    """Test that a seeded name deleted before it is read back is saved again."""
+    from write_queue import WriteQueue
+
+    test_session.add(DerbyName(name="Test Derby Name"))
+    test_session.commit()
+    insert = WriteQueue.insert
+    names = []
+
+    async def insert_then_lose_race(queue, name):
+        db_name = await insert(queue, name)
+        if not names:
+            # Another request deletes the saved row before it is read back
+            test_session.delete(test_session.get(DerbyName, 1))
+            test_session.commit()
+        names.append(name)
+        return db_name
+
+    monkeypatch.setattr(WriteQueue, "insert", insert_then_lose_race)
+
+    response = test_client.post("/api/generate", params={"seed": 7})
+
+    assert response.status_code == 200
+    assert response.json()["name"] == "Test Derby Name"
+    assert names == ["Test Derby Name", "Test Derby Name"]
+
+
+def test_pool_stats_endpoint(test_client, mock_generator):
+    """Test GET /api/generate/pool reports the pool counters."""
+    stats = {
+        "size": 3,
+        "low_watermark": 1,
+        "high_watermark": 5,
+        "hits": 7,
+        "misses": 2,
+    }
+    mock_generator.pool.stats.return_value = stats
+
+    response = test_client.get("/api/generate/pool")
+
+    assert response.status_code == 200
+    assert response.json() == stats
+
+
+def test_generate_batch_endpoint(test_client, mock_generator):
+    """Test POST /api/generate/batch returns and saves every name."""
+    response = test_client.post("/api/generate/batch", params={"count": 5})
+
+    assert response.status_code == 200
+    data = response.json()
+
+    assert [item["name"] for item in data] == [f"Test Derby Name {i}" for i in range(5)]
+    assert all(item["id"] is not None for item in data)
+    assert all(item["is_favorite"] is False for item in data)
+    mock_generator.generate_many.assert_called_once_with(5)
+
+    # Verify they were all persisted
+    assert len(test_client.get("/api/names").json()) == 5
+
+
+def test_generate_name_retries_saved_names(test_client, test_session, mock_generator):
+    """Test POST /api/generate retries when a generated name is already saved."""
+    test_session.add(DerbyName(name="Saved Name"))
+    test_session.commit()
+    mock_generator.generate.side_effect = ["Saved Name", "Fresh Name"]
+
+    response = test_client.post("/api/generate")
+
+    assert response.status_code == 200
+    assert response.json()["name"] == "Fresh Name"
+    assert mock_generator.generate.call_count == 2
+
+
+def test_generate_name_gives_up_on_saved_names(
+    test_client, test_session, mock_generator
+):
+    """Test POST /api/generate returns 503 when every retry is a saved name."""
+    test_session.add(DerbyName(name="Test Derby Name"))
+    test_session.commit()
+
+    response = test_client.post("/api/generate")
+
+    assert response.status_code == 503
+
+
+def test_generate_batch_skips_saved_names(test_client, test_session):
+    """Test POST /api/generate/batch leaves out names that are already saved."""
+    test_session.add(DerbyName(name="Test Derby Name 1"))
+    test_session.commit()
+
+    response = test_client.post("/api/generate/batch", params={"count": 3})
+
+    assert [item["name"] for item in response.json()] == [
+        "Test Derby Name 0",
+        "Test Derby Name 2",
+    ]
+
+
+def test_generate_batch_validates_count(test_client):
+    """Test POST /api/generate/batch rejects out-of-range counts."""
+    assert (
+        test_client.post("/api/generate/batch", params={"count": 0}).status_code == 422
+    )
+    assert (
+        test_client.post("/api/generate/batch", params={"count": 1000}).status_code
+        == 422
+    )
+
+
 def test_get_names_empty(test_client):
     """Test GET /api/names returns empty list when no names exist."""
     response = test_client.get("/api/names")
@@ -54,6 +195,196 @@ def test_get_names_returns_all_names(test_client, test_session):
     assert data[2]["name"] == "Name 1"
 
 
+def test_get_names_paginates_with_cursor(test_client, test_session):
+    """Test GET /api/names walks every name once, page by page."""
+    for i in range(7):
+        test_session.add(DerbyName(name=f"Name {i}"))
+    test_session.commit()
+
+    seen = []
+    params = {"limit": 3}
+    while True:
+        response = test_client.get("/api/names", params=params)
+        assert response.status_code == 200
+        seen.extend(item["name"] for item in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+        params["after"] = cursor
+
+    assert seen == [f"Name {i}" for i in reversed(range(7))]
+
+
+def test_get_names_filters(test_client, test_session):
+    """Test GET /api/names favorite and since filters."""
+    old = DerbyName(name="Old Name", is_favorite=True)
+    old.created_at = datetime(2020, 1, 1)
+    test_session.add(old)
+    test_session.add(DerbyName(name="New Favorite", is_favorite=True))
+    test_session.add(DerbyName(name="New Regular"))
+    test_session.commit()
+
+    favorites = test_client.get("/api/names", params={"favorite": True}).json()
+    recent = test_client.get(
+        "/api/names", params={"since": "2024-01-01T00:00:00Z"}
+    ).json()
+
+    assert [item["name"] for item in favorites] == ["New Favorite", "Old Name"]
+    assert {item["name"] for item in recent} == {"New Favorite", "New Regular"}
+
+
+def test_get_names_matches_response_schema(test_client, test_session):
+    """Test GET /api/names encodes rows the way DerbyNameResponse would."""
+    name = DerbyName(name="Schema Name", meta={"model": "markov"})
+    name.created_at = datetime(2024, 1, 2, 3, 4, 5, 678)
+    test_session.add(name)
+    test_session.add(DerbyName(name="No Meta", meta=None))
+    test_session.commit()
+
+    data = test_client.get("/api/names").json()
+
+    expected = DerbyNameResponse.model_validate(name, from_attributes=True)
+    assert data[1] == expected.model_dump(mode="json")
+    assert data[0]["meta"] is None
+
+
+def test_get_names_msgpack(test_client, test_session):
+    """Test GET /api/names answers in MessagePack when asked to."""
+    msgpack = pytest.importorskip("msgpack")
+    test_session.add(DerbyName(name="Packed Name", meta={"seed": 1}))
+    test_session.commit()
+
+    response = test_client.get("/api/names", headers={"Accept": "application/msgpack"})
+
+    assert response.headers["content-type"] == "application/msgpack"
+    assert "Accept" in response.headers["vary"]
+    assert msgpack.unpackb(response.content) == test_client.get("/api/names").json()
+
+
+def test_get_names_gzip(test_client, test_session):
+    """Test large GET /api/names bodies are gzipped for clients that accept it."""
+    for i in range(50):
+        test_session.add(DerbyName(name=f"Name {i}"))
+    test_session.commit()
+
+    compressed = test_client.get("/api/names", headers={"Accept-Encoding": "gzip"})
+    plain = test_client.get("/api/names", headers={"Accept-Encoding": "identity"})
+
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert "content-encoding" not in plain.headers
+    assert compressed.json() == plain.json()
+
+
+def test_get_names_rejects_bad_cursor(test_client):
+    """Test GET /api/names returns 400 for a malformed cursor."""
+    response = test_client.get("/api/names", params={"after": "not-a-cursor"})
+
+    assert response.status_code == 400
+
+
+def test_get_wordcloud_words(test_client, test_session):
+    """Test GET /api/wordcloud/words returns weighted, sized top words."""
+    test_session.add_all(
+        [
+            DerbyName(name="Slam Dunk"),
+            DerbyName(name="Slam Jam", is_favorite=True),
+        ]
+    )
+    test_session.commit()
+
+    response = test_client.get("/api/wordcloud/words", params={"limit": 2})
+    unchanged = test_client.get(
+        "/api/wordcloud/words",
+        params={"limit": 2},
+        headers={"If-None-Match": response.headers["ETag"]},
+    )
+
+    assert response.status_code == 200
+    words = response.json()
+    assert [word["text"] for word in words] == ["Slam", "Jam"]
+    assert words[0]["weight"] == 5
+    assert set(words[0]) == {"text", "weight", "size"}
+    assert unchanged.status_code == 304
+
+
+@pytest.fixture(name="wordcloud_renderer")
+def wordcloud_renderer_fixture():
+    """Render word clouds in a thread instead of a worker process."""
+    from api import app
+    from wordcloud_generator import WordCloudRenderer, get_wordcloud_renderer
+
+    renderer = WordCloudRenderer(workers=0)
+    app.dependency_overrides[get_wordcloud_renderer] = lambda: renderer
+    yield renderer
+    renderer.shutdown()
+
+
+def test_get_wordcloud_is_cached(test_client, test_session, wordcloud_renderer):
+    """Test GET /api/wordcloud.png renders once per dataset version."""
+    test_session.add(DerbyName(name="Cloudy Derby", is_favorite=True))
+    test_session.commit()
+    params = {"width": 200, "height": 100}
+
+    first = test_client.get("/api/wordcloud.png", params=params)
+    second = test_client.get("/api/wordcloud.png", params=params)
+    unchanged = test_client.get(
+        "/api/wordcloud.png",
+        params=params,
+        headers={"If-None-Match": first.headers["ETag"]},
+    )
+
+    assert first.status_code == 200
+    assert first.headers["content-type"] == "image/png"
+    assert first.content.startswith(b"\x89PNG")
+    assert second.content == first.content
+    assert unchanged.status_code == 304
+    assert wordcloud_renderer.renders == 1
+
+    test_session.add(DerbyName(name="New Cloud"))
+    test_session.commit()
+    test_client.get("/api/wordcloud.png", params=params)
+
+    assert wordcloud_renderer.renders == 2
+
+
+def test_get_wordcloud_preview(test_client, wordcloud_renderer):
+    """Test a preview is small and uncached until the full render is ready."""
+    params = {"width": 400, "height": 200, "preview": True}
+
+    preview = test_client.get("/api/wordcloud.png", params=params)
+
+    assert preview.status_code == 200
+    assert preview.headers["cache-control"] == "no-store"
+    assert "etag" not in preview.headers
+    assert preview.content.startswith(b"\x89PNG")
+
+    # The full render started in the background; once done, previews get it
+    full = test_client.get("/api/wordcloud.png", params={"width": 400, "height": 200})
+    again = test_client.get("/api/wordcloud.png", params=params)
+
+    assert again.content == full.content != preview.content
+    assert "etag" in again.headers
+    # Only the full render is kept
+    assert wordcloud_renderer.stats()["cached"] == 1
+
+
+def test_get_wordcloud_without_version_is_not_cached(
+    test_client, test_engine, wordcloud_renderer
+):
+    """Test that a render with no table version to key it on isn't cached."""
+    with test_engine.begin() as conn:
+        conn.exec_driver_sql("DELETE FROM table_version")
+    params = {"width": 200, "height": 100}
+
+    first = test_client.get("/api/wordcloud.png", params=params)
+    test_client.get("/api/wordcloud.png", params=params)
+
+    assert first.status_code == 200
+    assert "etag" not in first.headers
+    assert wordcloud_renderer.renders == 2
+    assert wordcloud_renderer.stats()["cached"] == 0
+
+
 def test_create_custom_name(test_client):
     """Test POST /api/names creates a custom name."""
     response = test_client.post("/api/names", json={"name": "Custom Derby Name"})
@@ -67,6 +398,14 @@ def test_create_custom_name(test_client):
     assert "created_at" in data
 
 
+def test_create_custom_name_is_learned(test_client, mock_generator):
+    """Test POST /api/names teaches the saved name to the generator."""
+    response = test_client.post("/api/names", json={"name": "Custom Derby Name"})
+
+    assert response.status_code == 200
+    mock_generator.learn.assert_called_once_with("Custom Derby Name")
+
+
 def test_create_name_validation(test_client):
     """Test POST /api/names validates required fields."""
     response = test_client.post("/api/names", json={})
@@ -154,8 +493,132 @@ def test_duplicate_name_handling(test_client, test_session):
     # Try to create duplicate via API
     response = test_client.post("/api/names", json={"name": "Duplicate Test"})
 
-    # Should fail due to unique constraint
-    assert response.status_code == 500  # Internal server error due to DB constraint
+    # The insert is ignored and reported as a conflict
+    assert response.status_code == 409
+    assert response.json()["detail"] == "Name already exists"
+
+
+def test_search_names_matches_prefixes(test_client, test_session):
+    """Test GET /api/names/search ranks saved names matching word prefixes."""
+    for name in ["Roller Derby Queen", "Derby Roller", "Pain Train"]:
+        test_session.add(DerbyName(name=name))
+    test_session.commit()
+
+    response = test_client.get("/api/names/search", params={"q": "rol der"})
+
+    assert response.status_code == 200
+    data = response.json()
+    assert {item["name"] for item in data} == {"Roller Derby Queen", "Derby Roller"}
+    assert all(item["source"] == "saved" and item["id"] for item in data)
+    assert [item["rank"] for item in data] == sorted(item["rank"] for item in data)
+
+
+def test_search_names_paginates(test_client, test_session):
+    """Test GET /api/names/search pages through results with limit and offset."""
+    for i in range(5):
+        test_session.add(DerbyName(name=f"Jammer {i}"))
+    test_session.commit()
+
+    def page(offset):
+        response = test_client.get(
+            "/api/names/search", params={"q": "jam", "limit": 2, "offset": offset}
+        )
+        return [item["name"] for item in response.json()]
+
+    pages = page(0) + page(2) + page(4)
+    assert sorted(pages) == [f"Jammer {i}" for i in range(5)]
+
+
+def test_search_names_covers_corpus(test_client, test_engine, test_session):
+    """Test GET /api/names/search over the training corpus and both sources."""
+    from search import index_corpus
+
+    with test_engine.begin() as conn:
+        index_corpus(conn, ["Thunder Thighs", "Slam Bam"])
+    test_session.add(DerbyName(name="Thunder Struck"))
+    test_session.commit()
+
+    corpus = test_client.get(
+        "/api/names/search", params={"q": "thun", "source": "corpus"}
+    ).json()
+    both = test_client.get("/api/names/search", params={"q": "thun", "source": "all"})
+
+    assert corpus == [
+        {
+            "id": None,
+            "name": "Thunder Thighs",
+            "source": "corpus",
+            "rank": corpus[0]["rank"],
+        }
+    ]
+    assert {(item["name"], item["source"]) for item in both.json()} == {
+        ("Thunder Thighs", "corpus"),
+        ("Thunder Struck", "saved"),
+    }
+
+
+def test_search_names_rejects_queries_without_words(test_client):
+    """Test GET /api/names/search returns 400 for punctuation-only queries."""
+    response = test_client.get("/api/names/search", params={"q": "*!"})
+
+    assert response.status_code == 400
+
+
+def test_get_stats(test_client, test_session):
+    """Test GET /api/stats reports totals, favorites and per-day volume."""
+    test_session.add(DerbyName(name="Early", created_at=datetime(2024, 1, 1, 9)))
+    test_session.add(DerbyName(name="Later", created_at=datetime(2024, 1, 2, 9)))
+    test_session.commit()
+    test_client.post("/api/names", json={"name": "Today"})
+    name_id = test_client.get("/api/names").json()[0]["id"]
+    test_client.patch(f"/api/names/{name_id}/favorite")
+
+    response = test_client.get("/api/stats", params={"days": 2})
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total"] == 3
+    assert data["favorites"] == 1
+    assert [day["created"] for day in data["daily"]] == [1, 1]
+    assert data["daily"][0]["favorites"] == 1
+    assert data["daily"][1]["day"] == "2024-01-02"
+
+
+def test_get_names_conditional_get(test_client):
+    """Test GET /api/names answers 304 until the names change."""
+    first = test_client.get("/api/names")
+    etag = first.headers["ETag"]
+
+    unchanged = test_client.get("/api/names", headers={"If-None-Match": etag})
+    assert unchanged.status_code == 304
+    assert unchanged.content == b""
+    assert unchanged.headers["ETag"] == etag
+
+    test_client.post("/api/names", json={"name": "New Arrival"})
+    changed = test_client.get("/api/names", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+    assert [item["name"] for item in changed.json()] == ["New Arrival"]
+
+
+def test_collection_endpoints_honor_if_modified_since(test_client, test_session):
+    """Test that stats, search and export honor If-Modified-Since."""
+    test_client.post("/api/names", json={"name": "Dated Name"})
+    # Last-Modified is only sent once the write's second has passed
+    version = test_session.get(TableVersion, "derbyname")
+    version.modified_at -= timedelta(seconds=5)
+    test_session.commit()
+    last_modified = test_client.get("/api/stats").headers["Last-Modified"]
+    headers = {"If-Modified-Since": last_modified}
+
+    assert test_client.get("/api/stats", headers=headers).status_code == 304
+    search = test_client.get(
+        "/api/names/search", params={"q": "dated"}, headers=headers
+    )
+    assert search.status_code == 304
+    export = test_client.get("/api/names/export", headers=headers)
+    assert export.status_code == 304
+    assert test_client.get("/api/names/export").headers["ETag"]
 
 
 def test_api_cors_headers(test_client):
@@ -190,3 +653,44 @@ def test_multiple_operations_workflow(test_client, mock_generator):
     # 5. Verify empty
     final_list = test_client.get("/api/names")
     assert len(final_list.json()) == 0
+
+
+def test_export_names_ndjson(test_client, test_session):
+    """Test GET /api/names/export streams one JSON object per line."""
+    test_session.add(DerbyName(name="First", meta={"source": "test"}))
+    test_session.add(DerbyName(name="Second", is_favorite=True))
+    test_session.commit()
+
+    response = test_client.get("/api/names/export")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["name"] for row in rows] == ["First", "Second"]
+    assert rows[0]["meta"] == {"source": "test"}
+    assert rows[1]["is_favorite"] is True
+
+
+def test_export_names_csv(test_client, test_session, monkeypatch):
+    """Test GET /api/names/export?format=csv streams every row across chunks."""
+    import api
+
+    monkeypatch.setattr(api, "EXPORT_CHUNK_SIZE", 2)
+    for i in range(5):
+        test_session.add(DerbyName(name=f"Name, {i}"))
+    test_session.commit()
+
+    response = test_client.get("/api/names/export", params={"format": "csv"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [row["name"] for row in rows] == [f"Name, {i}" for i in range(5)]
+    assert rows[0]["meta"] == "{}"
+
+
+def test_export_names_rejects_unknown_format(test_client):
+    """Test GET /api/names/export validates the format."""
+    response = test_client.get("/api/names/export", params={"format": "xml"})
+
+    assert response.status_code == 422
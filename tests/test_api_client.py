@@ -0,0 +1,166 @@
+"""Tests for the clients the UI uses to reach the API."""
+
+import asyncio
+import threading
+
+import httpx
+import pytest
+from sqlmodel import select
+
+import api_client
+from api_client import LocalApiClient, RemoteApiClient, get_api_client
+import database
+from models import DerbyName
+import services
+from write_queue import WriteQueue
+
+
+@pytest.fixture(name="service_loop")
+def service_loop_fixture(test_async_engine, mock_generator, monkeypatch):
+    """Serve the API's services from a loop in another thread, as main.py does."""
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    queue = WriteQueue(test_async_engine)
+    monkeypatch.setattr(database, "async_engine", test_async_engine)
+    monkeypatch.setattr(database, "write_queue", queue)
+    monkeypatch.setattr(api_client, "get_generator", lambda: mock_generator)
+    services.bind_loop(loop)
+    yield loop
+    services.bind_loop(None)
+    asyncio.run_coroutine_threadsafe(queue.close(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.close()
+
+
+def test_local_generate_runs_on_service_loop(service_loop, test_session):
+    """Test that a UI-side call generates and saves on the API's loop."""
+    data = asyncio.run(LocalApiClient().generate_name())
+
+    assert data["name"] == "Test Derby Name"
+    saved = test_session.exec(select(DerbyName)).one()
+    assert saved.id == data["id"]
+
+
+def test_local_word_frequencies_reread_after_write(service_loop, test_session):
+    """Test that word counts are cached until the table changes."""
+    client = LocalApiClient()
+    test_session.add(DerbyName(name="Slam Queen"))
+    test_session.commit()
+
+    first = asyncio.run(client.word_frequencies(limit=10))
+    again = asyncio.run(client.word_frequencies(limit=10))
+    test_session.add(DerbyName(name="Slam Dunk"))
+    test_session.commit()
+    after_write = asyncio.run(client.word_frequencies(limit=10))
+
+    assert again is first
+    assert [word["text"] for word in after_write] == ["Slam", "Dunk", "Queen"]
+
+
+def test_local_client_requires_running_api():
+    """Test that local calls fail clearly when the API isn't in this process."""
+    with pytest.raises(RuntimeError):
+        asyncio.run(LocalApiClient().word_frequencies(limit=10))
+
+
+def test_get_api_client_prefers_local(service_loop):
+    """Test that the in-process client is used while the API runs here."""
+    assert isinstance(get_api_client(), LocalApiClient)
+    services.bind_loop(None)
+    assert isinstance(get_api_client(), RemoteApiClient)
+
+
+def test_remote_client_reuses_connection_and_etag():
+    """Test that the remote client keeps one pooled client and revalidates."""
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if request.headers.get("if-none-match") == 'W/"derbyname-1"':
+            return httpx.Response(304)
+        return httpx.Response(
+            200,
+            json=[{"text": "Slam", "weight": 2, "size": 26}],
+            headers={"ETag": 'W/"derbyname-1"'},
+        )
+
+    client = RemoteApiClient(
+        "http://api.test/api", transport=httpx.MockTransport(handler)
+    )
+
+    async def poll_twice():
+        first = await client.word_frequencies(limit=5)
+        pooled = client.client
+        second = await client.word_frequencies(limit=5)
+        assert client.client is pooled
+        await client.aclose()
+        return first, second
+
+    first, second = asyncio.run(poll_twice())
+
+    assert first == second == [{"text": "Slam", "weight": 2, "size": 26}]
+    assert str(requests[0].url) == "http://api.test/api/wordcloud/words?limit=5"
+    assert requests[1].headers["if-none-match"] == 'W/"derbyname-1"'
+
+
+def test_local_wordcloud_png_is_rendered_once(service_loop, test_session, monkeypatch):
+    """Test that the UI renders the word cloud in process, cached by version."""
+    from wordcloud_generator import WordCloudRenderer
+
+    renderer = WordCloudRenderer(workers=0)
+    monkeypatch.setattr(api_client, "get_wordcloud_renderer", lambda: renderer)
+    client = LocalApiClient()
+    test_session.add(DerbyName(name="Slam Bam"))
+    test_session.commit()
+
+    png, headers = asyncio.run(client.wordcloud_png(200, 100))
+    again, _ = asyncio.run(client.wordcloud_png(200, 100))
+    unchanged, revalidated = asyncio.run(
+        client.wordcloud_png(200, 100, if_none_match=headers["ETag"])
+    )
+
+    assert png.startswith(b"\x89PNG")
+    assert headers == {"Cache-Control": "no-cache", "ETag": 'W/"derbyname-1"'}
+    assert again == png
+    assert unchanged is None and revalidated == headers
+    assert renderer.renders == 1
+    renderer.shutdown()
+
+
+def test_remote_wordcloud_png_passes_on_caching_headers():
+    """Test that the remote client revalidates and tells previews apart."""
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if request.url.params["preview"] == "true":
+            return httpx.Response(
+                200, content=b"\x89PNG", headers={"Cache-Control": "no-store"}
+            )
+        headers = {"Cache-Control": "no-cache", "ETag": 'W/"derbyname-3"'}
+        if request.headers.get("if-none-match") == 'W/"derbyname-3"':
+            return httpx.Response(304, headers=headers)
+        return httpx.Response(200, content=b"\x89PNG", headers=headers)
+
+    client = RemoteApiClient(
+        "http://api.test/api", transport=httpx.MockTransport(handler)
+    )
+
+    async def fetch_all():
+        results = [
+            await client.wordcloud_png(400, 200),
+            await client.wordcloud_png(400, 200, preview=True),
+            await client.wordcloud_png(400, 200, if_none_match='W/"derbyname-3"'),
+        ]
+        await client.aclose()
+        return results
+
+    full, preview, unchanged = asyncio.run(fetch_all())
+
+    validators = {"ETag": 'W/"derbyname-3"', "Cache-Control": "no-cache"}
+    assert full == (b"\x89PNG", validators)
+    assert preview == (b"\x89PNG", {"Cache-Control": "no-store"})
+    assert unchanged == (None, validators)
+    assert "if-none-match" not in requests[0].headers
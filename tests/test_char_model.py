@@ -0,0 +1,106 @@
+"""Tests for the character-level Markov model."""
+
+import numpy as np
+import pytest
+
+from char_model import CharModel
+
+
+@pytest.fixture(name="sample_char_model")
+def sample_char_model_fixture(sample_derby_names):
+    """Train a small character model on the sample names."""
+    return CharModel.train(sample_derby_names.splitlines(), order=2)
+
+
+def test_char_model_csr_layout(sample_char_model):
+    """Test that the CSR arrays are consistent with each other."""
+    model = sample_char_model
+
+    assert model.indptr[0] == 0
+    assert model.indptr[-1] == len(model.next_chars) == len(model.next_states)
+    assert np.all(np.diff(model.indptr) > 0)
+    assert np.all(np.diff(model.cumulative) > 0)
+
+
+def test_char_model_samples_known_characters(sample_char_model, sample_derby_names):
+    """Test that batched sampling only emits characters from the corpus."""
+    rng = np.random.default_rng(0)
+    names = sample_char_model.sample(200, rng)
+    corpus_chars = set(sample_derby_names)
+
+    assert len(names) > 0
+    assert all(set(name) <= corpus_chars for name in names)
+    assert all(0 < len(name) <= CharModel.MAX_NAME_LENGTH for name in names)
+
+
+def test_char_model_sampling_is_deterministic(sample_char_model):
+    """Test that the same seed produces the same batch."""
+    first = sample_char_model.sample(20, np.random.default_rng(5))
+    second = sample_char_model.sample(20, np.random.default_rng(5))
+
+    assert first == second
+
+
+def test_char_model_rejects_training_names(sample_char_model, sample_derby_names):
+    """Test that copies of training names fail the novelty test."""
+    for name in sample_derby_names.splitlines():
+        assert not sample_char_model.test_sentence_output(name, 0.7, 15)
+
+
+def test_char_model_make_sentences_returns_novel_names(sample_char_model):
+    """Test that make_sentences only returns names passing the novelty test."""
+    names = sample_char_model.make_sentences(5, tries=100, rng=np.random.default_rng(1))
+
+    assert all(sample_char_model.test_sentence_output(n, 0.7, 15) for n in names)
+
+
+def test_char_model_round_trip(sample_char_model, temp_data_dir):
+    """Test that a saved model loads back with identical tables."""
+    path = temp_data_dir / "char.bin"
+    sample_char_model.save(path)
+
+    loaded = CharModel.load(path)
+
+    assert loaded.order == sample_char_model.order
+    assert loaded.alphabet == sample_char_model.alphabet
+    assert np.array_equal(loaded.cumulative, sample_char_model.cumulative)
+    assert loaded.novelty.text == sample_char_model.novelty.text
+    assert loaded.sample(10, np.random.default_rng(2)) == sample_char_model.sample(
+        10, np.random.default_rng(2)
+    )
+
+
+def test_char_model_rejects_invalid_order(sample_derby_names):
+    """Test that order must be positive."""
+    with pytest.raises(ValueError):
+        CharModel.train(sample_derby_names.splitlines(), order=0)
+
+
+def test_char_model_learn_matches_retraining(sample_derby_names):
+    """Test that learning names gives the same tables as training with them."""
+    names = sample_derby_names.splitlines()
+    extra = [names[0][::-1], names[1] + names[2]]
+    learned = CharModel.train(names, order=2)
+    for name in extra:
+        learned.learn(name)
+    retrained = CharModel.train(names + extra, order=2)
+
+    for learned_table, retrained_table in zip(learned.packed(), retrained.packed()):
+        assert np.array_equal(learned_table, retrained_table)
+    assert extra[0] in learned.novelty
+
+
+def test_char_model_learn_new_characters(sample_char_model, temp_data_dir):
+    """Test that learned names with unseen characters can be sampled and saved."""
+    sample_char_model.learn("Zyx Ω")
+    sample_char_model.learned_offset = 7
+    assert sample_char_model.alphabet.endswith("Ω")
+
+    path = temp_data_dir / "char.bin"
+    sample_char_model.save(path)
+    loaded = CharModel.load(path)
+
+    assert loaded.learned_offset == 7
+    assert np.all(np.diff(loaded.cumulative) > 0)
+    names = loaded.sample(2000, np.random.default_rng(3))
+    assert any("Ω" in name for name in names)
@@ -25,6 +25,29 @@ def test_init_db_creates_tables():
     engine.dispose()
 
 
+def test_init_db_adds_missing_indexes(monkeypatch):
+    """Test that init_db indexes a table created before the indexes existed."""
+    import database
+    from sqlalchemy import inspect, text
+
+    engine = create_engine("sqlite:///:memory:")
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "CREATE TABLE derbyname (id INTEGER PRIMARY KEY, name VARCHAR, "
+                "created_at DATETIME, is_favorite BOOLEAN, meta JSON)"
+            )
+        )
+    monkeypatch.setattr(database, "engine", engine)
+
+    database.init_db()
+    database.init_db()
+
+    index_names = {index["name"] for index in inspect(engine).get_indexes("derbyname")}
+    assert {index.name for index in DerbyName.__table__.indexes} <= index_names
+    engine.dispose()
+
+
 def test_get_session_yields_session():
     """Test that get_session yields a valid session."""
     session_gen = get_session()
@@ -118,3 +141,60 @@ def test_database_transaction_rollback(test_session):
     result = test_session.exec(statement).first()
 
     assert result is None
+
+
+def test_db_engines_apply_performance_profile(temp_data_dir):
+    """Test that sync and async engines set the pragmas on every connection."""
+    import asyncio
+
+    from sqlalchemy import text
+
+    from database import create_async_db_engine, create_db_engine
+
+    path = temp_data_dir / "profile.db"
+    engine = create_db_engine(f"sqlite:///{path}")
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert conn.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+        assert conn.execute(text("PRAGMA busy_timeout")).scalar() == 5000
+    assert engine.pool.size() == 10
+    engine.dispose()
+
+    async def read_async_pragmas():
+        async_engine = create_async_db_engine(f"sqlite+aiosqlite:///{path}")
+        async with async_engine.connect() as conn:
+            result = await conn.execute(text("PRAGMA cache_size"))
+            cache_size = result.scalar()
+        await async_engine.dispose()
+        return cache_size
+
+    assert asyncio.run(read_async_pragmas()) == -65536
+
+
+def test_wal_readers_do_not_block_writers(temp_data_dir, monkeypatch):
+    """Test that a commit succeeds while another connection holds a read."""
+    from sqlalchemy import text
+
+    from config import settings
+    from database import create_db_engine
+
+    # Fail at once instead of waiting if the writer would block
+    monkeypatch.setattr(settings, "SQLITE_BUSY_TIMEOUT_MS", 0)
+    engine = create_db_engine(f"sqlite:///{temp_data_dir / 'wal.db'}")
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add(DerbyName(name="Existing Name"))
+        session.commit()
+
+    with engine.connect() as reader:
+        reader.execute(text("BEGIN"))
+        reader.execute(text("SELECT * FROM derbyname")).all()
+
+        with Session(engine) as session:
+            session.add(DerbyName(name="Written During Read"))
+            session.commit()
+
+        # The open read transaction still sees its snapshot
+        assert reader.execute(text("SELECT count(*) FROM derbyname")).scalar() == 1
+
+    engine.dispose()
@@ -0,0 +1,69 @@
+"""Tests for list response encoding."""
+
+from datetime import datetime
+
+import orjson
+import pytest
+
+import encoding
+from encoding import (
+    JSON_MEDIA_TYPE,
+    MSGPACK_MEDIA_TYPE,
+    encode,
+    negotiate,
+    row_items,
+)
+
+COLUMNS = ["id", "created_at", "meta"]
+ROWS = [(1, datetime(2024, 1, 1, 9), '{"seed": 1}'), (2, datetime(2024, 1, 2), None)]
+
+
+@pytest.mark.parametrize(
+    "accept, expected",
+    [
+        (None, JSON_MEDIA_TYPE),
+        ("*/*", JSON_MEDIA_TYPE),
+        ("application/json", JSON_MEDIA_TYPE),
+        ("application/msgpack", MSGPACK_MEDIA_TYPE),
+        ("application/x-msgpack", MSGPACK_MEDIA_TYPE),
+        ("application/msgpack;q=0.5, application/json", JSON_MEDIA_TYPE),
+        ("application/json;q=0.5, application/msgpack", MSGPACK_MEDIA_TYPE),
+        ("application/msgpack;q=0", JSON_MEDIA_TYPE),
+    ],
+)
+def test_negotiate(accept, expected):
+    """Test that MessagePack is picked only when the client prefers it."""
+    pytest.importorskip("msgpack")
+    assert negotiate(accept) == expected
+
+
+def test_negotiate_without_msgpack(monkeypatch):
+    """Test that JSON is served when the msgpack extra isn't installed."""
+    monkeypatch.setattr(encoding, "msgpack", None)
+
+    assert negotiate("application/msgpack") == JSON_MEDIA_TYPE
+
+
+def test_json_embeds_stored_json():
+    """Test that JSON text columns are embedded without a round trip."""
+    items = row_items(COLUMNS, ROWS, JSON_MEDIA_TYPE, json_columns=["meta"])
+
+    assert orjson.loads(encode(items, JSON_MEDIA_TYPE)) == [
+        {"id": 1, "created_at": "2024-01-01T09:00:00", "meta": {"seed": 1}},
+        {"id": 2, "created_at": "2024-01-02T00:00:00", "meta": None},
+    ]
+
+
+def test_msgpack_matches_json():
+    """Test that MessagePack bodies decode to the same items as JSON bodies."""
+    msgpack = pytest.importorskip("msgpack")
+    as_json = encode(
+        row_items(COLUMNS, ROWS, JSON_MEDIA_TYPE, json_columns=["meta"]),
+        JSON_MEDIA_TYPE,
+    )
+    as_msgpack = encode(
+        row_items(COLUMNS, ROWS, MSGPACK_MEDIA_TYPE, json_columns=["meta"]),
+        MSGPACK_MEDIA_TYPE,
+    )
+
+    assert msgpack.unpackb(as_msgpack) == orjson.loads(as_json)
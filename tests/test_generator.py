@@ -77,3 +77,201 @@ def test_generator_has_names_text():
 
     assert hasattr(gen, "names_text")
     assert len(gen.names_text) > 0
+
+
+def test_generator_models_are_compiled():
+    """Test that generation runs on compiled chains."""
+    from char_model import CharModel
+    from markov_chain import CompiledText
+
+    gen = get_generator()
+
+    assert isinstance(gen.word_model, CompiledText)
+    assert isinstance(gen.char_model, CharModel)
+    assert gen.char_model.order == gen.CHAR_MODEL_ORDER
+
+
+def test_generate_many_returns_unique_names():
+    """Test generate_many() returns the requested number of distinct names."""
+    gen = get_generator()
+    names = gen.generate_many(5)
+
+    assert len(names) == 5
+    assert len(set(names)) == 5
+    assert all(isinstance(name, str) and name for name in names)
+
+
+def test_generation_skips_taken_names():
+    """Test that unseeded generation retries names that are already saved."""
+    gen = get_generator()
+    taken = set(gen.generate_many(50))
+    try:
+        gen.taken = taken
+        assert gen.generate() not in taken
+        assert not taken & set(gen.generate_many(20))
+    finally:
+        gen.taken = None
+
+
+def test_generate_with_seed_is_deterministic():
+    """Test that the same seed yields the same name and skips regeneration."""
+    gen = get_generator()
+    assert gen.fingerprint is not None
+
+    name = gen.generate(seed=1234)
+    original_generate = gen._generate
+    try:
+        gen._generate = Mock(side_effect=AssertionError("memo miss"))
+        assert gen.generate(seed=1234) == name
+    finally:
+        gen._generate = original_generate
+
+    # Without the memo, a fresh run from the same seed agrees
+    gen._seed_memo.clear()
+    assert gen.generate(seed=1234) == name
+
+
+def test_seed_memo_is_bounded():
+    """Test that the seed memo evicts the least recently used entries."""
+    gen = get_generator()
+    original_size = gen.SEED_MEMO_SIZE
+    gen._seed_memo.clear()
+    try:
+        gen.SEED_MEMO_SIZE = 2
+        for seed in range(3):
+            gen.generate(seed=seed)
+
+        assert [key[1] for key in gen._seed_memo] == [1, 2]
+    finally:
+        gen.SEED_MEMO_SIZE = original_size
+
+
+def test_learn_updates_models_and_checkpoints(
+    temp_data_dir, sample_derby_names, monkeypatch
+):
+    """Test that learned names are logged, generated and saved at checkpoints."""
+    from char_model import CharModel
+    from config import settings
+    from generator import DerbyNameGenerator
+    from markov_chain import CompiledText
+
+    corpus = temp_data_dir / "names.txt"
+    corpus.write_text(sample_derby_names, encoding="utf-8")
+    monkeypatch.setattr(DerbyNameGenerator, "CACHE_FILE", corpus)
+    monkeypatch.setattr(DerbyNameGenerator, "MODEL_CACHE_DIR", temp_data_dir / "m")
+    monkeypatch.setattr(
+        DerbyNameGenerator, "LEARNED_NAMES_FILE", temp_data_dir / "learned.txt"
+    )
+    monkeypatch.setattr(settings, "LEARN_CHECKPOINT_INTERVAL", 2)
+
+    gen = DerbyNameGenerator()
+    saved_digest = CompiledText.load(gen.word_model_file).fingerprint
+
+    gen.learn("  Quixotic   Zamboni ")
+    assert gen.fingerprint is None
+    assert "Quixotic Zamboni" in gen.word_model.novelty
+    assert CompiledText.load(gen.word_model_file).fingerprint == saved_digest
+
+    gen.learn("Zamboni Quixotic")
+    assert gen._learned_names() == ["Quixotic Zamboni", "Zamboni Quixotic"]
+    assert gen.fingerprint is not None
+    log_size = (temp_data_dir / "learned.txt").stat().st_size
+    assert CompiledText.load(gen.word_model_file).learned_offset == log_size
+    assert CharModel.load(gen.char_model_file).learned_offset == log_size
+    assert isinstance(gen.generate(), str)
+
+
+def test_models_are_cached_per_corpus(temp_data_dir, sample_derby_names, monkeypatch):
+    """Test that models train once per corpus and retrain when it changes."""
+    from generator import DerbyNameGenerator
+    from markov_chain import CompiledText
+
+    corpus = temp_data_dir / "names.txt"
+    corpus.write_text(sample_derby_names, encoding="utf-8")
+    monkeypatch.setattr(DerbyNameGenerator, "CACHE_FILE", corpus)
+    monkeypatch.setattr(DerbyNameGenerator, "MODEL_CACHE_DIR", temp_data_dir / "m")
+    monkeypatch.setattr(
+        DerbyNameGenerator, "LEARNED_NAMES_FILE", temp_data_dir / "learned.txt"
+    )
+
+    first = DerbyNameGenerator()
+    assert first.word_model_file.exists() and first.char_model_file.exists()
+
+    # A second start with the same corpus loads the cached files
+    with monkeypatch.context() as m:
+        m.setattr(CompiledText, "from_markovify", Mock(side_effect=AssertionError))
+        second = DerbyNameGenerator()
+    assert second.model_key == first.model_key
+    assert second.fingerprint == first.fingerprint
+
+    # Changing the corpus trains under a new key and drops the old files
+    corpus.write_text(sample_derby_names + "\nBrand New Name", encoding="utf-8")
+    third = DerbyNameGenerator()
+    assert third.model_key != first.model_key
+    assert not first.word_model_file.exists()
+
+
+def chain_counts(model) -> dict:
+    """Return a compiled word model's transition counts, keyed by token tuples."""
+    chain = model.chain
+    if chain._state_ids is None:
+        chain._thaw()
+    offsets, successors, cumulative, _ = chain.packed()
+    counts = {}
+    for state, state_id in chain._state_ids.items():
+        lo, hi = offsets[state_id], offsets[state_id + 1]
+        counts[tuple(chain.tokens[t] for t in state)] = {
+            chain.tokens[successors[i]]: cumulative[i]
+            - (cumulative[i - 1] if i > lo else 0)
+            for i in range(lo, hi)
+        }
+    return counts
+
+
+def test_workers_sharing_a_log_checkpoint_every_name_once(
+    temp_data_dir, sample_derby_names, monkeypatch
+):
+    """Test that checkpoints from processes sharing one log match a retrain."""
+    import markovify
+
+    from config import settings
+    from generator import DerbyNameGenerator
+
+    corpus = temp_data_dir / "names.txt"
+    corpus.write_text(sample_derby_names, encoding="utf-8")
+    monkeypatch.setattr(DerbyNameGenerator, "CACHE_FILE", corpus)
+    monkeypatch.setattr(DerbyNameGenerator, "MODEL_CACHE_DIR", temp_data_dir / "m")
+    monkeypatch.setattr(
+        DerbyNameGenerator, "LEARNED_NAMES_FILE", temp_data_dir / "learned.txt"
+    )
+    monkeypatch.setattr(settings, "LEARN_CHECKPOINT_INTERVAL", 100)
+
+    def retrained(*learned):
+        text = "\n".join([sample_derby_names, *learned])
+        return markovify.NewlineText(text, state_size=2).chain.model
+
+    # Two worker processes with their own models over the same files
+    a = DerbyNameGenerator()
+    b = DerbyNameGenerator()
+    a.learn("Alpha Onlya")
+    b.learn("Bravo Onlyb")
+    a.learn("Alpha Twoa")
+    a.checkpoint()
+
+    # Learned names are sorted in, and the writable tables are kept
+    assert a.word_model.novelty.pending == ""
+    assert "Alpha Twoa" in a.word_model.novelty.text
+    assert a.word_model.chain._state_ids is not None
+
+    restarted = DerbyNameGenerator()
+    learned = ["Alpha Onlya", "Bravo Onlyb", "Alpha Twoa"]
+    assert chain_counts(restarted.word_model) == retrained(*learned)
+    assert "Bravo Onlyb" in restarted.char_model.novelty
+
+    # B saving over A's checkpoint keeps A's names
+    b.learn("Bravo Twob")
+    b.checkpoint()
+
+    restarted = DerbyNameGenerator()
+    assert chain_counts(b.word_model) == retrained(*learned, "Bravo Twob")
+    assert chain_counts(restarted.word_model) == retrained(*learned, "Bravo Twob")
@@ -0,0 +1,101 @@
+"""Tests for the saved-names list updates behind the UI."""
+
+import asyncio
+import json
+from datetime import datetime
+
+import main
+from main import (
+    format_date,
+    insert_row,
+    remove_row,
+    row_patch_script,
+    table_row,
+    update_row,
+)
+
+
+def name_data(name_id: int, name: str, is_favorite: bool = False) -> dict:
+    """Build a saved name as the user name store returns it."""
+    return {
+        "id": name_id,
+        "name": name,
+        "created_at": datetime(2024, 3, 4, 12, 30),
+        "is_favorite": is_favorite,
+    }
+
+
+def test_table_row_flattens_a_saved_name():
+    """Test that a table row carries the key, flag and formatted date."""
+    assert table_row(name_data(7, "Roller Queen", True)) == {
+        "id": 7,
+        "name": "Roller Queen",
+        "is_favorite": True,
+        "date": "2024-03-04 12:30",
+    }
+
+
+def test_format_date_falls_back_to_raw_value():
+    """Test that unparseable times are shown as stored."""
+    assert format_date("2024-03-04T12:30:00Z") == "2024-03-04 12:30"
+    assert format_date("yesterday") == "yesterday"
+
+
+def test_row_updates_keep_keys_and_order():
+    """Test that inserts, deletes and favorite toggles edit rows in place."""
+    rows = [table_row(name_data(i, f"Name {i}")) for i in (3, 2, 1)]
+    first = rows[0]
+
+    insert_row(rows, table_row(name_data(4, "Name 4")))
+    assert [row["id"] for row in rows] == [4, 3, 2, 1]
+    assert rows[1] is first
+
+    assert remove_row(rows, 2)
+    assert not remove_row(rows, 2)
+    assert [row["id"] for row in rows] == [4, 3, 1]
+
+    assert update_row(rows, name_data(3, "Name 3", is_favorite=True))
+    assert not update_row(rows, name_data(9, "Name 9", is_favorite=True))
+    assert [row["id"] for row in rows] == [4, 3, 1]
+    assert [row["is_favorite"] for row in rows] == [False, True, False]
+    assert rows[1] is first
+
+
+def test_insert_row_replaces_a_listed_id():
+    """Test that a name already listed moves to the top instead of repeating."""
+    rows = [table_row(name_data(i, f"Name {i}")) for i in (2, 1)]
+
+    insert_row(rows, table_row(name_data(1, "Name 1", is_favorite=True)))
+
+    assert [row["id"] for row in rows] == [1, 2]
+    assert rows[0]["is_favorite"] is True
+
+
+def test_row_patch_script_carries_only_the_changed_row():
+    """Test that a table change sends the one row, not the whole list."""
+    row = table_row(name_data(4, "Name 4"))
+
+    script = row_patch_script(12, 4, row, first=True)
+
+    assert json.dumps([12, 4, row, True]) in script
+    assert json.dumps([12, 4, None, False]) in row_patch_script(12, 4)
+
+
+def test_wordcloud_png_answers_current_etag_with_304(monkeypatch):
+    """Test that the UI route passes the API's ETag on and honors it."""
+    etag = 'W/"derbyname-2"'
+    headers = {"Cache-Control": "no-cache", "ETag": etag}
+
+    class Client:
+        async def wordcloud_png(self, width, height, preview, if_none_match):
+            return (None if if_none_match == etag else b"\x89PNG"), headers
+
+    monkeypatch.setattr(main, "get_api_client", Client)
+
+    fresh = asyncio.run(main.wordcloud_png(400, 200, False, None))
+    cached = asyncio.run(main.wordcloud_png(400, 200, False, etag))
+
+    assert fresh.status_code == 200 and fresh.body == b"\x89PNG"
+    assert fresh.headers["etag"] == etag
+    assert cached.status_code == 304 and cached.body == b""
+    assert cached.headers["etag"] == etag
@@ -0,0 +1,148 @@
+"""Tests for the compiled Markov chain engine."""
+
+import random
+
+import markovify
+import pytest
+
+from markov_chain import CompiledChain, CompiledText
+
+
+@pytest.fixture(name="sample_text_model")
+def sample_text_model_fixture(sample_derby_names):
+    """Train a small markovify model on the sample names."""
+    return markovify.NewlineText(sample_derby_names, state_size=2)
+
+
+def test_compiled_chain_interns_tokens(sample_text_model):
+    """Test that every token in the model is interned exactly once."""
+    chain = CompiledChain.from_model(sample_text_model.chain.model, 2)
+
+    assert chain.tokens[CompiledChain.BEGIN_ID] == markovify.chain.BEGIN
+    assert chain.tokens[CompiledChain.END_ID] == markovify.chain.END
+    assert len(chain.tokens) == len(set(chain.tokens))
+    assert chain.state_count == len(sample_text_model.chain.model)
+
+
+def test_compiled_chain_preserves_weights(sample_text_model):
+    """Test that packed cumulative weights match the original counts."""
+    model = sample_text_model.chain.model
+    chain = CompiledChain.from_model(model, 2)
+
+    begin = (markovify.chain.BEGIN,) * 2
+    lo, hi = chain.offsets[0], chain.offsets[1]
+    counts = {
+        chain.tokens[chain.successors[i]]: chain.cumulative[i]
+        - (chain.cumulative[i - 1] if i > lo else 0)
+        for i in range(lo, hi)
+    }
+
+    assert counts == model[begin]
+
+
+def test_compiled_chain_walk_produces_training_runs(sample_text_model):
+    """Test that walks on a tiny corpus reproduce runs from the corpus."""
+    chain = CompiledChain.from_model(sample_text_model.chain.model, 2)
+    runs = {tuple(run) for run in sample_text_model.parsed_sentences}
+
+    rng = random.Random(42)
+    for _ in range(50):
+        assert tuple(chain.walk(rng)) in runs
+
+
+def test_compiled_chain_walk_is_deterministic_with_rng(sample_text_model):
+    """Test that the same RNG seed produces the same walk."""
+    chain = CompiledChain.from_model(sample_text_model.chain.model, 2)
+
+    assert chain.walk(random.Random(7)) == chain.walk(random.Random(7))
+
+
+def test_compiled_chain_requires_begin_state():
+    """Test that compiling a model without a begin state fails."""
+    with pytest.raises(ValueError):
+        CompiledChain.from_model({("a", "b"): {"c": 1}}, 2)
+
+
+def test_compiled_text_rejects_copies(sample_text_model):
+    """Test that make_sentence applies markovify's novelty test."""
+    compiled = CompiledText.from_markovify(sample_text_model)
+
+    # Every run in this tiny corpus is a copy of a training line
+    assert compiled.make_sentence(tries=20, rng=random.Random(1)) is None
+
+
+def test_compiled_text_round_trip(sample_text_model, temp_data_dir):
+    """Test that a memory-mapped model walks exactly like the original."""
+    path = temp_data_dir / "word.bin"
+    compiled = CompiledText.from_markovify(sample_text_model)
+    compiled.save(path)
+
+    loaded = CompiledText.load(path)
+
+    assert list(loaded.chain.tokens) == compiled.chain.tokens
+    assert loaded.novelty.text == compiled.novelty.text
+    for seed in range(10):
+        assert loaded.chain.walk(random.Random(seed)) == compiled.chain.walk(
+            random.Random(seed)
+        )
+
+
+def test_compiled_chain_learn_matches_retraining(sample_derby_names):
+    """Test that learning a run gives the same counts as training with it."""
+    extra = ["Roller Queen Bee", "Brand New Skater"]
+    learned = CompiledChain.from_model(
+        markovify.NewlineText(sample_derby_names, state_size=2).chain.model, 2
+    )
+    for name in extra:
+        learned.learn(name.split())
+    retrained = markovify.NewlineText(
+        "\n".join([sample_derby_names, *extra]), state_size=2
+    ).chain.model
+
+    assert learned.state_count == len(retrained)
+    offsets, successors, cumulative, next_states = learned.packed()
+    for state, state_id in learned._state_ids.items():
+        lo, hi = offsets[state_id], offsets[state_id + 1]
+        counts = {
+            learned.tokens[successors[i]]: cumulative[i]
+            - (cumulative[i - 1] if i > lo else 0)
+            for i in range(lo, hi)
+        }
+        assert counts == retrained[tuple(learned.tokens[t] for t in state)]
+
+
+def test_compiled_text_learn_filters_like_training(sample_derby_names):
+    """Test that learning skips the sentences training would filter out."""
+    extra = ["Alotta Leggz (cleared)", 'Say "Cheese"', "Brand New Skater"]
+    learned = CompiledText.from_markovify(
+        markovify.NewlineText(sample_derby_names, state_size=2)
+    )
+    for name in extra:
+        learned.learn(name)
+    retrained = markovify.NewlineText(
+        "\n".join([sample_derby_names, *extra]), state_size=2
+    )
+
+    assert learned.chain.state_count == len(retrained.chain.model)
+    assert "Brand New Skater" in learned.novelty
+    assert "Alotta" not in learned.novelty
+    assert "Alotta" not in retrained.rejoined_text
+
+
+def test_compiled_text_learn_round_trip(sample_text_model, temp_data_dir):
+    """Test that learned runs are walkable and survive a save and load."""
+    compiled = CompiledText.from_markovify(sample_text_model)
+    compiled.learn("Totally Fresh Name")
+    compiled.learned_offset = 19
+    assert compiled.fingerprint is None
+    assert "Totally Fresh Name" in compiled.novelty
+
+    path = temp_data_dir / "word.bin"
+    compiled.save(path)
+    loaded = CompiledText.load(path)
+
+    assert loaded.learned_offset == 19
+    assert "Totally Fresh Name" in loaded.novelty
+    rng = random.Random(0)
+    walks = {" ".join(loaded.chain.walk(rng)) for _ in range(300)}
+    assert "Totally Fresh Name" in walks
@@ -0,0 +1,51 @@
+"""Tests for the model cache helpers."""
+
+import threading
+import time
+
+from model_cache import cache_key, file_lock, remove_stale
+
+
+def test_cache_key_tracks_corpus_and_params():
+    """Test that the key changes with the corpus and with any parameter."""
+    key = cache_key("Name One\nName Two", state_size=2, version=1)
+
+    assert key == cache_key("Name One\nName Two", version=1, state_size=2)
+    assert key != cache_key("Name One\nName Three", state_size=2, version=1)
+    assert key != cache_key("Name One\nName Two", state_size=3, version=1)
+
+
+def test_file_lock_is_exclusive(temp_data_dir):
+    """Test that a second holder waits until the first releases the lock."""
+    path = temp_data_dir / "cache.lock"
+    events = []
+    locked = threading.Event()
+
+    def hold():
+        with file_lock(path):
+            locked.set()
+            time.sleep(0.2)
+            events.append("first")
+
+    thread = threading.Thread(target=hold)
+    thread.start()
+    locked.wait()
+    with file_lock(path):
+        events.append("second")
+    thread.join()
+
+    assert events == ["first", "second"]
+
+
+def test_remove_stale_keeps_current_key(temp_data_dir):
+    """Test that only model and lock files for other keys are removed."""
+    names = ["word-old.bin", "char-old.bin", "old.lock", "word-new.bin", "new.lock"]
+    for name in names:
+        (temp_data_dir / name).touch()
+
+    remove_stale(temp_data_dir, "new")
+
+    assert sorted(p.name for p in temp_data_dir.iterdir()) == [
+        "new.lock",
+        "word-new.bin",
+    ]
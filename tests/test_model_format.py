@@ -0,0 +1,96 @@
+"""Tests for the binary model file format."""
+
+from array import array
+
+import numpy as np
+import pytest
+
+from model_format import ModelFile, ModelFormatError, TokenTable, write_model
+
+
+def test_model_file_round_trip(temp_data_dir):
+    """Test that every section type reads back unchanged."""
+    path = temp_data_dir / "model.bin"
+    digest = write_model(
+        path,
+        "test",
+        {"order": 3},
+        {
+            "ints": array("i", [-1, 0, 7]),
+            "counts": np.array([1, 2, 3], dtype=np.uint64),
+            "weights": np.array([0.5, 1.5]),
+            "text": "Derby Queen ⭐",
+            "raw": b"\x00\x01",
+        },
+    )
+
+    model_file = ModelFile(path)
+
+    assert model_file.kind == "test"
+    assert model_file.digest == digest
+    assert model_file.meta == {"order": 3}
+    assert list(model_file.view("ints")) == [-1, 0, 7]
+    assert model_file.array("counts").tolist() == [1, 2, 3]
+    assert model_file.array("weights").tolist() == [0.5, 1.5]
+    assert model_file.text("text") == "Derby Queen ⭐"
+    assert bytes(model_file.view("raw")) == b"\x00\x01"
+    assert "missing" not in model_file
+
+
+def test_model_file_sections_are_aligned(temp_data_dir):
+    """Test that sections start on 8-byte boundaries for zero-copy casts."""
+    path = temp_data_dir / "model.bin"
+    write_model(path, "test", {}, {"odd": b"abc", "wide": array("Q", [1, 2])})
+
+    model_file = ModelFile(path)
+
+    assert list(model_file.view("wide")) == [1, 2]
+
+
+def test_model_file_rejects_bad_files(temp_data_dir):
+    """Test that empty, foreign and wrong-version files are rejected."""
+    empty = temp_data_dir / "empty.bin"
+    empty.write_bytes(b"")
+    with pytest.raises(ModelFormatError):
+        ModelFile(empty)
+
+    foreign = temp_data_dir / "foreign.bin"
+    foreign.write_bytes(b"not a model file at all")
+    with pytest.raises(ModelFormatError):
+        ModelFile(foreign)
+
+    path = temp_data_dir / "model.bin"
+    write_model(path, "test", {}, {})
+    data = bytearray(path.read_bytes())
+    data[8] = 99  # version field
+    path.write_bytes(bytes(data))
+    with pytest.raises(ModelFormatError):
+        ModelFile(path)
+
+
+def test_token_table_decodes_lazily(temp_data_dir):
+    """Test that packed tokens decode by index."""
+    tokens = ["___BEGIN__", "___END__", "Slam", "Bam", "Ácida"]
+    offsets, data = TokenTable.pack(tokens)
+    path = temp_data_dir / "tokens.bin"
+    write_model(path, "test", {}, {"offsets": offsets, "data": data})
+
+    model_file = ModelFile(path)
+    table = TokenTable(model_file.view("offsets"), model_file.view("data"))
+
+    assert len(table) == len(tokens)
+    assert table[4] == "Ácida"
+    assert list(table) == tokens
+
+
+def test_model_file_digest_tracks_content(temp_data_dir):
+    """Test that the digest is stable for equal content and changes with it."""
+    path = temp_data_dir / "model.bin"
+    sections = {"ints": array("i", [1, 2, 3])}
+
+    first = write_model(path, "test", {}, sections)
+    again = write_model(path, "test", {}, sections)
+    changed = write_model(path, "test", {}, {"ints": array("i", [1, 2, 4])})
+
+    assert first == again
+    assert first != changed
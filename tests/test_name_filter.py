@@ -0,0 +1,39 @@
+"""Tests for the saved-name Bloom filter."""
+
+import pytest
+
+from name_filter import NameFilter
+
+
+def test_added_names_are_always_found():
+    """Test that the filter has no false negatives, even across layers."""
+    names = [f"Name {i}" for i in range(5000)]
+    name_filter = NameFilter(capacity=1000, error_rate=0.01)
+    name_filter.update(names[:4000])
+    for name in names[4000:]:
+        name_filter.add(name)
+
+    assert len(name_filter) == 5000
+    assert name_filter.stats()["layers"] > 1
+    assert all(name in name_filter for name in names)
+    assert name_filter.contains_many(names).all()
+
+
+def test_false_positive_rate_is_bounded():
+    """Test that unseen names are rarely reported as saved."""
+    name_filter = NameFilter(capacity=10_000, error_rate=0.01)
+    name_filter.update(f"Saved {i}" for i in range(10_000))
+
+    unseen = [f"Unseen {i}" for i in range(20_000)]
+    rate = name_filter.contains_many(unseen).mean()
+
+    assert rate < 0.02
+    assert rate == sum(name in name_filter for name in unseen) / len(unseen)
+
+
+def test_invalid_parameters():
+    """Test that impossible sizes and error rates are rejected."""
+    with pytest.raises(ValueError):
+        NameFilter(capacity=0)
+    with pytest.raises(ValueError):
+        NameFilter(error_rate=1.0)
@@ -0,0 +1,89 @@
+"""Tests for the pre-generated name pool."""
+
+import itertools
+import time
+
+import pytest
+
+from name_pool import NamePool
+
+
+def counting_generator():
+    """Return a generate_many stand-in producing unique names."""
+    counter = itertools.count()
+
+    def generate_many(count):
+        return [f"Name {next(counter)}" for _ in range(count)]
+
+    return generate_many
+
+
+def wait_for(condition, timeout=5.0):
+    """Poll until condition() is true or the timeout expires."""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("Timed out waiting for condition")
+        time.sleep(0.01)
+
+
+def test_empty_pool_counts_miss():
+    """Test that an unstarted pool misses and lets callers generate inline."""
+    pool = NamePool(counting_generator(), low_watermark=1, high_watermark=5)
+
+    assert pool.get() is None
+    assert pool.stats()["misses"] == 1
+    assert pool.stats()["hits"] == 0
+
+
+def test_pool_fills_to_high_watermark():
+    """Test that starting the pool fills it in the background."""
+    pool = NamePool(counting_generator(), low_watermark=2, high_watermark=10)
+    pool.start()
+    try:
+        wait_for(lambda: len(pool) == 10)
+        assert pool.get() == "Name 0"
+        assert pool.stats()["hits"] == 1
+    finally:
+        pool.stop()
+
+
+def test_pool_refills_below_low_watermark():
+    """Test that draining below the low watermark triggers a refill."""
+    pool = NamePool(
+        counting_generator(), low_watermark=3, high_watermark=6, batch_size=2
+    )
+    pool.start()
+    try:
+        wait_for(lambda: len(pool) == 6)
+        names = [pool.get() for _ in range(5)]
+        assert len(set(names)) == 5
+        wait_for(lambda: len(pool) == 6)
+    finally:
+        pool.stop()
+
+
+def test_pool_survives_generator_errors():
+    """Test that a failing refill doesn't kill the refill thread."""
+    calls = []
+
+    def flaky(count):
+        calls.append(count)
+        if len(calls) == 1:
+            raise RuntimeError("boom")
+        return ["Recovered"] * count
+
+    pool = NamePool(flaky, low_watermark=0, high_watermark=2)
+    pool.start()
+    try:
+        wait_for(lambda: len(calls) == 1)
+        assert pool.get() is None  # miss signals another refill
+        wait_for(lambda: len(pool) == 2)
+    finally:
+        pool.stop()
+
+
+def test_pool_validates_watermarks():
+    """Test that the low watermark must be below the high watermark."""
+    with pytest.raises(ValueError):
+        NamePool(counting_generator(), low_watermark=10, high_watermark=10)
@@ -0,0 +1,62 @@
+"""Tests for the novelty index."""
+
+import random
+
+import markovify
+
+from markov_chain import CompiledText
+from novelty import NoveltyIndex
+
+
+def test_novelty_index_matches_substring_search(sample_derby_names):
+    """Test that lookups agree with a plain substring scan."""
+    text = " ".join(sample_derby_names.splitlines())
+    index = NoveltyIndex.build(text)
+
+    rng = random.Random(0)
+    for _ in range(500):
+        start = rng.randrange(len(text))
+        pattern = text[start : start + rng.randint(1, 12)]
+        assert pattern in index
+        altered = pattern + rng.choice("xyz! Q")
+        assert (altered in index) == (altered in text)
+
+
+def test_novelty_index_handles_repeats_and_empty_text():
+    """Test repetitive text and the empty corner cases."""
+    index = NoveltyIndex.build("abababab")
+
+    assert "babab" in index
+    assert "abba" not in index
+    assert "" in index
+    assert "x" not in NoveltyIndex.build("")
+
+
+def test_novelty_index_folds_pending_text():
+    """Test that folding sorts pending text in and keeps text added since."""
+    index = NoveltyIndex.build("Roller Girl")
+    index.add("Derby Queen")
+    folded = index.folded()
+    index.add("Slam Bam")
+
+    index.adopt(folded)
+
+    assert index.text == "Roller Girl\nDerby Queen"
+    assert len(index.suffix_array) == len(index.text)
+    assert index.pending == "Slam Bam"
+    assert "Girl\nDerby" in index
+    assert "Slam Bam" in index
+    assert "Girl\nSlam" not in index
+
+
+def test_compiled_text_matches_markovify_rejections(sample_derby_names):
+    """Test that the indexed novelty test keeps markovify's semantics."""
+    text_model = markovify.NewlineText(sample_derby_names, state_size=1)
+    compiled = CompiledText.from_markovify(text_model)
+
+    rng = random.Random(3)
+    for _ in range(200):
+        words = compiled.chain.walk(rng)
+        assert compiled.test_sentence_output(
+            words, 0.7, 15
+        ) == text_model.test_sentence_output(words, 0.7, 15)
@@ -0,0 +1,49 @@
+"""Tests for process-pool name generation."""
+
+import pytest
+
+from generator import DerbyNameGenerator, get_generator
+from parallel import ParallelGenerator
+
+
+@pytest.fixture(name="parallel_generator", scope="module")
+def parallel_generator_fixture():
+    """Start a two-worker pool once the models exist on disk."""
+    get_generator()
+    parallel = ParallelGenerator(workers=2)
+    yield parallel
+    parallel.shutdown()
+
+
+def test_parallel_generate_many_returns_unique_names(parallel_generator):
+    """Test that chunks from all workers are merged without duplicates."""
+    names = parallel_generator.generate_many(40)
+
+    assert len(names) == 40
+    assert len(set(names)) == 40
+    assert all(isinstance(name, str) and name for name in names)
+
+
+def test_parallel_workers_use_distinct_seeds(parallel_generator):
+    """Test that two batches don't repeat each other."""
+    first = parallel_generator.generate_many(16)
+    second = parallel_generator.generate_many(16)
+
+    assert first != second
+
+
+def test_generator_delegates_batches_to_parallel(parallel_generator):
+    """Test that generate_many() uses the process pool when enabled."""
+    gen = DerbyNameGenerator(seed=1)
+    gen.parallel = parallel_generator
+
+    assert len(gen.generate_many(10)) == 10
+
+
+def test_seeded_generators_are_reproducible():
+    """Test that equal seeds give equal name sequences."""
+    first = DerbyNameGenerator(seed=123)
+    second = DerbyNameGenerator(seed=123)
+
+    assert [first.generate() for _ in range(5)] == [second.generate() for _ in range(5)]
+    assert first.generate_many(10) == second.generate_many(10)
@@ -0,0 +1,73 @@
+"""Tests for the FTS5 name search index."""
+
+from sqlalchemy import text
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from models import DerbyName
+from search import create_search_index, index_corpus, match_expression
+
+
+def indexed_ids(engine, query: str) -> list[int]:
+    """Return the rowids the saved-name index matches for a raw query."""
+    with engine.connect() as conn:
+        rows = conn.execute(
+            text("SELECT rowid FROM derbyname_fts WHERE derbyname_fts MATCH :q"),
+            {"q": query},
+        )
+        return sorted(row[0] for row in rows)
+
+
+def test_match_expression_prefixes_every_word():
+    """Test that free text becomes a prefix query with operators stripped."""
+    assert match_expression("rol de") == '"rol"* "de"*'
+    assert match_expression('Smack" OR NEAR(x') == '"Smack"* "OR"* "NEAR"* "x"*'
+    assert match_expression(" *-\"' ") is None
+
+
+def test_triggers_keep_index_in_sync(test_engine, test_session):
+    """Test that inserts, renames and deletes reach the search index."""
+    name = DerbyName(name="Roller Coaster")
+    test_session.add(name)
+    test_session.commit()
+    assert indexed_ids(test_engine, '"coast"*') == [name.id]
+
+    name.name = "Jammer Jane"
+    test_session.add(name)
+    test_session.commit()
+    assert indexed_ids(test_engine, '"coast"*') == []
+    assert indexed_ids(test_engine, '"jam"*') == [name.id]
+
+    test_session.delete(name)
+    test_session.commit()
+    assert indexed_ids(test_engine, '"jam"*') == []
+
+
+def test_create_search_index_indexes_existing_names():
+    """Test that adding search to a populated database indexes its names."""
+    engine = create_engine("sqlite:///:memory:")
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add(DerbyName(name="Existing Skater"))
+        session.commit()
+
+    with engine.begin() as conn:
+        create_search_index(conn)
+        create_search_index(conn)
+
+    with Session(engine) as session:
+        name_id = session.exec(select(DerbyName.id)).one()
+    assert indexed_ids(engine, '"skat"*') == [name_id]
+    engine.dispose()
+
+
+def test_index_corpus_skips_unchanged_corpus(test_engine):
+    """Test that the corpus is reindexed only when it changes."""
+    with test_engine.begin() as conn:
+        index_corpus(conn, ["Roller Girl", "Pain Train"])
+        conn.exec_driver_sql("DELETE FROM corpus_fts WHERE name = 'Pain Train'")
+        # Same corpus: the (now tampered) index is left alone
+        index_corpus(conn, ["Roller Girl", "Pain Train"])
+        assert conn.exec_driver_sql("SELECT count(*) FROM corpus_fts").scalar() == 1
+
+        index_corpus(conn, ["Roller Girl", "Pain Train", "Slam Bam"])
+        assert conn.exec_driver_sql("SELECT count(*) FROM corpus_fts").scalar() == 3
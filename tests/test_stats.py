@@ -0,0 +1,68 @@
+"""Tests for the trigger-maintained name statistics."""
+
+from datetime import date, datetime
+
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from models import DailyNameStats, DerbyName, NameStats
+from stats import create_stats_triggers
+
+
+def read_counts(session: Session) -> tuple[int, int, dict]:
+    """Return (total, favorites, {day: (created, favorites)})."""
+    session.expire_all()
+    totals = session.get(NameStats, 1)
+    daily = {
+        row.day: (row.created, row.favorites)
+        for row in session.exec(select(DailyNameStats)).all()
+    }
+    return totals.total, totals.favorites, daily
+
+
+def test_triggers_track_inserts_deletes_and_favorites(test_session):
+    """Test that every write path updates the counters and the rollup."""
+    monday = datetime(2024, 3, 4, 12, 30)
+    tuesday = datetime(2024, 3, 5, 8, 0)
+    names = [
+        DerbyName(name="Monday One", created_at=monday),
+        DerbyName(name="Monday Two", created_at=monday, is_favorite=True),
+        DerbyName(name="Tuesday One", created_at=tuesday),
+    ]
+    test_session.add_all(names)
+    test_session.commit()
+    assert read_counts(test_session) == (
+        3,
+        1,
+        {date(2024, 3, 4): (2, 1), date(2024, 3, 5): (1, 0)},
+    )
+
+    names[2].is_favorite = True
+    test_session.add(names[2])
+    test_session.delete(names[1])
+    test_session.commit()
+
+    assert read_counts(test_session) == (
+        2,
+        1,
+        {date(2024, 3, 4): (1, 0), date(2024, 3, 5): (1, 1)},
+    )
+
+
+def test_create_stats_triggers_seeds_existing_names():
+    """Test that adding stats to a populated database counts its names once."""
+    engine = create_engine("sqlite:///:memory:")
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add(DerbyName(name="Old Name", created_at=datetime(2024, 1, 2)))
+        session.add(DerbyName(name="Old Fave", is_favorite=True))
+        session.commit()
+
+    with engine.begin() as conn:
+        create_stats_triggers(conn)
+        create_stats_triggers(conn)
+
+    with Session(engine) as session:
+        total, favorites, daily = read_counts(session)
+    assert (total, favorites) == (2, 1)
+    assert daily[date(2024, 1, 2)] == (1, 0)
+    engine.dispose()
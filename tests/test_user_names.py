@@ -0,0 +1,117 @@
+"""Tests for the per-user saved name store."""
+
+from datetime import datetime
+import json
+
+import pytest
+
+from user_names import UserNameStore, migrate_storage_files
+
+
+@pytest.fixture(name="store")
+def store_fixture(test_engine):
+    """Create a store on the test database."""
+    return UserNameStore(test_engine)
+
+
+def test_add_numbers_names_per_user(store):
+    """Test that each user's ids count up from 1 independently."""
+    first = store.add("alice", "Alice One")
+    second = store.add("alice", "Alice Two")
+    other = store.add("bob", "Bob One")
+
+    assert (first["id"], second["id"], other["id"]) == (1, 2, 1)
+    assert isinstance(first["created_at"], datetime)
+    assert first["is_favorite"] is False
+
+
+def test_list_is_newest_first_and_per_user(store):
+    """Test that listing returns only the user's names, newest first."""
+    store.add("alice", "Old")
+    store.add("bob", "Not Alice's")
+    store.add("alice", "New")
+
+    assert [n["name"] for n in store.list_names("alice")] == ["New", "Old"]
+
+
+def test_ids_are_not_reused_after_delete(store):
+    """Test that deleting a name never frees an id still below the max."""
+    store.add("alice", "One")
+    store.add("alice", "Two")
+    store.add("alice", "Three")
+
+    assert store.delete("alice", 2)
+    assert store.add("alice", "Four")["id"] == 4
+    assert not store.delete("alice", 2)
+    assert not store.delete("bob", 1)
+
+
+def test_newest_id_is_not_reused_after_delete(store):
+    """Test that deleting the newest name doesn't hand its id out again."""
+    store.add("alice", "A")
+    store.add("alice", "B")
+
+    assert store.delete("alice", 2)
+    assert store.add("alice", "C")["id"] == 3
+    # Importing over an emptied list still counts past every old id
+    assert store.delete("alice", 1) and store.delete("alice", 3)
+    store.import_names("alice", [{"name": "D"}])
+    assert store.list_names("alice")[0]["id"] == 4
+    assert store.add("alice", "E")["id"] == 5
+
+
+def test_toggle_favorite(store):
+    """Test that favoriting flips one user's name only."""
+    store.add("alice", "Shared Id")
+    store.add("bob", "Shared Id")
+
+    assert store.toggle_favorite("alice", 1)["is_favorite"] is True
+    assert store.toggle_favorite("alice", 1)["is_favorite"] is False
+    assert store.toggle_favorite("alice", 99) is None
+    assert store.list_names("bob")[0]["is_favorite"] is False
+
+
+def test_migrate_storage_files(store, tmp_path):
+    """Test that storage lists move into the store and out of the files."""
+    user_file = tmp_path / "storage-user-abc.json"
+    user_file.write_text(
+        json.dumps(
+            {
+                "saved_names": [
+                    {
+                        "name": "First",
+                        "created_at": "2026-01-20T21:38:39.892994",
+                        "is_favorite": False,
+                        "id": 4,
+                    },
+                    {
+                        "name": "Second",
+                        "created_at": "2026-01-20T22:41:44+01:00",
+                        "is_favorite": True,
+                        "id": 4,
+                    },
+                ],
+                "theme": "dark",
+            }
+        )
+    )
+    theme_only = tmp_path / "storage-user-def.json"
+    theme_only.write_text('{"theme": "auto"}')
+
+    assert migrate_storage_files(store, tmp_path) == 2
+    assert migrate_storage_files(store, tmp_path) == 0
+
+    names = store.list_names("abc")
+    assert [(n["id"], n["name"]) for n in names] == [(2, "Second"), (1, "First")]
+    assert names[0]["is_favorite"] is True
+    assert names[0]["created_at"] == datetime(2026, 1, 20, 21, 41, 44)
+    assert json.loads(user_file.read_text()) == {"theme": "dark"}
+    assert theme_only.read_text() == '{"theme": "auto"}'
+
+
+def test_import_skips_users_with_names(store):
+    """Test that importing for a user who already has names does nothing."""
+    store.add("alice", "Existing")
+
+    assert store.import_names("alice", [{"name": "Old"}]) == 0
+    assert [n["name"] for n in store.list_names("alice")] == ["Existing"]
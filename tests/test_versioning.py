@@ -0,0 +1,80 @@
+"""Tests for table versions and conditional GET validators."""
+
+from datetime import datetime, timezone
+
+from sqlmodel import select
+
+from models import DerbyName, TableVersion
+from versioning import is_not_modified, validators
+
+VERSION = TableVersion(
+    table_name="derbyname", version=7, modified_at=datetime(2024, 5, 1, 12)
+)
+HEADERS = validators(VERSION)
+
+
+def test_validators_format():
+    """Test the ETag and HTTP-date Last-Modified headers."""
+    assert HEADERS == {
+        "ETag": 'W/"derbyname-7"',
+        "Last-Modified": "Wed, 01 May 2024 12:00:00 GMT",
+    }
+
+
+def test_if_none_match_compares_weakly():
+    """Test that If-None-Match matches with or without the weak prefix."""
+    assert is_not_modified(HEADERS, 'W/"derbyname-7"', None)
+    assert is_not_modified(HEADERS, '"other", "derbyname-7"', None)
+    assert is_not_modified(HEADERS, "*", None)
+    assert not is_not_modified(HEADERS, 'W/"derbyname-6"', None)
+
+
+def test_if_none_match_takes_precedence():
+    """Test that a stale ETag wins over a fresh If-Modified-Since."""
+    fresh = "Thu, 02 May 2024 00:00:00 GMT"
+
+    assert is_not_modified(HEADERS, None, fresh)
+    assert not is_not_modified(HEADERS, 'W/"derbyname-6"', fresh)
+
+
+def test_if_modified_since():
+    """Test date comparison, including unparseable dates."""
+    assert is_not_modified(HEADERS, None, "Wed, 01 May 2024 12:00:00 GMT")
+    assert not is_not_modified(HEADERS, None, "Wed, 01 May 2024 11:59:59 GMT")
+    assert not is_not_modified(HEADERS, None, "not a date")
+    assert not is_not_modified(HEADERS, None, None)
+
+
+def test_last_modified_waits_for_its_second_to_pass():
+    """Test that a date a later write could still share is never offered."""
+    same_second = datetime(2024, 5, 1, 12, 0, 0, 900000, tzinfo=timezone.utc)
+    next_second = datetime(2024, 5, 1, 12, 0, 1, tzinfo=timezone.utc)
+
+    recent = validators(VERSION, now=same_second)
+
+    assert recent == {"ETag": 'W/"derbyname-7"'}
+    assert not is_not_modified(recent, None, "Wed, 01 May 2024 12:00:00 GMT")
+    assert validators(VERSION, now=next_second) == HEADERS
+
+
+def test_writes_bump_version(test_session):
+    """Test that inserts, updates and deletes each bump the version."""
+
+    def version():
+        test_session.expire_all()
+        return test_session.get(TableVersion, "derbyname").version
+
+    start = version()
+    name = DerbyName(name="Versioned")
+    test_session.add(name)
+    test_session.commit()
+    assert version() == start + 1
+
+    name.is_favorite = True
+    test_session.add(name)
+    test_session.commit()
+    assert version() == start + 2
+
+    test_session.delete(test_session.exec(select(DerbyName)).one())
+    test_session.commit()
+    assert version() == start + 3
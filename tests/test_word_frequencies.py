@@ -0,0 +1,117 @@
+"""Tests for word counts read from the full-text index term lists."""
+
+import asyncio
+
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from models import DerbyName
+from word_frequencies import (
+    WORD_SIZES,
+    create_word_frequency_index,
+    read_word_frequencies,
+    size_buckets,
+)
+from wordcloud_generator import FAVORITE_WEIGHT
+
+
+def read_weights(async_engine, limit=100) -> dict[str, int]:
+    """Return {text: weight} for the top words."""
+
+    async def read():
+        async with AsyncSession(async_engine) as session:
+            return await read_word_frequencies(session, limit)
+
+    return {word["text"]: word["weight"] for word in asyncio.run(read())}
+
+
+def test_weights_follow_inserts_favorites_and_deletes(test_session, test_async_engine):
+    """Test that every write path keeps the favorite boost current."""
+    names = [
+        DerbyName(name="Roller Queen"),
+        DerbyName(name="Roller Crusher", is_favorite=True),
+        DerbyName(name="Crème Brûlée"),
+    ]
+    test_session.add_all(names)
+    test_session.commit()
+
+    weights = read_weights(test_async_engine)
+    assert weights["Roller"] == 2 + FAVORITE_WEIGHT
+    assert weights["Crusher"] == 1 + FAVORITE_WEIGHT
+    assert weights["Queen"] == 1
+    # Words are counted case- and accent-folded
+    assert weights["Creme"] == 1
+
+    names[0].is_favorite = True
+    names[1].is_favorite = False
+    test_session.add_all(names[:2])
+    test_session.commit()
+    weights = read_weights(test_async_engine)
+    assert weights["Queen"] == 1 + FAVORITE_WEIGHT
+    assert weights["Crusher"] == 1
+
+    test_session.delete(names[0])
+    test_session.commit()
+    weights = read_weights(test_async_engine)
+    assert "Queen" not in weights
+    assert weights["Roller"] == 1
+
+
+def test_top_words_are_limited_and_sized(test_session, test_async_engine):
+    """Test that only the heaviest words are returned, largest first."""
+    test_session.add_all(
+        [DerbyName(name=f"Jammer {i}") for i in range(5)]
+        + [DerbyName(name="Blocker Jammer", is_favorite=True)]
+    )
+    test_session.commit()
+
+    async def read():
+        async with AsyncSession(test_async_engine) as session:
+            return await read_word_frequencies(session, 2)
+
+    words = asyncio.run(read())
+
+    assert [word["text"] for word in words] == ["Jammer", "Blocker"]
+    assert words[0]["size"] == WORD_SIZES[-1]
+    assert words[1]["size"] == WORD_SIZES[0]
+
+
+def test_stopwords_and_fragments_never_make_the_top(test_session, test_async_engine):
+    """Test that common words and initials are skipped before the limit."""
+    test_session.add_all(
+        [DerbyName(name=f"The Queen of {word} A") for word in ("Pain", "Doom")]
+        + [DerbyName(name="The O'Malley Jammer", is_favorite=True)]
+    )
+    test_session.commit()
+
+    async def read():
+        async with AsyncSession(test_async_engine) as session:
+            return await read_word_frequencies(session, 3)
+
+    words = [word["text"] for word in asyncio.run(read())]
+
+    assert words == ["Jammer", "Malley", "Queen"]
+
+
+def test_size_buckets():
+    """Test that weights spread over the sizes on a log scale."""
+    assert size_buckets([]) == []
+    assert size_buckets([3, 3]) == [WORD_SIZES[2]] * 2
+    assert size_buckets([100, 10, 1]) == [WORD_SIZES[-1], WORD_SIZES[2], WORD_SIZES[0]]
+
+
+def test_index_is_built_from_existing_favorites(test_engine, test_async_engine):
+    """Test that a database from before the index gets its favorites indexed."""
+    with test_engine.begin() as conn:
+        for event in ("insert", "delete", "update"):
+            conn.exec_driver_sql(f"DROP TRIGGER derbyname_favorite_fts_{event}")
+        conn.exec_driver_sql("DROP TABLE derbyname_favorite_words")
+        conn.exec_driver_sql("DROP TABLE derbyname_favorite_fts")
+        conn.exec_driver_sql(
+            "INSERT INTO derbyname (name, created_at, is_favorite) "
+            "VALUES ('Old Favorite', '2024-01-01 00:00:00', 1)"
+        )
+        create_word_frequency_index(conn)
+        # Running again on every start changes nothing
+        create_word_frequency_index(conn)
+
+    assert read_weights(test_async_engine)["Favorite"] == 1 + FAVORITE_WEIGHT
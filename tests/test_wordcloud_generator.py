@@ -0,0 +1,109 @@
+"""Tests for cached word cloud rendering."""
+
+import asyncio
+import threading
+
+import pytest
+
+import wordcloud_generator
+from wordcloud_generator import WordCloudRenderer, wordcloud_text
+
+
+@pytest.fixture(name="fake_render")
+def fake_render_fixture(monkeypatch):
+    """Replace the layout with a cheap stand-in that records its calls."""
+    calls = []
+    release = threading.Event()
+    release.set()
+
+    def render_png(text, width, height):
+        release.wait(5)
+        calls.append((text, width, height))
+        return f"{text}@{width}x{height}".encode()
+
+    monkeypatch.setattr(wordcloud_generator, "render_png", render_png)
+    render_png.calls = calls
+    render_png.release = release
+    return render_png
+
+
+def test_wordcloud_text_weights_favorites():
+    """Test that favorites are repeated and an empty list gets placeholders."""
+    text = wordcloud_text([{"name": "Plain"}, {"name": "Loved", "is_favorite": True}])
+
+    assert text.split().count("Loved") == 1 + wordcloud_generator.FAVORITE_WEIGHT
+    assert text.split().count("Plain") == 1
+    assert wordcloud_text([]) == " ".join(wordcloud_generator.PLACEHOLDER_WORDS)
+
+
+def test_render_is_cached_by_key(fake_render):
+    """Test that a key is rendered once and then served from the cache."""
+    renderer = WordCloudRenderer(workers=0)
+
+    async def render_twice():
+        first = await renderer.render(("v1", 10, 5), "a", 10, 5)
+        second = await renderer.render(("v1", 10, 5), "ignored", 10, 5)
+        return first, second
+
+    first, second = asyncio.run(render_twice())
+
+    assert first == second == b"a@10x5"
+    assert len(fake_render.calls) == 1
+    assert renderer.cached(("v1", 10, 5)) == b"a@10x5"
+    renderer.shutdown()
+
+
+def test_concurrent_requests_share_a_render(fake_render):
+    """Test that requests for a render in progress wait on the same one."""
+    renderer = WordCloudRenderer(workers=0)
+    fake_render.release.clear()
+
+    async def render_together():
+        futures = [renderer.render(("v1", 10, 5), "a", 10, 5) for _ in range(3)]
+        assert renderer.stats()["pending"] == 1
+        fake_render.release.set()
+        return await asyncio.gather(*futures)
+
+    assert asyncio.run(render_together()) == [b"a@10x5"] * 3
+    assert renderer.stats() == {"cached": 1, "pending": 0, "renders": 1}
+    renderer.shutdown()
+
+
+def test_cache_evicts_least_recently_used(fake_render):
+    """Test that the cache holds at most cache_size renders."""
+    renderer = WordCloudRenderer(workers=0, cache_size=2)
+
+    async def render_all():
+        await renderer.render(("v1",), "a", 1, 1)
+        await renderer.render(("v2",), "b", 1, 1)
+        renderer.cached(("v1",))
+        await renderer.render(("v3",), "c", 1, 1)
+
+    asyncio.run(render_all())
+
+    assert renderer.cached(("v1",)) is not None
+    assert renderer.cached(("v2",)) is None
+    assert renderer.cached(("v3",)) is not None
+    renderer.shutdown()
+
+
+def test_unkeyed_renders_are_not_cached(fake_render):
+    """Test that renders without a key are neither cached nor shared."""
+    renderer = WordCloudRenderer(workers=0)
+
+    async def render_twice():
+        await renderer.render(None, "a", 10, 5)
+        await renderer.render(None, "a", 10, 5)
+
+    asyncio.run(render_twice())
+
+    assert len(fake_render.calls) == 2
+    assert renderer.stats() == {"cached": 0, "pending": 0, "renders": 2}
+    renderer.shutdown()
+
+
+def test_render_png_draws_an_image():
+    """Test that the real layout produces a PNG."""
+    png = wordcloud_generator.render_png("Roller Derby Queen", 200, 100)
+
+    assert png.startswith(b"\x89PNG")
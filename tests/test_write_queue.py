@@ -0,0 +1,110 @@
+"""Tests for the group-commit write queue."""
+
+import asyncio
+
+import pytest
+from sqlmodel import Session, select
+
+from models import DerbyName
+from write_queue import WriteQueue
+
+
+def test_concurrent_inserts_share_one_commit(test_async_engine):
+    """Test that a burst of inserts is flushed in one transaction."""
+    queue = WriteQueue(test_async_engine, max_batch=64, max_delay=0.05)
+
+    async def burst():
+        rows = await asyncio.gather(*(queue.insert(f"Name {i}") for i in range(20)))
+        await queue.close()
+        return rows
+
+    rows = asyncio.run(burst())
+
+    assert [row.name for row in rows] == [f"Name {i}" for i in range(20)]
+    assert len({row.id for row in rows}) == 20
+    assert queue.flushes == 1
+    assert queue.stats()["rows"] == 20
+
+
+def test_max_batch_splits_flushes(test_async_engine):
+    """Test that a flush never holds more than max_batch rows."""
+    queue = WriteQueue(test_async_engine, max_batch=8, max_delay=0.05)
+
+    async def burst():
+        await asyncio.gather(*(queue.insert(f"Name {i}") for i in range(20)))
+        await queue.close()
+
+    asyncio.run(burst())
+
+    assert queue.flushes == 3
+    assert queue.rows == 20
+
+
+def test_duplicate_is_ignored_for_its_caller_only(test_async_engine, test_engine):
+    """Test that a clashing name returns None without failing its batch."""
+    queue = WriteQueue(test_async_engine, max_delay=0.05)
+
+    async def burst():
+        results = await asyncio.gather(
+            queue.insert("First"),
+            queue.insert("Taken"),
+            queue.insert("Taken"),
+            queue.insert("Last"),
+        )
+        await queue.close()
+        return results
+
+    results = asyncio.run(burst())
+
+    assert results[2] is None
+    assert [results[i].name for i in (0, 1, 3)] == ["First", "Taken", "Last"]
+    with Session(test_engine) as session:
+        names = session.exec(select(DerbyName.name)).all()
+    assert sorted(names) == ["First", "Last", "Taken"]
+
+
+def test_insert_many_skips_saved_names(test_async_engine, test_session):
+    """Test that a batch insert returns rows only for new names."""
+    test_session.add(DerbyName(name="Already Saved"))
+    test_session.commit()
+    queue = WriteQueue(test_async_engine)
+
+    rows = asyncio.run(queue.insert_many(["New One", "Already Saved", "New Two"]))
+
+    assert [row.name for row in rows] == ["New One", "New Two"]
+    assert "Already Saved" in queue.saved
+
+
+def test_load_saved_names_fills_filter(test_async_engine, test_session):
+    """Test that the filter is rebuilt from the table."""
+    test_session.add(DerbyName(name="Stored Name"))
+    test_session.commit()
+    queue = WriteQueue(test_async_engine)
+
+    asyncio.run(queue.load_saved_names())
+
+    assert "Stored Name" in queue.saved
+    assert "Unknown Name" not in queue.saved
+
+
+def test_close_flushes_pending_inserts(test_async_engine, test_engine):
+    """Test that closing the queue commits names queued before it."""
+    queue = WriteQueue(test_async_engine, max_delay=10.0)
+
+    async def queue_then_close():
+        pending = asyncio.ensure_future(queue.insert("Queued Name"))
+        await asyncio.sleep(0)
+        await queue.close()
+        return await pending
+
+    row = asyncio.run(queue_then_close())
+
+    assert row.id is not None
+    with Session(test_engine) as session:
+        assert session.get(DerbyName, row.id).name == "Queued Name"
+
+
+def test_invalid_batch_size():
+    """Test that an empty batch size is rejected."""
+    with pytest.raises(ValueError):
+        WriteQueue(None, max_batch=0)
@@ -0,0 +1,188 @@
+"""Names each UI user has saved, in an indexed table keyed by (user_id, id)."""
+
+from datetime import datetime, timezone
+import json
+import os
+from pathlib import Path
+from typing import Optional
+
+from sqlalchemy import Engine, bindparam, delete, func, insert, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlmodel import select
+
+from models import UserName, UserNameSeq
+
+# NiceGUI names each user's storage file after the browser session id
+STORAGE_FILE_PREFIX = "storage-user-"
+# The storage key that held every saved name as one list
+STORAGE_KEY = "saved_names"
+
+
+def _as_dict(row) -> dict:
+    return {
+        "id": row.id,
+        "name": row.name,
+        "created_at": row.created_at,
+        "is_favorite": row.is_favorite,
+    }
+
+
+class UserNameStore:
+    """
+    Saved names per user, one row each.
+
+    Every operation is a primary-key lookup or range scan, so saving,
+    deleting or favoriting one name writes one row, plus the user's id
+    counter when saving, however many names the user has. Ids are numbered
+    per user and never reused, even after a delete.
+    """
+
+    def __init__(self, engine: Engine):
+        self.engine = engine
+
+    def list_names(self, user_id: str) -> list[dict]:
+        """Return a user's names, newest first."""
+        statement = (
+            select(UserName)
+            .where(UserName.user_id == user_id)
+            .order_by(UserName.id.desc())
+        )
+        with self.engine.connect() as conn:
+            return [_as_dict(row) for row in conn.execute(statement)]
+
+    def add(self, user_id: str, name: str) -> dict:
+        """Save a name for a user and return it with its new id."""
+        # A user's first id follows any names saved before the counter
+        # existed; after that the counter only goes up, even past deletes
+        first_id = (
+            select(func.coalesce(func.max(UserName.id), 0) + 1)
+            .where(UserName.user_id == user_id)
+            .scalar_subquery()
+        )
+        bump = sqlite_insert(UserNameSeq).values(user_id=user_id, last_id=first_id)
+        bump = bump.on_conflict_do_update(
+            index_elements=[UserNameSeq.user_id],
+            set_={"last_id": UserNameSeq.last_id + 1},
+        ).returning(UserNameSeq.last_id)
+        statement = (
+            insert(UserName)
+            .values(
+                user_id=user_id,
+                id=bindparam("next_id"),
+                name=name,
+                created_at=datetime.utcnow(),
+                is_favorite=False,
+            )
+            .returning(*UserName.__table__.c)
+        )
+        # One transaction, so two tabs can never take the same id
+        with self.engine.begin() as conn:
+            next_id = conn.execute(bump).scalar_one()
+            return _as_dict(conn.execute(statement, {"next_id": next_id}).one())
+
+    def delete(self, user_id: str, name_id: int) -> bool:
+        """Delete one of a user's names; False if it didn't exist."""
+        statement = delete(UserName).where(
+            UserName.user_id == user_id, UserName.id == name_id
+        )
+        with self.engine.begin() as conn:
+            return conn.execute(statement).rowcount > 0
+
+    def toggle_favorite(self, user_id: str, name_id: int) -> Optional[dict]:
+        """Flip a name's favorite flag and return it, or None if it doesn't exist."""
+        statement = (
+            update(UserName)
+            .where(UserName.user_id == user_id, UserName.id == name_id)
+            .values(is_favorite=~UserName.is_favorite)
+            .returning(*UserName.__table__.c)
+        )
+        with self.engine.begin() as conn:
+            row = conn.execute(statement).first()
+        return _as_dict(row) if row is not None else None
+
+    def import_names(self, user_id: str, names: list[dict]) -> int:
+        """
+        Save names from a user's old storage list, oldest first.
+
+        Ids are renumbered in list order after any the user was given
+        before, since the old ids could repeat. Users who already have
+        names are skipped, so importing the same list twice is harmless.
+
+        Returns:
+            Number of names imported
+        """
+        if not names:
+            return 0
+        with self.engine.begin() as conn:
+            existing = conn.execute(
+                select(UserName.id).where(UserName.user_id == user_id).limit(1)
+            ).first()
+            if existing is not None:
+                return 0
+            last_id = (
+                conn.execute(
+                    select(UserNameSeq.last_id).where(UserNameSeq.user_id == user_id)
+                ).scalar()
+                or 0
+            )
+            rows = [
+                {
+                    "user_id": user_id,
+                    "id": i,
+                    "name": entry["name"],
+                    "created_at": _parse_created_at(entry.get("created_at")),
+                    "is_favorite": bool(entry.get("is_favorite", False)),
+                }
+                for i, entry in enumerate(names, start=last_id + 1)
+            ]
+            conn.execute(insert(UserName), rows)
+            conn.execute(
+                sqlite_insert(UserNameSeq)
+                .values(user_id=user_id, last_id=last_id + len(rows))
+                .on_conflict_do_update(
+                    index_elements=[UserNameSeq.user_id],
+                    set_={"last_id": last_id + len(rows)},
+                )
+            )
+        return len(rows)
+
+
+def _parse_created_at(value) -> datetime:
+    """Read a stored timestamp as naive UTC; unreadable ones become now."""
+    try:
+        created_at = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return datetime.utcnow()
+    if created_at.tzinfo is not None:
+        created_at = created_at.astimezone(timezone.utc).replace(tzinfo=None)
+    return created_at
+
+
+def migrate_storage_files(store: UserNameStore, directory: Path) -> int:
+    """
+    Move saved names out of NiceGUI user storage files into ``store``.
+
+    Each file's list is imported, then dropped from the file; other keys
+    such as the theme are kept. Files without the list are left alone, so
+    this is a no-op once every file has been migrated.
+
+    Returns:
+        Number of names migrated
+    """
+    migrated = 0
+    for path in sorted(directory.glob(f"{STORAGE_FILE_PREFIX}*.json")):
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            print(f"Skipping unreadable storage file {path.name}: {e}")
+            continue
+        if not isinstance(data, dict) or STORAGE_KEY not in data:
+            continue
+
+        user_id = path.stem.removeprefix(STORAGE_FILE_PREFIX)
+        migrated += store.import_names(user_id, data.pop(STORAGE_KEY) or [])
+        # Replace the file atomically, so a crash leaves the old or new copy
+        tmp_path = path.with_suffix(".json.tmp")
+        tmp_path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp_path, path)
+    return migrated
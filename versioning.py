@@ -0,0 +1,97 @@
+"""Table version counters and the HTTP validators derived from them."""
+
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+
+from sqlalchemy.engine import Connection
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from models import TableVersion
+
+# Tables whose writes bump their version
+VERSIONED_TABLES = ["derbyname"]
+
+_NOW = "strftime('%Y-%m-%d %H:%M:%S', 'now')"
+
+
+def _version_ddl(table: str) -> list[str]:
+    """Return the triggers that bump ``table``'s version on every write."""
+    bump = (
+        f"UPDATE table_version SET version = version + 1, modified_at = {_NOW} "
+        f"WHERE table_name = '{table}'"
+    )
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS {table}_version_{event.lower()} "
+        f"AFTER {event} ON {table} BEGIN {bump}; END"
+        for event in ("INSERT", "UPDATE", "DELETE")
+    ]
+
+
+def create_version_triggers(connection: Connection):
+    """Create the version rows and triggers; safe to run on every start."""
+    for table in VERSIONED_TABLES:
+        connection.exec_driver_sql(
+            "INSERT OR IGNORE INTO table_version (table_name, version, modified_at) "
+            f"VALUES ('{table}', 0, {_NOW})"
+        )
+        for statement in _version_ddl(table):
+            connection.exec_driver_sql(statement)
+
+
+async def read_version(session: AsyncSession, table: str) -> Optional[TableVersion]:
+    """Read a table's version row, a single primary-key lookup; None if missing."""
+    return await session.get(TableVersion, table)
+
+
+def validators(version: TableVersion, now: Optional[datetime] = None) -> dict[str, str]:
+    """
+    Return the ETag and Last-Modified headers for a table version.
+
+    ``modified_at`` has one-second resolution, so a later write in the
+    same second would keep it, and a copy served now could then pass an
+    If-Modified-Since check for data it doesn't hold. Last-Modified is
+    therefore left out until that second has passed; the ETag changes
+    with every write and is always sent.
+
+    Args:
+        version: The table's version row
+        now: Current UTC time; the clock if None
+    """
+    now = now or datetime.now(timezone.utc)
+    headers = {"ETag": f'W/"{version.table_name}-{version.version}"'}
+    modified_at = version.modified_at.replace(tzinfo=timezone.utc)
+    if modified_at < now.replace(microsecond=0):
+        headers["Last-Modified"] = format_datetime(modified_at, usegmt=True)
+    return headers
+
+
+def is_not_modified(
+    headers: dict[str, str],
+    if_none_match: Optional[str],
+    if_modified_since: Optional[str],
+) -> bool:
+    """
+    Decide whether a conditional GET can be answered with 304.
+
+    If-None-Match takes precedence over If-Modified-Since (RFC 9110
+    13.2.2). ETags compare weakly, and an unparseable date is ignored, as
+    is any date while ``validators`` withholds Last-Modified.
+    """
+    if if_none_match is not None:
+        etag = headers["ETag"].removeprefix("W/")
+        candidates = [
+            tag.strip().removeprefix("W/") for tag in if_none_match.split(",")
+        ]
+        return "*" in candidates or etag in candidates
+
+    if if_modified_since is not None and "Last-Modified" in headers:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            return False
+        return parsedate_to_datetime(headers["Last-Modified"]) <= since
+
+    return False
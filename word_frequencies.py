@@ -0,0 +1,134 @@
+"""Weighted word counts over saved names, read from full-text index term lists."""
+
+import functools
+import math
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.engine import Connection
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from search import FTS_OPTIONS
+from wordcloud_generator import FAVORITE_WEIGHT
+
+# Font sizes in pixels, smallest to largest; words are bucketed onto these
+WORD_SIZES = (16, 20, 26, 32, 40)
+# Shorter terms are initials and fragments such as the "o" of "O'Malley"
+MIN_WORD_LENGTH = 2
+
+WORD_FREQUENCY_DDL = [
+    # Favorites get an index of their own, tokenized the same way as
+    # derbyname_fts, so both term lists count the same words. Contentless,
+    # since the names are already stored in derbyname.
+    "CREATE VIRTUAL TABLE IF NOT EXISTS derbyname_favorite_fts USING fts5("
+    f"name, content='', {FTS_OPTIONS})",
+    "CREATE TRIGGER IF NOT EXISTS derbyname_favorite_fts_insert "
+    "AFTER INSERT ON derbyname WHEN new.is_favorite BEGIN "
+    "INSERT INTO derbyname_favorite_fts (rowid, name) VALUES (new.id, new.name); END",
+    "CREATE TRIGGER IF NOT EXISTS derbyname_favorite_fts_delete "
+    "AFTER DELETE ON derbyname WHEN old.is_favorite BEGIN "
+    "INSERT INTO derbyname_favorite_fts (derbyname_favorite_fts, rowid, name) "
+    "VALUES ('delete', old.id, old.name); END",
+    # A contentless index must only be sent deletes for rows it holds
+    "CREATE TRIGGER IF NOT EXISTS derbyname_favorite_fts_update "
+    "AFTER UPDATE OF name, is_favorite ON derbyname BEGIN "
+    "INSERT INTO derbyname_favorite_fts (derbyname_favorite_fts, rowid, name) "
+    "SELECT 'delete', old.id, old.name WHERE old.is_favorite; "
+    "INSERT INTO derbyname_favorite_fts (rowid, name) "
+    "SELECT new.id, new.name WHERE new.is_favorite; END",
+    # One row per distinct word, with the number of names containing it
+    "CREATE VIRTUAL TABLE IF NOT EXISTS derbyname_words "
+    "USING fts5vocab(derbyname_fts, row)",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS derbyname_favorite_words "
+    "USING fts5vocab(derbyname_favorite_fts, row)",
+]
+
+# Stopwords and fragments are dropped before the limit, so it counts real words
+TOP_WORDS_QUERY = text(
+    "SELECT term, sum(weight) AS weight FROM ("
+    "SELECT term, doc AS weight FROM derbyname_words UNION ALL "
+    "SELECT term, :favorite_weight * doc FROM derbyname_favorite_words"
+    ") WHERE length(term) >= :min_length AND term NOT IN :stopwords "
+    "GROUP BY term ORDER BY weight DESC, term LIMIT :limit"
+).bindparams(bindparam("stopwords", expanding=True))
+
+
+@functools.cache
+def stopwords() -> tuple[str, ...]:
+    """Return the words the rendered cloud leaves out, so both clouds agree."""
+    from wordcloud import STOPWORDS
+
+    return tuple(sorted(STOPWORDS))
+
+
+def create_word_frequency_index(connection: Connection):
+    """
+    Create the favorites index, its triggers and the word count tables.
+
+    Safe to run on every start, after ``create_search_index``. When the
+    favorites index is new, it is built from the favorites already saved.
+    """
+    exists = connection.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE name = 'derbyname_favorite_fts'"
+    ).first()
+    for statement in WORD_FREQUENCY_DDL:
+        connection.exec_driver_sql(statement)
+    if not exists:
+        connection.exec_driver_sql(
+            "INSERT INTO derbyname_favorite_fts (rowid, name) "
+            "SELECT id, name FROM derbyname WHERE is_favorite"
+        )
+
+
+def size_buckets(weights: list[int]) -> list[int]:
+    """
+    Map word weights onto ``WORD_SIZES``.
+
+    Weights are spread on a log scale between the smallest and largest,
+    so a few very common words don't flatten everything else to one size.
+    """
+    if not weights:
+        return []
+    low, high = math.log(min(weights)), math.log(max(weights))
+    top = len(WORD_SIZES) - 1
+    if high == low:
+        return [WORD_SIZES[top // 2]] * len(weights)
+    return [
+        WORD_SIZES[round(top * (math.log(weight) - low) / (high - low))]
+        for weight in weights
+    ]
+
+
+async def read_word_frequencies(session: AsyncSession, limit: int) -> list[dict]:
+    """
+    Read the most common words in saved names, with favorites boosted.
+
+    A word's weight is the number of names containing it, plus
+    ``FAVORITE_WEIGHT`` for each favorite containing it. Stopwords, the
+    same ones the rendered cloud skips, and one-letter terms are left out.
+    The counts come from the full-text indexes' term lists, so the cost
+    grows with the number of distinct words, not with the number of names.
+
+    Args:
+        session: Database session
+        limit: Maximum number of words
+
+    Returns:
+        Words by descending weight, each with its display text, weight and
+        font size. Words are indexed case- and accent-folded, so the text
+        is the folded word, capitalized.
+    """
+    result = await session.exec(
+        TOP_WORDS_QUERY,
+        params={
+            "favorite_weight": FAVORITE_WEIGHT,
+            "min_length": MIN_WORD_LENGTH,
+            "stopwords": stopwords(),
+            "limit": limit,
+        },
+    )
+    rows = result.all()
+    sizes = size_buckets([row.weight for row in rows])
+    return [
+        {"text": row.term.capitalize(), "weight": row.weight, "size": size}
+        for row, size in zip(rows, sizes)
+    ]
@@ -1,70 +1,180 @@
-"""Word cloud generation for derby names."""
+"""Word cloud rendering for derby names, off the event loop and cached."""
 
+import asyncio
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 import io
-import base64
-from wordcloud import WordCloud
-import httpx
+import multiprocessing
+from typing import Optional
 
-# API base URL
-API_BASE = "http://localhost:8001/api"
+from config import settings
 
+# Shown until some names are saved
+PLACEHOLDER_WORDS = ["Generate", "Some", "Derby", "Names", "First!"]
+# Extra copies of a favorite's words, to make them bigger
+FAVORITE_WEIGHT = 3
+# Previews are rendered at 1/PREVIEW_SCALE of the requested size
+PREVIEW_SCALE = 4
+# Image sizes accepted, in pixels per side
+MIN_IMAGE_SIZE = 100
+MAX_IMAGE_SIZE = 2400
 
-async def generate_wordcloud_image() -> str:
+
+def wordcloud_text(names_data: list[dict]) -> str:
+    """Join names into the text a cloud is drawn from, repeating favorites."""
+    text_parts = []
+    for item in names_data:
+        # Add name once normally
+        text_parts.append(item["name"])
+        if item.get("is_favorite", False):
+            text_parts.extend([item["name"]] * FAVORITE_WEIGHT)
+    return " ".join(text_parts or PLACEHOLDER_WORDS)
+
+
+def render_png(text: str, width: int, height: int) -> bytes:
+    """
+    Lay out a word cloud and encode it as PNG.
+
+    Runs in a worker, so it imports ``wordcloud`` there and takes and
+    returns only picklable values.
+    """
+    from wordcloud import WordCloud
+
+    wordcloud = WordCloud(
+        width=width,
+        height=height,
+        background_color="#1a1a2e",
+        colormap="plasma",
+        relative_scaling=0.5,
+        # Previews scale the smallest font down with the image
+        min_font_size=max(4, 10 * width // 1200),
+        max_words=100,
+        prefer_horizontal=0.7,
+        collocations=False,  # Don't treat phrases as single words
+    ).generate(text)
+
+    buffer = io.BytesIO()
+    wordcloud.to_image().save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+class WordCloudRenderer:
     """
-    Generate a word cloud from all derby names in the database.
+    Render word clouds in a worker pool and keep the most recent PNGs.
 
-    Returns:
-        Base64 encoded PNG image string
+    Renders are keyed by the dataset version and image size, so a cloud is
+    laid out once per change to the names table however often it is
+    requested. Requests for a render already in progress share it.
     """
-    try:
-        # Fetch all names from the API
-        async with httpx.AsyncClient() as client:
-            response = await client.get(f"{API_BASE}/names", timeout=10.0)
-            response.raise_for_status()
-            names_data = response.json()
-
-        # Extract just the names
-        names = [item["name"] for item in names_data]
-
-        if not names:
-            # Return a placeholder if no names exist
-            names = ["Generate", "Some", "Derby", "Names", "First!"]
-
-        # Create word cloud text (repeat names based on favorites for emphasis)
-        text_parts = []
-        for item in names_data:
-            # Add name once normally
-            text_parts.append(item["name"])
-            # Add favorites 3 more times to make them bigger
-            if item.get("is_favorite", False):
-                text_parts.extend([item["name"]] * 3)
-
-        text = " ".join(text_parts) if text_parts else " ".join(names)
-
-        # Generate word cloud
-        wordcloud = WordCloud(
-            width=1200,
-            height=600,
-            background_color="#1a1a2e",
-            colormap="plasma",
-            relative_scaling=0.5,
-            min_font_size=10,
-            max_words=100,
-            prefer_horizontal=0.7,
-            collocations=False,  # Don't treat phrases as single words
-        ).generate(text)
-
-        # Convert to PNG image in memory
-        img_buffer = io.BytesIO()
-        wordcloud.to_image().save(img_buffer, format="PNG")
-        img_buffer.seek(0)
-
-        # Encode as base64
-        img_base64 = base64.b64encode(img_buffer.read()).decode()
-
-        return f"data:image/png;base64,{img_base64}"
-
-    except Exception as e:
-        print(f"Error generating word cloud: {e}")
-        # Return a simple error placeholder
-        return ""
+
+    def __init__(self, workers: int = 1, cache_size: int = 16):
+        self.workers = workers
+        self.cache_size = cache_size
+        self.renders = 0
+        self._cache: OrderedDict[tuple, bytes] = OrderedDict()
+        self._pending: dict[tuple, asyncio.Future] = {}
+        self._executor: Optional[Executor] = None
+
+    def cached(self, key: tuple) -> Optional[bytes]:
+        """Return the PNG for ``key`` if it has been rendered."""
+        png = self._cache.get(key)
+        if png is not None:
+            self._cache.move_to_end(key)
+        return png
+
+    def render(
+        self,
+        key: Optional[tuple],
+        text: str,
+        width: int,
+        height: int,
+        quick: bool = False,
+    ) -> asyncio.Future:
+        """
+        Start rendering ``text`` unless ``key`` is cached or already rendering.
+
+        Args:
+            key: Cache key; equal keys must mean identical images. None
+                renders without caching or sharing the result.
+            text: Text to draw the cloud from
+            width: Image width in pixels
+            height: Image height in pixels
+            quick: Run in the default thread pool instead of the worker
+                pool, so a small render doesn't queue behind full ones
+
+        Returns:
+            A future for the PNG bytes; the render runs whether or not the
+            caller awaits it, and a keyed result is cached either way
+        """
+        loop = asyncio.get_running_loop()
+        png = self.cached(key) if key is not None else None
+        if png is not None:
+            future = loop.create_future()
+            future.set_result(png)
+            return future
+        pending = self._pending.get(key)
+        if pending is not None and pending.get_loop() is loop:
+            return pending
+
+        executor = None if quick else self.executor
+        future = loop.run_in_executor(executor, render_png, text, width, height)
+        if key is not None:
+            self._pending[key] = future
+        future.add_done_callback(lambda f: self._finish(key, f))
+        return future
+
+    def shutdown(self):
+        """Stop the worker pool; it starts again on the next render."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> dict:
+        """Return cache and render counters."""
+        return {
+            "cached": len(self._cache),
+            "pending": len(self._pending),
+            "renders": self.renders,
+        }
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            if self.workers > 0:
+                # "spawn" avoids forking a process that already runs server threads
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=1)
+        return self._executor
+
+    def _finish(self, key: Optional[tuple], future: asyncio.Future):
+        """Cache a finished keyed render, evicting the least recently used."""
+        if key is not None and self._pending.get(key) is future:
+            del self._pending[key]
+        if future.cancelled() or future.exception() is not None:
+            return
+        self.renders += 1
+        if key is None:
+            return
+        self._cache[key] = future.result()
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+
+# Global renderer instance
+_renderer = None
+
+
+def get_wordcloud_renderer() -> WordCloudRenderer:
+    """Get or create the global word cloud renderer."""
+    global _renderer
+    if _renderer is None:
+        _renderer = WordCloudRenderer(
+            workers=settings.WORDCLOUD_WORKERS,
+            cache_size=settings.WORDCLOUD_CACHE_SIZE,
+        )
+    return _renderer
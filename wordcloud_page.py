@@ -1,10 +1,9 @@
 """Simplified word cloud page with auto-load and colorful names."""
 
-import httpx
 import json
 
-# API base URL
-API_BASE = "http://localhost:8001/api"
+from api_client import get_api_client
+from config import settings
 
 
 async def create_wordcloud_page():
@@ -22,31 +21,19 @@ async def create_wordcloud_page():
         with ui.card().classes("w-full p-8"):
             ui.label("Animated Word Cloud").classes("text-2xl font-bold mb-4")
             ui.label(
-                "Larger names appear more frequently. Favorites are emphasized!"
+                "Larger words appear in more names. Favorites are emphasized!"
             ).classes("text-gray-600 mb-4")
 
-            # Fetch names data
+            # Fetch word counts
             async def get_words_data():
-                """Fetch names and convert to word cloud format."""
+                """Fetch the top words, already weighted and sized by the API."""
                 try:
-                    async with httpx.AsyncClient() as client:
-                        response = await client.get(f"{API_BASE}/names", timeout=10.0)
-                        response.raise_for_status()
-                        names_data = response.json()
-
-                    if not names_data:
-                        return []
-
-                    # Convert to simple list with sizes
-                    words = []
-                    for item in names_data:
-                        # Base size of 20, favorites get size of 40
-                        size = 40 if item.get("is_favorite", False) else 20
-                        words.append({"text": item["name"], "size": size})
-
-                    return words
+                    # The client rereads them only when the table has changed
+                    return await get_api_client().word_frequencies(
+                        limit=settings.WORDCLOUD_WORDS
+                    )
                 except Exception as e:
-                    print(f"Error fetching names: {e}")
+                    print(f"Error fetching words: {e}")
                     return []
 
             # Initial data load
@@ -153,3 +140,11 @@ async def create_wordcloud_page():
             ui.button("🔄 Refresh Now", on_click=refresh_cloud).classes("mt-4").props(
                 "color=purple"
             )
+
+        with ui.card().classes("w-full p-8"):
+            ui.label("Rendered Word Cloud").classes("text-2xl font-bold mb-4")
+            # Rendered by the API and served from this app's origin; a
+            # low-resolution preview shows until the full image has loaded
+            ui.image("/wordcloud.png").props(
+                'placeholder-src="/wordcloud.png?preview=true"'
+            ).classes("w-full rounded-lg")
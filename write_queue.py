@@ -0,0 +1,195 @@
+"""Write-behind queue that group-commits name inserts."""
+
+import asyncio
+from typing import Optional
+
+from sqlalchemy import func
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from models import DerbyName
+from name_filter import NameFilter
+
+# Names read from the table per chunk while building the filter
+LOAD_CHUNK_SIZE = 10_000
+
+
+class WriteQueue:
+    """
+    Collect name inserts from every writer and commit them together.
+
+    Callers await ``insert`` and get their saved row back once the
+    transaction holding it commits. A flush starts as soon as a name is
+    queued and takes everything that arrives within ``max_delay`` seconds,
+    up to ``max_batch`` rows, so a burst of inserts pays for one commit
+    instead of one each.
+
+    Inserts skip names that are already saved instead of failing, and every
+    committed name is recorded in ``saved``, a filter generators consult so
+    they rarely offer a duplicate in the first place.
+    """
+
+    def __init__(
+        self, engine: AsyncEngine, max_batch: int = 64, max_delay: float = 0.005
+    ):
+        if max_batch < 1:
+            raise ValueError("max_batch must be at least 1")
+
+        self.engine = engine
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.flushes = 0
+        self.rows = 0
+        self.saved = NameFilter()
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop = None
+
+    async def insert(self, name: str) -> Optional[DerbyName]:
+        """
+        Queue a name and wait for the flush that saves it.
+
+        Args:
+            name: Derby name to insert
+
+        Returns:
+            The saved row, with its assigned id, or None if the name was
+            already saved
+        """
+        self._ensure_running()
+        future = self._loop.create_future()
+        self._queue.put_nowait((name, future))
+        return await future
+
+    async def insert_many(self, names: list[str]) -> list[DerbyName]:
+        """
+        Save a batch of names in its own transaction, bypassing the queue.
+
+        Args:
+            names: Derby names to insert
+
+        Returns:
+            Rows for the names that were not already saved, in input order
+        """
+        rows = await self._insert(names)
+        return [row for row in rows if row is not None]
+
+    async def load_saved_names(self):
+        """Rebuild ``saved`` from every name in the table."""
+        async with self.engine.connect() as conn:
+            count = (await conn.execute(select(func.count(DerbyName.id)))).scalar()
+            # Room to double before the filter needs a second layer
+            saved = NameFilter(capacity=max(2 * count, 100_000))
+            result = await conn.stream(select(DerbyName.name))
+            async for rows in result.partitions(LOAD_CHUNK_SIZE):
+                saved.update(name for (name,) in rows)
+        self.saved = saved
+
+    async def close(self):
+        """Flush every queued name and stop the flusher."""
+        if self._task is None or self._loop is not asyncio.get_running_loop():
+            return
+        self._queue.put_nowait(None)
+        await self._task
+        self._task = None
+
+    def stats(self) -> dict:
+        """Return flush and row counters."""
+        return {
+            "pending": self._queue.qsize() if self._queue is not None else 0,
+            "flushes": self.flushes,
+            "rows": self.rows,
+        }
+
+    def _ensure_running(self):
+        """Start the flusher on the running loop, restarting it on a new one."""
+        loop = asyncio.get_running_loop()
+        if self._task is not None and self._loop is loop and not self._task.done():
+            return
+        self._loop = loop
+        self._queue = asyncio.Queue()
+        self._task = loop.create_task(self._flush_loop())
+
+    async def _flush_loop(self):
+        """Gather batches off the queue and commit each in one transaction."""
+        stopping = False
+        while not stopping:
+            item = await self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = self._loop.time() + self.max_delay
+            while len(batch) < self.max_batch:
+                try:
+                    item = self._queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    timeout = deadline - self._loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._queue.get(), timeout)
+                    except TimeoutError:
+                        break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            await self._flush(batch)
+
+    async def _flush(self, batch: list):
+        """Save a batch and hand each caller its row, or None if it clashed."""
+        try:
+            rows = await self._insert([name for name, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                _resolve(future, exception=e)
+            return
+
+        for (_, future), row in zip(batch, rows):
+            _resolve(future, row)
+
+    async def _insert(self, names: list[str]) -> list[Optional[DerbyName]]:
+        """
+        Insert names in one transaction, ignoring any that are already saved.
+
+        Returns:
+            One entry per name in input order: its new row, or None for a
+            name that was already saved or repeated earlier in the batch
+        """
+        # ON CONFLICT DO NOTHING only returns inserted rows, so match them
+        # back to names rather than relying on parameter order
+        statement = (
+            insert(DerbyName)
+            .on_conflict_do_nothing(index_elements=["name"])
+            .returning(DerbyName)
+        )
+        async with AsyncSession(self.engine, expire_on_commit=False) as session:
+            inserted = (
+                await session.scalars(
+                    statement,
+                    [
+                        {"name": name, "is_favorite": False, "meta": {}}
+                        for name in names
+                    ],
+                )
+            ).all()
+            await session.commit()
+        self.flushes += 1
+        self.rows += len(inserted)
+        self.saved.update(names)
+
+        by_name = {row.name: row for row in inserted}
+        return [by_name.pop(name, None) for name in names]
+
+
+def _resolve(future: asyncio.Future, result=None, exception=None):
+    """Complete a caller's future unless the caller has gone away."""
+    if future.done():
+        return
+    if exception is not None:
+        future.set_exception(exception)
+    else:
+        future.set_result(result)